@@ -0,0 +1,5 @@
+"""Py-Dician's benchmarks.
+
+Each module of this package is a benchmark script, to be run from the repository folder with the
+``-m`` option of the interpreter, such as ``python -m benchmarks.bench_memory``.
+"""
@@ -0,0 +1,132 @@
+"""Measures the memory footprint of tokens and operation trees.
+
+Tokens and operation nodes are slotted, i.e. they carry no per-instance ``__dict__``. To show the
+difference, every measurement is repeated with "dict-backed" twins of the same classes: unslotted classes
+with the same methods, whose instances hold the same values in their ``__dict__`` -- the layout they had
+before being slotted. Trees are measured both as parsed by default and as parsed by a Parser(spans=True),
+whose nodes also carry their source spans.
+
+Run it from the repository folder:
+
+    > python -m benchmarks.bench_memory
+"""
+
+import copy
+import tracemalloc
+import pydician
+
+
+_EXPRESSIONS = [
+        '1d20 + 5',
+        '4d6',
+        '(1d4)d6 + 2 * 3 >= 10',
+        ' + '.join(['(2d6 + 3) * 4'] * 25)
+    ]
+
+_TREES_PER_MEASUREMENT = 1000
+
+_dict_backed_classes = {}
+
+
+def _dict_backed_class(cls: type) -> type:
+    # Returns an unslotted twin of a class, with the same methods but no slots: a class of its own rather than a
+    # subclass, which would inherit the slots, so that the values of its instances live in their __dict__.
+
+    if cls not in _dict_backed_classes:
+        namespace = {}
+
+        for c in reversed(cls.__mro__[:-1]):
+            slots = c.__dict__.get('__slots__', ())
+            namespace.update((name, value) for name, value in c.__dict__.items()
+                             if name not in slots and name not in ('__slots__', '__dict__', '__weakref__'))
+
+        _dict_backed_classes[cls] = type(cls.__name__, (), namespace)
+
+    return _dict_backed_classes[cls]
+
+
+def _slot_names(cls: type) -> list:
+    return [name for c in cls.__mro__ for name in c.__dict__.get('__slots__', ())]
+
+
+def _dict_backed_copy(obj: object, deep: bool = True) -> object:
+    # Returns an unslotted copy of a slotted object (and, if deep, of its operands). Like the nodes from before
+    # the slots, the copy has no cached hash, and a source span only if the original has one.
+
+    dict_backed = object.__new__(_dict_backed_class(type(obj)))
+
+    for name in _slot_names(type(obj)):
+        value = getattr(obj, name)
+        if name == '_hash' or (name == '_span' and value is None):
+            continue
+        if deep and isinstance(value, pydician.Operation):
+            value = _dict_backed_copy(value)
+        elif deep and isinstance(value, pydician.SourceSpan):
+            # Each parsed node has a span of its own, so the copies get their own too.
+            value = pydician.SourceSpan(*value)
+        # Set as the constructors of the nodes from before the slots did, which lets CPython share their dict keys.
+        setattr(dict_backed, name, value)
+
+    return dict_backed
+
+
+def _nodes(op: pydician.Operation) -> list:
+    nodes = [op]
+
+    for name in _slot_names(type(op)):
+        value = getattr(op, name, None)
+        if isinstance(value, pydician.Operation):
+            nodes.extend(_nodes(value))
+
+    return nodes
+
+
+def _allocated_per_item(build) -> float:
+    # Measures the memory allocated by build(), which creates _TREES_PER_MEASUREMENT items, per item.
+    # The list holding the items is accounted for too, which adds a pointer (8 bytes) per item.
+
+    tracemalloc.start()
+    snapshot = tracemalloc.take_snapshot()
+    items = build()
+    allocated = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(snapshot, 'filename'))
+    tracemalloc.stop()
+    del items
+
+    return allocated / _TREES_PER_MEASUREMENT
+
+
+def _print_object_footprint(label: str, obj: object) -> None:
+    # Prints the footprint of a single object, without the operands it refers to.
+
+    slotted = _allocated_per_item(lambda: [copy.copy(obj) for _ in range(_TREES_PER_MEASUREMENT)])
+    dict_backed = _allocated_per_item(lambda: [_dict_backed_copy(obj, deep=False)
+                                               for _ in range(_TREES_PER_MEASUREMENT)])
+    print(f'{label: <20} {slotted: >8.0f} {dict_backed: >12.0f}')
+
+
+def main() -> None:
+    print('Per-object footprint (bytes)')
+    print(f'{"object": <20} {"slotted": >8} {"dict-backed": >12}')
+    _print_object_footprint('Token', pydician.Token(pydician.TokenType.INTEGER, '6', 1, 1))
+
+    seen = set()
+    for node in _nodes(pydician.parse('-(1d4)d6 + 2 * 3 >= 10')):
+        if type(node) not in seen:
+            seen.add(type(node))
+            _print_object_footprint(type(node).__name__, node)
+
+    for title, parser in [('', pydician.Parser()), (', with source spans', pydician.Parser(spans=True))]:
+        print()
+        print(f'Per-tree footprint{title} (bytes, average of {_TREES_PER_MEASUREMENT} trees)')
+        print(f'{"expression": <32} {"nodes": >6} {"slotted": >9} {"dict-backed": >12}')
+        for expression in _EXPRESSIONS:
+            tree = parser.parse(expression)
+            slotted = _allocated_per_item(lambda: [parser.parse(expression) for _ in range(_TREES_PER_MEASUREMENT)])
+            dict_backed = _allocated_per_item(lambda: [_dict_backed_copy(tree)
+                                                       for _ in range(_TREES_PER_MEASUREMENT)])
+            label = expression if len(expression) <= 32 else expression[:29] + '...'
+            print(f'{label: <32} {len(_nodes(tree)): >6} {slotted: >9.0f} {dict_backed: >12.0f}')
+
+
+if __name__ == '__main__':
+    main()
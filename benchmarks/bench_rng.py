@@ -0,0 +1,63 @@
+"""Compares random sources on dice-heavy expressions.
+
+Each expression is rolled through run() and through its compiled callable, once with each random
+source. Sources that depend on missing packages (NumPy) are skipped.
+
+Run it from the repository folder:
+
+    > python -m benchmarks.bench_rng
+"""
+
+import random
+import timeit
+import pydician
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+_EXPRESSIONS = [
+        '1d20 + 5',
+        '4d6',
+        '10d10 + 10d8',
+        '(1d4)d6 * 2d6',
+        '100d6'
+    ]
+
+_ROLLS = 2000
+
+
+def _sources() -> list:
+    sources = [
+            ('thread default', None),
+            ('random.Random', random.Random()),
+            ('SystemRandom', random.SystemRandom())
+        ]
+
+    if numpy is not None:
+        sources.append(('NumPy Generator', pydician.NumpyRandomSource(numpy.random.default_rng())))
+
+    return sources
+
+
+def _microseconds_per_roll(roll, rng) -> float:
+    return min(timeit.repeat(lambda: roll(rng), number=_ROLLS, repeat=5)) / _ROLLS * 1e6
+
+
+def main() -> None:
+    sources = _sources()
+
+    print(f'Microseconds per roll (best of 5 x {_ROLLS} rolls)')
+    print(f'{"expression": <16} {"mode": <9}' + ''.join(f' {name: >16}' for name, _ in sources))
+
+    for expression in _EXPRESSIONS:
+        op = pydician.parse(expression)
+        for mode, roll in (('run', op.run), ('compiled', op.compile())):
+            timings = ''.join(f' {_microseconds_per_roll(roll, rng): >16.2f}' for _, rng in sources)
+            print(f'{expression: <16} {mode: <9}{timings}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""Measures Py-Dician's hot paths, storing the timings as a JSON baseline to compare later runs against.
+
+The cases cover the tokenizer's throughput, the parser's latency against the length and the nesting
+depth of expressions, the execution of representative operation trees, roll() from end to end, and the
+exact distributions of dice pools of growing sizes.
+Timings are the best of a few repeats, in seconds per call (or per token, for the tokenizer).
+
+Run it from the repository folder:
+
+    > python -m benchmarks.bench_suite run -o baseline.json
+    > python -m benchmarks.bench_suite compare baseline.json
+    > python -m benchmarks.bench_suite compare baseline.json current.json --threshold 0.2
+
+The compare command runs the suite again unless it's given a second file, prints the ratio of each
+case's timing to the baseline's, and exits with status 1 if any case is slower than the threshold allows.
+"""
+
+import argparse
+import json
+import platform
+import re
+import sys
+import timeit
+from typing import Callable, Dict, List, Tuple
+import pydician
+
+
+# Each repeat runs a case for about this many seconds.
+_REPEAT_SECONDS = 0.05
+
+_DEFAULT_THRESHOLD = 0.1
+
+
+def _sum_chain(terms: int) -> str:
+    return ' + '.join(f'{i % 9 + 1}d{i % 19 + 2}' for i in range(terms))
+
+
+def _nested(depth: int) -> str:
+    return '(' * depth + '1d6' + ' + 1)' * depth
+
+
+def _tokenizer_case(expression: str) -> Tuple[Callable[[], None], int]:
+    tokenizer = pydician.Tokenizer()
+
+    def tokenize() -> None:
+        tokenizer.set_input_string(expression)
+        next_token = tokenizer.next_token
+
+        while next_token().type is not pydician.TokenType.END:
+            pass
+
+    return tokenize, len(pydician.Tokenizer(expression).tokenize_all())
+
+
+def _parser_case(expression: str) -> Tuple[Callable[[], None], int]:
+    # Uses a Parser directly, since the free parse() function would hit its cache.
+
+    parser = pydician.Parser()
+    return (lambda: parser.parse(expression)), 1
+
+
+def _run_case(expression: str) -> Tuple[Callable[[], None], int]:
+    return pydician.parse(expression).run, 1
+
+
+def _roll_case(expression: str) -> Tuple[Callable[[], None], int]:
+    return (lambda: pydician.roll(expression)), 1
+
+
+def _distribution_case(expression: str, cached: bool) -> Tuple[Callable[[], None], int]:
+    op = pydician.parse(expression)
+
+    if cached:
+        return op.distribution, 1
+
+    def distribution() -> None:
+        pydician._dice_sum_counts_cache.clear()
+        op.distribution()
+
+    return distribution, 1
+
+
+def _cases() -> List[Tuple[str, Callable[[], Tuple[Callable[[], None], int]]]]:
+    # Each case is a name and a factory of a (callable, number of units per call) pair.
+
+    cases = [(f'tokenizer/next_token/{n}-terms', lambda n=n: _tokenizer_case(_sum_chain(n))) for n in (10, 1000)]
+    # Up to about 10^5 tokens: 4 per term of a chain, and 4 per level of nesting.
+    cases += [(f'parser/length/{n}-terms', lambda n=n: _parser_case(_sum_chain(n)))
+              for n in (1, 10, 100, 1000, 25000)]
+    cases += [(f'parser/depth/{n}', lambda n=n: _parser_case(_nested(n))) for n in (1, 10, 100, 1000, 25000)]
+    cases += [(f'run/{expression}', lambda expression=expression: _run_case(expression))
+              for expression in ('1d20+5', '4d6', '100d100')]
+    cases += [(f'run/depth/{n}', lambda n=n: _run_case(_nested(n))) for n in (10, 50)]
+    cases += [(f'roll/{expression}', lambda expression=expression: _roll_case(expression))
+              for expression in ('1d20+5', '2d6 + 3 >= 10')]
+    cases += [(f'distribution/{expression}', lambda expression=expression: _distribution_case(expression, False))
+              for expression in ('10d6', '100d6', '500d20', '1000d100', '(1d100)d6')]
+    cases += [(f'distribution/cached/{expression}', lambda expression=expression: _distribution_case(expression, True))
+              for expression in ('100d6', '500d20', '1000d100')]
+    return cases
+
+
+def _time(function: Callable[[], None], units: int, repeat: int) -> float:
+    timer = timeit.Timer(function)
+    number, seconds = timer.autorange()
+    number = max(1, int(number * _REPEAT_SECONDS / max(seconds, 1e-9)))
+    return min(timer.repeat(repeat, number)) / number / units
+
+
+def run_suite(pattern: str = None, repeat: int = 5) -> Dict[str, float]:
+    """Runs the cases whose names match the pattern (all of them, by default), returning their timings."""
+
+    results = {}
+
+    for name, factory in _cases():
+        if pattern is None or re.search(pattern, name):
+            results[name] = _time(*factory(), repeat)
+            print(f'{name: <52} {results[name] * 1e6: >12.3f} us', file=sys.stderr)
+
+    return results
+
+
+def compare(baseline: Dict[str, float], current: Dict[str, float], threshold: float) -> List[str]:
+    """Prints how each case's timing compares to the baseline, returning the names of the regressed cases."""
+
+    regressions = []
+    print(f'{"case": <52} {"baseline": >12} {"current": >12} {"ratio": >8}')
+
+    for name in sorted(baseline.keys() & current.keys()):
+        ratio = current[name] / baseline[name]
+        flag = ''
+
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+
+        print(f'{name: <52} {baseline[name] * 1e6: >9.3f} us {current[name] * 1e6: >9.3f} us {ratio: >8.2f}{flag}')
+
+    for name in sorted(baseline.keys() - current.keys()):
+        print(f'{name: <52} missing from the current results')
+
+    return regressions
+
+
+def _load(path: str) -> Dict[str, float]:
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)['results']
+
+
+def _save(path: str, results: Dict[str, float]) -> None:
+    document = {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'results': results
+        }
+
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(document, file, indent=4, sort_keys=True)
+        file.write('\n')
+
+
+def main(argv: List[str] = None) -> int:
+    arg_parser = argparse.ArgumentParser(prog='python -m benchmarks.bench_suite', description=__doc__.split('\n')[0])
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+
+    run_command = commands.add_parser('run', help='run the suite, optionally storing its results')
+    run_command.add_argument('-o', '--output', help='the JSON file to store the results at')
+
+    compare_command = commands.add_parser('compare', help='compare results to a baseline')
+    compare_command.add_argument('baseline', help='the JSON file of the baseline')
+    compare_command.add_argument('current', nargs='?', help='the JSON file of the current results (default: run)')
+    compare_command.add_argument('-t', '--threshold', type=float, default=_DEFAULT_THRESHOLD,
+                                 help=f'the tolerated slowdown, as a fraction (default: {_DEFAULT_THRESHOLD})')
+    compare_command.add_argument('-o', '--output', help='the JSON file to store the current results at')
+
+    for command in (run_command, compare_command):
+        command.add_argument('-k', '--filter', help='only run the cases whose names match this regular expression')
+        command.add_argument('-r', '--repeat', type=int, default=5, help='the number of repeats per case')
+
+    args = arg_parser.parse_args(argv)
+
+    if args.command == 'compare' and args.current is not None:
+        current = _load(args.current)
+    else:
+        current = run_suite(args.filter, args.repeat)
+
+    if args.output:
+        _save(args.output, current)
+
+    if args.command == 'run':
+        return 0
+
+    baseline = _load(args.baseline)
+
+    if args.filter:
+        baseline = {name: timing for name, timing in baseline.items() if re.search(args.filter, name)}
+
+    regressions = compare(baseline, current, args.threshold)
+
+    if regressions:
+        print(f'{len(regressions)} case(s) regressed beyond {args.threshold:.0%}.')
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
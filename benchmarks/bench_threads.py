@@ -0,0 +1,144 @@
+"""Measures how the throughput of parsing and rolling scales with the number of threads.
+
+Each workload is run by 1, 2, 4 and 8 threads at once, all of them sharing a single Parser, operation
+tree or parse cache, as the threads of a web server would. On regular CPython builds, the GIL lets a
+single thread run Python code at a time, so the throughput stays about flat; on free-threaded builds
+(3.13t and later), it should grow with the number of threads, up to the number of cores.
+
+Run it from the repository folder:
+
+    > python -m benchmarks.bench_threads
+    > python -m benchmarks.bench_threads --threads 1 2 4 8 16 -n 20000 -k parse
+"""
+
+import argparse
+import os
+import platform
+import re
+import sys
+import threading
+from time import perf_counter
+from typing import Callable, Dict, List
+import pydician
+
+
+_EXPRESSIONS = [
+        '1d20 + 5',
+        '4d6 + 2 * 3',
+        '(1d4)d6 >= 10',
+        '2d6 + 1d8 - (3 + 1d4) * 2'
+    ]
+
+
+def _parse_workload() -> Callable[[int], None]:
+    # A single Parser shared by all threads, parsing without any cache.
+
+    parser = pydician.Parser()
+
+    def parse(n: int) -> None:
+        for i in range(n):
+            parser.parse(_EXPRESSIONS[i % len(_EXPRESSIONS)])
+
+    return parse
+
+
+def _run_workload() -> Callable[[int], None]:
+    # A single operation tree shared by all threads, each rolling from its own default random source.
+
+    op = pydician.parse('4d6 + 1d20 - 2')
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            op.run()
+
+    return run
+
+
+def _roll_workload() -> Callable[[int], None]:
+    # roll() from end to end, through the shared parse cache.
+
+    def roll(n: int) -> None:
+        for i in range(n):
+            pydician.roll(_EXPRESSIONS[i % len(_EXPRESSIONS)])
+
+    return roll
+
+
+_WORKLOADS = {
+        'parse': _parse_workload,
+        'run': _run_workload,
+        'roll': _roll_workload
+    }
+
+
+def _throughput(work: Callable[[int], None], threads: int, n: int) -> float:
+    # Runs the work n times in each of the threads, all starting together, and returns the total calls per second.
+
+    barrier = threading.Barrier(threads + 1)
+
+    def worker() -> None:
+        barrier.wait()
+        work(n)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+
+    for thread in workers:
+        thread.start()
+
+    barrier.wait()
+    start = perf_counter()
+
+    for thread in workers:
+        thread.join()
+
+    return threads * n / (perf_counter() - start)
+
+
+def _build() -> str:
+    gil_enabled = getattr(sys, '_is_gil_enabled', lambda: True)()
+    return f'{platform.python_implementation()} {platform.python_version()}, ' \
+           f'{"GIL enabled" if gil_enabled else "free-threaded"}, {os.cpu_count()} CPUs'
+
+
+def run_scaling(thread_counts: List[int], n: int, pattern: str = None) -> Dict[str, Dict[int, float]]:
+    """Measures the throughput of the workloads whose names match the pattern (all of them, by default).
+
+    Returns:
+        The calls per second of each workload, by thread count.
+    """
+
+    results = {}
+    print(_build())
+    print(f'{"workload": <10} {"threads": >8} {"calls/s": >12} {"speedup": >8}')
+
+    for name, factory in _WORKLOADS.items():
+        if pattern is not None and not re.search(pattern, name):
+            continue
+
+        work = factory()
+        # Warms up the caches and the default random source of the main thread.
+        work(min(n, 100))
+        results[name] = {}
+
+        for threads in thread_counts:
+            results[name][threads] = _throughput(work, threads, n)
+            speedup = results[name][threads] / results[name][thread_counts[0]]
+            print(f'{name: <10} {threads: >8} {results[name][threads]: >12.0f} {speedup: >7.2f}x')
+
+    return results
+
+
+def main(argv: List[str] = None) -> int:
+    arg_parser = argparse.ArgumentParser(prog='python -m benchmarks.bench_threads', description=__doc__.split('\n')[0])
+    arg_parser.add_argument('-t', '--threads', type=int, nargs='+', default=[1, 2, 4, 8],
+                            help='the numbers of threads to run each workload with (default: 1 2 4 8)')
+    arg_parser.add_argument('-n', '--calls', type=int, default=5000, help='the number of calls per thread')
+    arg_parser.add_argument('-k', '--filter', help='only run the workloads whose names match this regular expression')
+    args = arg_parser.parse_args(argv)
+
+    run_scaling(args.threads, args.calls, args.filter)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,31 @@
-from typing import Any, Callable, NamedTuple, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, TextIO, Tuple
+import argparse
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from copy import copy
 from enum import Enum, unique
-from random import randint
+from fractions import Fraction
+from itertools import accumulate, islice, repeat
+import json
+from math import gcd
+import mmap
+import operator
+from multiprocessing import shared_memory
+import os
+from random import Random
+import re
+import struct
+import sys
+from threading import Lock, local
+from time import perf_counter
+
+try:
+    import numpy
+except ImportError:
+    # NumPy is optional. Only batch evaluation depends on it.
+    numpy = None
 
 
 class PyDicianError(Exception):
@@ -15,939 +40,4117 @@ class OperationError(PyDicianError):
     pass
 
 
-class Operation:
-    """Base-class of the executable operations to which Py-Dician expressions are translated.
+class UnsupportedStatsError(OperationError):
+    """Exception thrown by Operation.stats() when the statistics of an operation can't be computed exactly from
+    those of its operands."""
 
-    An operation takes zero or more operands, which act as its parameters. Each operand should
-    also be an operation that results in a value of a type accepted by the main operation.
-    """
+    pass
 
-    def run(self) -> Any:
-        """Executes this operation.
 
-        Must be overridden by derived classes.
+def _sorted_distribution(distribution: Dict[Any, Fraction]) -> Dict[Any, Fraction]:
+    # Returns a distribution with its outcomes in ascending order, whenever they're comparable.
 
-        Returns:
-            The result of the operation, which could be anything really.
-        """
+    try:
+        return dict(sorted(distribution.items()))
+    except TypeError:
+        return distribution
 
-        raise NotImplementedError
 
+def _combine_distributions(left: Dict[Any, Fraction], right: Dict[Any, Fraction],
+                           combine: Callable[[Any, Any], Any]) -> Dict[Any, Fraction]:
+    # Returns the distribution of combine(a, b), with a and b being independent outcomes of the given distributions.
 
-class SimpleOp(Operation):
-    """Base-class of operations that take no operands (parameters), such as literal values."""
+    result = {}
 
-    pass
+    for left_value, left_probability in left.items():
+        for right_value, right_probability in right.items():
+            value = combine(left_value, right_value)
+            probability = left_probability * right_probability
+            # Adding the first probability of each value to 0 would reduce it again, which is slow for large pools.
+            result[value] = result[value] + probability if value in result else probability
 
+    return _sorted_distribution(result)
 
-class UnaryOp(Operation):
-    """Base-class of operations that take a single operand (parameter), such as arithmetic-negation or die definition.
 
-    Parameters:
-        operand (Operation): the single operand of this operation.
-    """
+def _int_distribution(distribution: Dict[Any, Fraction]) -> Dict[int, Fraction]:
+    # Returns the distribution of int(x), with x being an outcome of the given distribution.
 
-    def __init__(self, operand: Operation):
-        super().__init__()
-        self._operand = operand
+    result = {}
 
+    for value, probability in distribution.items():
+        value = int(value)
+        result[value] = result.get(value, 0) + probability
 
-class BinaryOp(Operation):
-    """Base-class of operations that take exactly two operands (parameters) -- a left and a right one.
+    return result
 
-    Parameters:
-        left_operand (Operation): the left operand of this operation.
-        right_operand (Operation): the right operand of this operation.
-    """
 
-    def __init__(self, left_operand: Operation, right_operand: Operation):
-        super().__init__()
-        self._left_operand = left_operand
-        self._right_operand = right_operand
+def _dice_sum_counts(dice_count: int, die_maximum: int) -> List[int]:
+    # Returns how many of the die_maximum ** dice_count possible rolls result in each sum, from the smallest
+    # sum (dice_count) to the largest one (dice_count * die_maximum).
+    #
+    # The counts are the coefficients c[m] of f(x) = P(x) ** n, with P(x) = 1 + x + ... + x ** (F - 1) =
+    # (1 - x ** F) / (1 - x). Since P(x) * f'(x) = n * P'(x) * f(x), multiplying both sides by (1 - x) and
+    # matching coefficients gives each count from three of the previous ones:
+    #
+    #   (m + 1) * c[m + 1] = (m + n) * c[m] + (m + 1 - F - n * F) * c[m + 1 - F] + (n * (F - 1) - m + F) * c[m - F]
+    #
+    # That's exact, and linear in the number of sums, unlike convolving one die at a time. The counts are
+    # symmetric, so only the first half of them is computed.
 
+    last = dice_count * (die_maximum - 1)
+    counts = [0] * (last + 1)
+    counts[0] = 1
+    base = dice_count * die_maximum
 
-class LiteralValueOp(SimpleOp):
-    """Operation that produces a fixed, unmodified value.
+    for m in range(last // 2):
+        count = (m + dice_count) * counts[m]
+        i = m + 1 - die_maximum
 
-    Parameters:
-        value (Any): the value that'll be returned when the operaton is executed.
-                     Note that a VALUE is expected, NOT an OPERATION.
-    """
+        if i >= 0:
+            count += (i - base) * counts[i]
 
-    def __init__(self, value: Any):
-        super().__init__()
-        self._value = value
+            if i > 0:
+                count += (base - dice_count - m + die_maximum) * counts[i - 1]
 
-    def run(self) -> Any:
-        """Returns a fixed, unmodified value.
+        counts[m + 1] = count // (m + 1)
 
-        Returns:
-            The value that was stored at construction time, unmodified.
-        """
+    for m in range(last // 2 + 1, last + 1):
+        counts[m] = counts[last - m]
 
-        return self._value
+    return counts
 
 
-class DieOp(UnaryOp):
-    '''Operation that produces a "rollable die".
+# Builds a Fraction from a numerator and a positive denominator that are known to be coprime, skipping the gcd that
+# Fraction() takes to reduce them. Python 3.12 added a constructor for that; older versions have an argument instead.
+if hasattr(Fraction, '_from_coprime_ints'):
+    _coprime_fraction = Fraction._from_coprime_ints
+else:
+    def _coprime_fraction(numerator: int, denominator: int) -> Fraction:
+        return Fraction(numerator, denominator, _normalize=False)
 
-    In fact, the operation produces a callable that generates a random integer number in the range
-    [1, n], with n being the result of the single operand of this operation.
 
-    Parameters:
-        operand (Operation): an operation that produces an integer number that'll be the maximum
-                             value of the die.
-    '''
+def _dice_sum_probability(count: int, total: int, die_maximum: int) -> Fraction:
+    # Returns count / total, total being a power of die_maximum. For large pools, Fraction(count, total) takes most
+    # of the time of a distribution, on the gcd of two huge numbers. Their common factors can only be factors of
+    # die_maximum, though, so they're found through the gcds of the count and die_maximum, which are cheap.
 
-    def run(self) -> Callable[[], int]:
-        '''Returns a "rollable die" in the form of a callable.
+    factors = 1
+    remainder = count
+    common = gcd(remainder % die_maximum, die_maximum)
 
-        Returns:
-            A parameterless callable that generates a random integer number in the range [1, n],
-            with n being the maximum value of the die.
-        '''
+    while common > 1:
+        factors *= common
+        remainder //= common
+        common = gcd(remainder % die_maximum, die_maximum)
 
-        die_maximum = int(self._operand.run())
+    if factors == 1:
+        return _coprime_fraction(count, total)
 
-        return lambda: randint(1, die_maximum)
+    # The count may hold more of those factors than the total does.
+    common = gcd(total % factors, factors)
+    return _coprime_fraction(count // common, total // common)
 
 
-class DiceRollOp(BinaryOp):
-    """Operation that produces the sum of multiple rolls of a single die type.
+def _dice_roll_distribution(dice_count: int, die_maximum: int) -> Dict[int, Fraction]:
+    # Returns the distribution of the sum of dice_count rolls of a die of die_maximum faces, built from the counts
+    # of its sums, which are shared through _dice_sum_counts_cache.
 
-    Parameters:
-        left_operand (Operation): an operation that produces the number of rolled dice.
-        right_operand (Operation): an operation that produces a die type.
-    """
+    if dice_count <= 0:
+        return {0: Fraction(1)}
 
-    def __init__(self, left_operand: Operation, right_operand: Operation):
-        super().__init__(left_operand, right_operand)
+    if die_maximum < 1:
+        raise ValueError(f'cannot roll a die with maximum value {die_maximum}')
 
-    def run(self) -> int:
-        """Returns the sum of multiple rolls of a single die.
+    counts = _dice_sum_counts_cache.get(dice_count, die_maximum)
+    total = die_maximum ** dice_count
+    # Symmetric sums have the same probability, so it's computed once for both of them.
+    probabilities = [_dice_sum_probability(count, total, die_maximum) for count in counts[:len(counts) // 2 + 1]]
+    probabilities += reversed(probabilities[:(len(counts) - 1) // 2])
 
-        Returns:
-            The sum of the results of multiple rolls of a single type of die.
-        """
+    return dict(zip(range(dice_count, dice_count + len(counts)), probabilities))
 
-        dice_count = int(self._left_operand.run())
-        die = self._right_operand.run()
 
-        return sum(die() for i in range(dice_count))
+class _DiceSumCountsCache():
+    # Size-bounded, least-recently-used cache of the counts of the sums of dice rolls (see _dice_sum_counts()), keyed
+    # by their (dice count, die maximum) pairs. The size of an entry is the memory it takes, in bytes, as the counts
+    # of large pools are huge integers. Only the first half of the counts is accounted for, as the second half
+    # refers to the same integers. Entries larger than the maximum size are never cached. Thread-safe.
 
+    def __init__(self, maxsize: int):
+        self._lock = Lock()
+        self._counts = OrderedDict()
+        self._maxsize = maxsize
+        self._size = 0
 
-class SingleDieRollOp(DiceRollOp):
-    """Operation that evaluates the roll of a single die.
+    def get(self, dice_count: int, die_maximum: int) -> List[int]:
+        key = (dice_count, die_maximum)
 
-    Equivalent to ``DiceRollOp(LiteralValueOp(1), DieOp(die_faces_operand))``.
+        with self._lock:
+            entry = self._counts.get(key)
 
-    Parameters:
-        operand (Operation): an operation that produces a die type.
-    """
+            if entry is not None:
+                self._counts.move_to_end(key)
+                return entry[0]
 
-    def __init__(self, operand: Operation):
-        super().__init__(LiteralValueOp(1), operand)
+        counts = _dice_sum_counts(dice_count, die_maximum)
+        size = sys.getsizeof(counts) + sum(map(sys.getsizeof, counts[:len(counts) // 2 + 1]))
 
+        with self._lock:
+            if size <= self._maxsize and key not in self._counts:
+                self._counts[key] = (counts, size)
+                self._size += size
 
-class NegateOp(UnaryOp):
-    """Operation that produces the arithmetic-negation of a value.
+                while self._size > self._maxsize:
+                    _, (_, evicted_size) = self._counts.popitem(last=False)
+                    self._size -= evicted_size
 
-    Parameters:
-        operand (Operation): an operation that produces the value to be arithmetically negated.
-    """
+        return counts
 
-    def run(self) -> Any:
-        """Returns the arithmetic-negation of a value.
+    def clear(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self._size = 0
 
-        Returns:
-            The result of the expression -n, where n is the value produced the single operand of
-            this operation.
-        """
 
-        return -self._operand.run()
+# The counts of the sums of dice rolls, shared by all operation trees. Up to 64 MiB of them, which holds pools as
+# large as 1000d100.
+_dice_sum_counts_cache = _DiceSumCountsCache(1 << 26)
 
 
-class SumOp(BinaryOp):
-    """Operation that produces the sum of two values.
+# A random source is any object with a random() method, that returns a float in the range [0, 1), and a
+# randint(a, b) method, that returns an integer in the range [a, b]. Both random.Random and
+# random.SystemRandom are random sources. NumPy generators are also accepted, through NumpyRandomSource.
+RandomSource = Any
+
+
+class NumpyRandomSource():
+    """Adapter that turns a NumPy random generator into a random source.
+
+    NumPy generators are adapted automatically wherever a random source is accepted, but adapting
+    one beforehand spares the adaptation at each execution.
 
     Parameters:
-        left_operand (Operation): an operation that produces the left-side value of the sum.
-        right_operand (Operation): an operation that produces the right-side value of the sum.
+        generator (numpy.random.Generator): the adapted generator.
     """
 
-    def run(self) -> int:
-        """Returns the sum of two values.
+    __slots__ = ('generator', )
 
-        Returns:
-            The result of the sum (a + b) of the two vales produced by the operands of this operation.
-        """
+    def __init__(self, generator: 'numpy.random.Generator'):
+        self.generator = generator
 
-        return self._left_operand.run() + self._right_operand.run()
+    def random(self) -> float:
+        return float(self.generator.random())
 
+    def randint(self, a: int, b: int) -> int:
+        return int(self.generator.integers(a, b, endpoint=True))
 
-class SubtractOp(BinaryOp):
-    """Operation that produces the subtraction of two values.
 
-    Parameters:
-        left_operand (Operation): an operation that produces the left-side value of the subtraction.
-        right_operand (Operation): an operation that produces the right-side value of the subtraction.
+# Holds the default random sources, which are separate for each thread.
+_thread_state = local()
+
+
+def default_rng() -> RandomSource:
+    """Returns the default random source of the calling thread.
+
+    Unless replaced through set_default_rng(), each thread has its own random.Random instance,
+    seeded from the operating system's entropy. Threads never share nor contend for its state.
+
+    Returns:
+        The random source used by the calling thread when none is given.
     """
 
-    def run(self) -> int:
-        """Returns the subtraction of two values.
+    try:
+        return _thread_state.rng
+    except AttributeError:
+        _thread_state.rng = Random()
+        return _thread_state.rng
 
-        Returns:
-            The result of the subtraction (a - b) of the two vales produced by the operands of this operation.
-        """
 
-        return self._left_operand.run() - self._right_operand.run()
+def set_default_rng(rng: RandomSource) -> None:
+    """Replaces the default random source of the calling thread.
 
+    Parameters:
+        rng (RandomSource): the new default random source, such as a random.SystemRandom.
+    """
 
-class MultiplyOp(BinaryOp):
-    """Operation that produces the multiplication of two values.
+    _thread_state.rng = _as_random_source(rng)
+
+
+def seed(a: Any = None) -> None:
+    """Seeds the default random source of the calling thread, as random.seed() does.
 
     Parameters:
-        left_operand (Operation): an operation that produces the left-side value of the multiplication.
-        right_operand (Operation): an operation that produces the right-side value of the multiplication.
+        [optional] a (Any): the seed. The default-value is None, which seeds from the operating system's entropy.
     """
 
-    def run(self) -> int:
-        """Returns the multiplication of two values.
+    default_rng().seed(a)
 
-        Returns:
-            The result of the multiplication (a * b) of the two vales produced by the operands of this operation.
-        """
 
-        return self._left_operand.run() * self._right_operand.run()
+def _as_random_source(rng: RandomSource) -> RandomSource:
+    # Returns the random source to use for a given one, which may be None or a NumPy generator.
 
+    if rng is None:
+        return default_rng()
 
-class DivideOp(BinaryOp):
-    """Operation that produces the division of two values.
+    if hasattr(rng, 'randint'):
+        return rng
 
-    Parameters:
-        left_operand (Operation): an operation that produces the left-side value of the division.
-        right_operand (Operation): an operation that produces the right-side value of the division.
-    """
+    if hasattr(rng, 'integers'):
+        return NumpyRandomSource(rng)
 
-    def run(self) -> int:
-        """Returns the division of two values.
+    raise TypeError(f'{type(rng).__name__} is not a random source')
 
-        Returns:
-            The result of the division (a / b) of the two vales produced by the operands of this operation.
-        """
 
-        return self._left_operand.run() / self._right_operand.run()
+_BATCH_BLOCK_SIZE = 1 << 20
 
 
-class BinaryLogicalComparisonOp(BinaryOp):
-    def _compare(self, left_value: Any, right_value: Any) -> bool:
-        raise NotImplementedError
+def _require_numpy() -> None:
+    # Raises an ImportError if NumPy, which batch evaluation depends on, isn't available.
 
-    def run(self) -> int:
-        return 1 if self._compare(self._left_operand.run(), self._right_operand.run()) else 0
+    if numpy is None:
+        raise ImportError('batch evaluation requires NumPy, which is not installed')
 
 
-class SmallerOp(BinaryLogicalComparisonOp):
-    def _compare(self, left_value: Any, right_value: Any) -> bool:
-        return left_value < right_value
+# Batch evaluations compute with 64-bit integers, which NumPy lets wrap around silently. The values of a batch are kept
+# within this magnitude, so that their negations are in range too, raising an OverflowError rather than going past it.
+_BATCH_MAXIMUM = (1 << 63) - 1
 
 
-class GreaterOp(BinaryLogicalComparisonOp):
-    def _compare(self, left_value: Any, right_value: Any) -> bool:
-        return left_value > right_value
+def _batch_overflow() -> OverflowError:
+    return OverflowError('a value of the batch is out of the range of 64-bit integers; use run() instead')
 
 
-class EqualOp(BinaryLogicalComparisonOp):
-    def _compare(self, left_value: Any, right_value: Any) -> bool:
-        return left_value == right_value
+def _int64_batch(values: 'numpy.ndarray') -> 'numpy.ndarray':
+    # Truncates a batch of numbers towards zero, as int() does, into 64-bit integers.
 
+    if values.dtype.kind == 'f' and not numpy.all(numpy.abs(values) <= float(1 << 62)):
+        # Between 2^62 and 2^63, floats are exact integers, which are checked exactly.
+        if any(abs(int(value)) > _BATCH_MAXIMUM for value in values.tolist()):
+            raise _batch_overflow()
 
-class SmallerOrEqualOp(BinaryLogicalComparisonOp):
-    def _compare(self, left_value: Any, right_value: Any) -> bool:
-        return left_value <= right_value
+    return values.astype(numpy.int64)
 
 
-class GreaterOrEqualOp(BinaryLogicalComparisonOp):
-    def _compare(self, left_value: Any, right_value: Any) -> bool:
-        return left_value >= right_value
+def _check_batch_range(function: Callable[[Any, Any], Any], left_values: 'numpy.ndarray',
+                       right_values: 'numpy.ndarray') -> None:
+    # Raises an OverflowError if function, applied to the rows of two batches of integers, would produce a value out
+    # of their range. The results are estimated with floats, and only those that come near the bounds, off by far
+    # less than 2^62, are computed exactly. Batches of floats can't wrap around, so they aren't checked.
 
+    if left_values.dtype.kind not in 'iu' or right_values.dtype.kind not in 'iu':
+        return
 
-class NotEqualOp(BinaryLogicalComparisonOp):
-    def _compare(self, left_value: Any, right_value: Any) -> bool:
-        return left_value != right_value
+    estimates = function(left_values.astype(numpy.float64), right_values.astype(numpy.float64))
+    suspects = numpy.abs(estimates) >= float(1 << 62)
 
+    if numpy.any(suspects):
+        for left_value, right_value in zip(left_values[suspects].tolist(), right_values[suspects].tolist()):
+            if abs(function(left_value, right_value)) > _BATCH_MAXIMUM:
+                raise _batch_overflow()
 
-@unique
-class TokenType(Enum):
-    """Constants enumeration for Py-Dician's token types.
 
-    Parameters:
-        symbol (str): the symbol for that token type.
-                      May be None if it's not represented by a symbol.
-    """
+def _get_batch_generator(rng: RandomSource = None) -> 'numpy.random.Generator':
+    # Returns the NumPy random generator to be used by batch evaluations for a given random source.
+    # Other kinds of random sources seed a new generator, so that they still make the results reproducible.
+    # The seed is drawn through randint(), which every random source has.
 
-    END = (None, )
-    PLUS = ('+', )
-    MINUS = ('-', )
-    MULTIPLY = ('*', )
-    DIVIDE = ('/', )
-    LEFT_PARENTHESIS = ('(', )
-    RIGHT_PARENTHESIS = (')', )
-    SMALLER = ('<', )
-    GREATER = ('>', )
-    EQUAL = ('=', )
-    SMALLER_EQUAL = ('<=', )
-    GREATER_EQUAL = ('>=', )
-    NOT_EQUAL = ('<>', )
-    DIE = ('d', )
-    INTEGER = (None, )
+    _require_numpy()
 
-    def __new__(cls, symbol: str):
-        obj = object.__new__(cls)
-        obj._value_ = len(cls.__members__)
-        obj.symbol = symbol
-        return obj
+    if rng is None:
+        try:
+            return _thread_state.batch_generator
+        except AttributeError:
+            _thread_state.batch_generator = numpy.random.default_rng()
+            return _thread_state.batch_generator
 
-    def __str__(self) -> str:
-        return self.symbol if self.symbol else f'<{self.name}>'
+    if isinstance(rng, NumpyRandomSource):
+        return rng.generator
 
+    if isinstance(rng, numpy.random.Generator):
+        return rng
 
-@unique
-class Closure(Enum):
-    """Py-Dician's closures (pairs of tokens that enclose expressions).
+    return numpy.random.default_rng(rng.randint(0, (1 << 128) - 1))
 
-    Parameters:
-        begin (TokenType): the type of token that opens the closure.
-        end (TokenType): the type of token that closes the closure.
-    """
 
-    PARENTHESES = (TokenType.LEFT_PARENTHESIS, TokenType.RIGHT_PARENTHESIS)
+# Up to this maximum, dice are rolled by scaling random(), as random.choices() does, which is much
+# faster than randint(). Beyond it, the float precision wouldn't be enough for every face to be reachable.
+_FAST_DIE_MAXIMUM = 1 << 32
 
-    def __new__(cls, begin: TokenType, end: TokenType):
-        obj = object.__new__(cls)
-        obj._value_ = len(cls.__members__)
-        obj.begin = begin
-        obj.end = end
-        return obj
 
-    def __str__(self) -> str:
-        return str((str(self.begin), str(self.end)))
+def _is_large_pool(dice_count: int, die_maximum: int) -> bool:
+    # Checks if a pool of dice should be sampled from the histogram of its faces instead of die by die.
 
+    return dice_count >= DiceRollOp.large_pool_threshold and 1 <= die_maximum <= dice_count
 
-class Token():
-    """Class that represents a Py-Dician token, extracted from a string.
 
-    Parameters:
-        type (TokenType): a member from the TokenType enum representing the token's type.
-        value (str): the value of the token, extracted from the string.
-        line (int): the line at which the token starts.
-        column (int): the position in the line at which the token starts.
-    """
+def _roll_large_pool(dice_count: int, die_maximum: int, rng: RandomSource) -> Any:
+    # Returns the sum of a large pool of dice, by sampling how many dice show each face (a multinomial
+    # histogram), so that the cost depends on the number of faces rather than on the number of dice.
+    # Returns None if neither NumPy nor random.binomialvariate() (Python 3.12+) are available to sample it.
 
-    def __init__(self, type: TokenType, value: str, line: int, column: int):
-        self.type = type
-        self.value = value
-        self.line = line
-        self.column = column
+    if numpy is not None and (isinstance(rng, NumpyRandomSource) or getattr(rng, 'getrandbits', None) is not None):
+        generator = _get_batch_generator(rng)
+        histogram = generator.multinomial(dice_count, [1 / die_maximum] * die_maximum)
 
-    def __str__(self) -> str:
-        return self.value if self.value else str(self.type)
+        return sum(face * int(count) for face, count in enumerate(histogram.tolist(), 1))
 
+    binomialvariate = getattr(rng, 'binomialvariate', None)
 
-class ParseError(PyDicianError):
-    """Base-class for parse errors, either of lexical, syntactic or semantic nature.
+    if binomialvariate is None:
+        return None
 
-    Parameters:
-        line (int): the line at which the error occurred.
-        column (int): the position in the line at which the error occurred.
-    """
+    # The dice showing each face are drawn from the dice that didn't show any of the previous faces.
+    total = 0
+    remaining = dice_count
 
-    def __init__(self, line: int, column: int):
-        self.line = line
-        self.column = column
+    for face in range(1, die_maximum):
+        count = binomialvariate(remaining, 1 / (die_maximum - face + 1))
+        total += face * count
+        remaining -= count
 
+    return total + die_maximum * remaining
 
-class EndOfStringError(ParseError):
-    """Exception thrown by the Tokenizer class when the parse reaches the end of the parsed string.
 
-    Parameters:
-        line (int): the line at which the string ends.
-        column (int): the position in the line at which the string ends.
-    """
+def _roll_dice(dice_count: int, die_maximum: int, rng: RandomSource) -> int:
+    # Returns the sum of dice_count rolls of a die of die_maximum faces.
 
-    pass
+    if dice_count <= 0:
+        return 0
 
+    if _is_large_pool(dice_count, die_maximum):
+        total = _roll_large_pool(dice_count, die_maximum, rng)
 
-class UnknownSymbolError(ParseError):
-    """Exception thrown by the Tokenizer class when it finds a symbol for which there's no defined token type.
+        if total is not None:
+            return total
+
+    if die_maximum > _FAST_DIE_MAXIMUM or die_maximum < 1:
+        # randint() also raises the appropriate error for invalid dice.
+        randint = rng.randint
+        return sum(randint(1, die_maximum) for _ in range(dice_count))
+
+    random = rng.random
+    return sum([int(random() * die_maximum) for _ in range(dice_count)]) + dice_count
+
+
+def _stream_rolls(body: Callable[[RandomSource], Any], rng: RandomSource, chunk_size: int, limit: int) -> Iterator:
+    # Yields the results of a compiled body, one by one or in lists of chunk_size, forever or up to limit results.
+
+    if chunk_size is None:
+        for _ in (repeat(None) if limit is None else repeat(None, limit)):
+            yield body(rng)
+
+        return
+
+    remaining = limit
+
+    while remaining is None or remaining > 0:
+        size = chunk_size if remaining is None else min(chunk_size, remaining)
+        yield [body(rng) for _ in repeat(None, size)]
+
+        if remaining is not None:
+            remaining -= size
+
+
+class SourceSpan(NamedTuple):
+    """The stretch of an expression's source an operation was parsed from. The end column is exclusive."""
+
+    line: int
+    column: int
+    end_line: int
+    end_column: int
+
+
+class Stats(NamedTuple):
+    """The exact statistics of the results of an operation.
 
     Parameters:
-        symbol (str): the unknown symbol that was found.
-        line (int): the line where the symbol was found.
-        column (int): the position where the symbol was found in the line.
+        mean (Fraction): the expected value.
+        variance (Fraction): the variance.
+        minimum (Any): the smallest possible result.
+        maximum (Any): the largest possible result.
     """
 
-    def __init__(self, symbol: str, line: int, column: int):
+    mean: Fraction
+    variance: Fraction
+    minimum: Any
+    maximum: Any
+
+    @property
+    def standard_deviation(self) -> float:
+        return float(self.variance) ** 0.5
+
+
+def _dice_roll_stats(count: Stats, die_maximum: Stats) -> Stats:
+    # Returns the statistics of the sum of rolls of a die, with independent numbers of dice and maximum values.
+    # A roll of n dice of F faces has a mean of n*(F+1)/2 and a variance of n*(F^2-1)/12; when n and F are
+    # random, the variance of that mean is added to the mean of that variance (the law of total variance).
+
+    if count.minimum < 0:
+        raise UnsupportedStatsError('the number of dice may be negative')
+
+    if die_maximum.minimum < 1:
+        raise ValueError(f'cannot roll a die with maximum value {die_maximum.minimum}')
+
+    count_square_mean = count.variance + count.mean ** 2
+    face_square_mean = die_maximum.variance + die_maximum.mean ** 2
+    mean = count.mean * (die_maximum.mean + 1) / 2
+    variance = (count.mean * (face_square_mean - 1) / 12
+                + count_square_mean * (face_square_mean + 2 * die_maximum.mean + 1) / 4 - mean ** 2)
+
+    return Stats(mean, variance, count.minimum, count.maximum * die_maximum.maximum)
+
+
+class CumulativeDistribution:
+    """Index over a probability distribution that answers cumulative queries in logarithmic time.
+
+    The outcomes are sorted and their probabilities accumulated once, at construction time, so that each
+    query is a binary search over them. All probabilities are exact Fractions.
+
+    Parameters:
+        distribution (dict): maps each possible outcome to its probability, as returned by
+                             Operation.distribution(). The outcomes must be comparable.
+
+    Raises:
+        ValueError if the outcomes of the distribution aren't comparable.
+    """
+
+    __slots__ = ('_values', '_cumulative')
+
+    def __init__(self, distribution: Dict[Any, Fraction]):
+        try:
+            items = sorted(distribution.items())
+        except TypeError:
+            raise ValueError('the outcomes of the distribution must be comparable') from None
+
+        self._values = tuple(value for value, _ in items)
+        self._cumulative = tuple(accumulate(probability for _, probability in items))
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({dict(zip(self._values, self.probabilities))!r})'
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @property
+    def values(self) -> Tuple[Any, ...]:
+        """The possible outcomes, in ascending order."""
+
+        return self._values
+
+    @property
+    def probabilities(self) -> List[Fraction]:
+        """The probability of each outcome, in the same order as values."""
+
+        return [b - a for a, b in zip((Fraction(0), ) + self._cumulative, self._cumulative)]
+
+    def at_most(self, value: Any) -> Fraction:
+        """Returns P(X <= value)."""
+
+        index = bisect_right(self._values, value)
+        return self._cumulative[index - 1] if index else Fraction(0)
+
+    def less_than(self, value: Any) -> Fraction:
+        """Returns P(X < value)."""
+
+        index = bisect_left(self._values, value)
+        return self._cumulative[index - 1] if index else Fraction(0)
+
+    def at_least(self, value: Any) -> Fraction:
+        """Returns P(X >= value)."""
+
+        return self._cumulative[-1] - self.less_than(value)
+
+    def greater_than(self, value: Any) -> Fraction:
+        """Returns P(X > value)."""
+
+        return self._cumulative[-1] - self.at_most(value)
+
+    def between(self, lower: Any, upper: Any) -> Fraction:
+        """Returns P(lower <= X <= upper), which is 0 if upper is smaller than lower."""
+
+        if upper < lower:
+            return Fraction(0)
+
+        return self.at_most(upper) - self.less_than(lower)
+
+    def quantile(self, p: Any) -> Any:
+        """Returns the smallest outcome x such that P(X <= x) >= p.
+
+        Parameters:
+            p (Fraction or float): the probability, in the range [0, 1]. A p of 0 yields the smallest outcome.
+
+        Raises:
+            ValueError if p is out of the range [0, 1].
+        """
+
+        if not 0 <= p <= 1:
+            raise ValueError(f'the probability of a quantile must be in the range [0, 1], not {p}')
+
+        return self._values[min(bisect_left(self._cumulative, p), len(self._values) - 1)]
+
+
+class Operation:
+    """Base-class of the executable operations to which Py-Dician expressions are translated.
+
+    An operation takes zero or more operands, which act as its parameters. Each operand should
+    also be an operation that results in a value of a type accepted by the main operation.
+
+    Operations are compared and hashed structurally: two trees are equal if they have the same types of
+    operations, with the same literal values, arranged the same way. Source spans are ignored.
+    """
+
+    __slots__ = ('_span', '_hash')
+
+    def __init__(self):
+        self._span = None
+        self._hash = None
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Operation):
+            return NotImplemented
+
+        return _structurally_equal(self, other)
+
+    def __hash__(self) -> int:
+        # The hash is computed once, as operation trees are never modified after being built.
+
+        return self._hash if self._hash is not None else _structural_hash(self)
+
+    @property
+    def span(self) -> SourceSpan:
+        """The source span this operation was parsed from, or None if it wasn't produced by a Parser(spans=True)."""
+
+        return self._span
+
+    def canonical(self) -> 'Operation':
+        """Creates the canonical form of this operation tree.
+
+        The operands of commutative operations (sums, multiplications, equalities and inequalities) are put
+        in a fixed order, with literal values last, so that trees that differ only by the order of those
+        operands, such as the ones of "2 + 1d6" and "1d6 + 2", have equal canonical forms. Identical
+        subtrees are shared, and the unchanged ones reused.
+
+        The canonical form has the same distribution as this operation, but it may draw its dice in a
+        different order, producing different results from the same seeded random source.
+
+        Returns:
+            The canonical form of this operation tree.
+        """
+
+        return _canonicalized(self, OrderedDict())
+
+    def run(self, rng: RandomSource = None) -> Any:
+        """Executes this operation.
+
+        Must be overridden by derived classes.
+
+        Parameters:
+            [optional] rng (RandomSource): the source of the random numbers rolled by the dice, such as a
+                                           random.Random, a random.SystemRandom or a NumPy generator.
+                                           The default-value is None, i.e. the calling thread's default_rng().
+
+        Returns:
+            The result of the operation, which could be anything really.
+        """
+
+        raise NotImplementedError
+
+    def run_traced(self, rng: RandomSource = None) -> 'RollTrace':
+        """Executes this operation, as run() does, while recording every die drawn by its dice rolls.
+
+        A traced copy of the tree is executed, so run() itself is left untouched. Its dice rolls draw their dice
+        one by one, even the large pools that run() samples from their histogram of faces; every other dice roll
+        draws the same random numbers run() does, producing the same results from the same seeded random source.
+        The dice rolls are located by their source spans, which are only kept by a Parser(spans=True), such as
+        the one behind roll_detailed().
+
+        Parameters:
+            [optional] rng (RandomSource): the source of the random numbers. The default-value is None, i.e.
+                                           the calling thread's default_rng().
+
+        Returns:
+            A RollTrace with the result of the operation and a DiceTrace per executed dice roll.
+        """
+
+        traces = []
+        value = _traced(self, traces).run(rng)
+
+        return RollTrace(value, tuple(traces))
+
+    def optimize(self) -> 'Operation':
+        """Returns an optimized, equivalent version of this operation.
+
+        The optimized operation produces the same results, but may have been rewritten so that it's
+        cheaper to execute: deterministic sub-operations are folded into literal values, dice
+        rolls of fixed dice are specialized, and so on. This operation is left untouched.
+        Derived classes should override it; by default, the operation itself is returned.
+
+        Returns:
+            The optimized operation.
+        """
+
+        return self
+
+    def _folded(self) -> 'Operation':
+        # Returns a literal value operation with the result of this operation, which should be deterministic.
+        # Operations that fail are kept as they are, so that they still fail when executed.
+
+        try:
+            operation = LiteralValueOp(self.run())
+        except (ArithmeticError, TypeError, ValueError):
+            return self
+
+        operation._span = self.span
+        return operation
+
+    def compile(self) -> Callable[..., Any]:
+        """Compiles this operation into a single flat callable.
+
+        The callable produces the same distribution of results run() does, but with the literal values, the
+        dice counts and the die maximums baked in, instead of being reevaluated at each execution. Its dice
+        are drawn in a faster way, so the same seeded random source doesn't give the same results as run().
+
+        Returns:
+            A callable that executes this operation. As run(), it takes an optional random source.
+        """
+
+        body = self._compile()
+
+        def compiled(rng: RandomSource = None) -> Any:
+            return body(_as_random_source(rng))
+
+        return compiled
+
+    def _compile(self) -> Callable[[RandomSource], Any]:
+        # Returns the body of the callable returned by compile(), which takes a resolved random source.
+        # Derived classes should override it; by default, the body is the run() method itself.
+
+        return self.run
+
+    def stream(self, chunk_size: int = None, limit: int = None, rng: RandomSource = None) -> Iterator:
+        """Lazily yields the results of executing this operation over and over.
+
+        The operation is compiled once (see compile()), and the random source is resolved once, up front.
+
+        Parameters:
+            [optional] chunk_size (int): if given, the results are yielded in lists of chunk_size results. The last
+                                         list is shorter if the limit isn't a multiple of it. The default-value is
+                                         None, i.e. results are yielded one by one.
+            [optional] limit (int): the total number of results. The default-value is None, i.e. no limit.
+            [optional] rng (RandomSource): the source of the random numbers. The default-value is None, i.e.
+                                           the default source of the calling thread.
+
+        Returns:
+            An iterator over the results, or over lists of them.
+
+        Raises:
+            ValueError if the chunk size isn't positive or the limit is negative.
+        """
+
+        if chunk_size is not None and chunk_size < 1:
+            raise ValueError('the chunk size must be positive')
+
+        if limit is not None and limit < 0:
+            raise ValueError('the limit must be non-negative')
+
+        return _stream_rolls(self._compile(), _as_random_source(rng), chunk_size, limit)
+
+    def lower(self) -> 'Program':
+        """Lowers this operation into a flat, postfix program (see Program).
+
+        Returns:
+            A program that produces the same results run() does.
+
+        Raises:
+            TypeError if the tree holds an operation that has no counterpart in programs, such as a lone die.
+        """
+
+        return _lowered(self)
+
+    def run_batch(self, n: int, rng: RandomSource = None) -> 'numpy.ndarray':
+        """Executes this operation n times at once, as vectorized NumPy operations.
+
+        Each of the n executions is independent, and produces the same results run() would.
+        Requires NumPy. Must be overridden by derived classes.
+
+        Parameters:
+            n (int): the number of executions.
+            [optional] rng (RandomSource): the source of the random numbers. NumPy generators are used
+                                           directly, while other random sources seed a new one.
+                                           The default-value is None, i.e. a generator of the calling thread.
+
+        Returns:
+            A NumPy array of n results, one per execution.
+
+        Raises:
+            ImportError if NumPy is not installed.
+            OverflowError if a value, or any intermediate result, is out of the range of the 64-bit integers
+                          NumPy computes with. run() computes those exactly.
+        """
+
+        raise NotImplementedError
+
+    def distribution(self) -> Dict[Any, Fraction]:
+        """Computes the exact probability distribution of the results of this operation.
+
+        Must be overridden by derived classes.
+
+        Returns:
+            A dict mapping each possible result of the operation to its probability, as a Fraction.
+            The results are sorted in ascending order, whenever they're comparable.
+        """
+
+        raise NotImplementedError
+
+    def cumulative_distribution(self) -> CumulativeDistribution:
+        """Computes the distribution of the results of this operation, indexed for cumulative queries.
+
+        Meant for asking many questions about the same operation, e.g. the chance of reaching each of
+        a series of targets: each query takes logarithmic time, rather than a new operation tree.
+
+        Returns:
+            A CumulativeDistribution of the results of this operation.
+        """
+
+        return CumulativeDistribution(self.distribution())
+
+    def stats(self) -> Stats:
+        """Computes the exact mean, variance, minimum and maximum of the results of this operation.
+
+        Unlike distribution(), the statistics are propagated from those of the operands, without
+        enumerating the possible results, in time proportional to the size of the operation tree.
+
+        Returns:
+            The statistics of the results of this operation.
+
+        Raises:
+            UnsupportedStatsError if the statistics can't be derived from those of the operands, as
+            with divisions and comparisons.
+        """
+
+        raise UnsupportedStatsError(f'cannot compute the statistics of {type(self).__name__}')
+
+
+class SimpleOp(Operation):
+    """Base-class of operations that take no operands (parameters), such as literal values."""
+
+    __slots__ = ()
+
+
+class UnaryOp(Operation):
+    """Base-class of operations that take a single operand (parameter), such as arithmetic-negation or die definition.
+
+    Parameters:
+        operand (Operation): the single operand of this operation.
+    """
+
+    __slots__ = ('_operand', )
+
+    def __init__(self, operand: Operation):
+        super().__init__()
+        self._operand = operand
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self._operand!r})'
+
+    def optimize(self) -> Operation:
+        operation = type(self)(self._operand.optimize())
+        operation._span = self.span
+        return operation
+
+
+class BinaryOp(Operation):
+    """Base-class of operations that take exactly two operands (parameters) -- a left and a right one.
+
+    Parameters:
+        left_operand (Operation): the left operand of this operation.
+        right_operand (Operation): the right operand of this operation.
+    """
+
+    __slots__ = ('_left_operand', '_right_operand')
+
+    def __init__(self, left_operand: Operation, right_operand: Operation):
+        super().__init__()
+        self._left_operand = left_operand
+        self._right_operand = right_operand
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self._left_operand!r}, {self._right_operand!r})'
+
+    def optimize(self) -> Operation:
+        operation = type(self)(self._left_operand.optimize(), self._right_operand.optimize())
+        operation._span = self.span
+
+        if isinstance(operation._left_operand, LiteralValueOp) and isinstance(operation._right_operand, LiteralValueOp):
+            return operation._folded()
+
+        return operation
+
+
+class LiteralValueOp(SimpleOp):
+    """Operation that produces a fixed, unmodified value.
+
+    Parameters:
+        value (Any): the value that'll be returned when the operaton is executed.
+                     Note that a VALUE is expected, NOT an OPERATION.
+    """
+
+    __slots__ = ('_value', )
+
+    def __init__(self, value: Any):
+        super().__init__()
+        self._value = value
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self._value!r})'
+
+    def run(self, rng: RandomSource = None) -> Any:
+        """Returns a fixed, unmodified value.
+
+        Returns:
+            The value that was stored at construction time, unmodified.
+        """
+
+        return self._value
+
+    def _compile(self) -> Callable[[RandomSource], Any]:
+        value = self._value
+
+        return lambda rng: value
+
+    def run_batch(self, n: int, rng: RandomSource = None) -> 'numpy.ndarray':
+        """Returns a fixed, unmodified value n times.
+
+        Parameters:
+            n (int): the number of executions.
+            [optional] rng (RandomSource): the source of the random numbers.
+
+        Returns:
+            A NumPy array filled with n copies of the value that was stored at construction time.
+        """
+
+        _require_numpy()
+
+        if isinstance(self._value, int) and abs(self._value) > _BATCH_MAXIMUM:
+            raise _batch_overflow()
+
+        return numpy.full(n, self._value)
+
+    def distribution(self) -> Dict[Any, Fraction]:
+        """Returns the distribution of a fixed value.
+
+        Returns:
+            A dict mapping the value that was stored at construction time to a probability of 1.
+        """
+
+        return {self._value: Fraction(1)}
+
+    def stats(self) -> Stats:
+        """Returns the statistics of a fixed value, which has no variance."""
+
+        return Stats(Fraction(self._value), Fraction(0), self._value, self._value)
+
+
+class DieOp(UnaryOp):
+    '''Operation that produces a "rollable die".
+
+    In fact, the operation produces a callable that generates a random integer number in the range
+    [1, n], with n being the result of the single operand of this operation.
+
+    Parameters:
+        operand (Operation): an operation that produces an integer number that'll be the maximum
+                             value of the die.
+    '''
+
+    __slots__ = ()
+
+    def run(self, rng: RandomSource = None) -> Callable[[], int]:
+        '''Returns a "rollable die" in the form of a callable.
+
+        Returns:
+            A parameterless callable that generates a random integer number in the range [1, n],
+            with n being the maximum value of the die.
+        '''
+
+        die_maximum = int(self._operand.run(rng))
+        randint = _as_random_source(rng).randint
+
+        return lambda: randint(1, die_maximum)
+
+    def _compile(self) -> Callable[[RandomSource], Callable[[], int]]:
+        maximum = self._operand._compile()
+
+        def die(rng: RandomSource) -> Callable[[], int]:
+            die_maximum = int(maximum(rng))
+
+            return lambda: _roll_dice(1, die_maximum, rng)
+
+        return die
+
+    def run_batch(self, n: int, rng: RandomSource = None) -> Callable[['numpy.ndarray'], 'numpy.ndarray']:
+        '''Returns n "rollable dice" in the form of a single callable.
+
+        Parameters:
+            n (int): the number of executions.
+            [optional] rng (RandomSource): the source of the random numbers.
+
+        Returns:
+            A callable that takes an array of n dice counts and returns an array with n sums, each
+            one being the sum of as many rolls of its execution's die.
+        '''
+
+        generator = _get_batch_generator(rng)
+        die_maximums = _int64_batch(self._operand.run_batch(n, rng))
+
+        def roll(dice_counts: 'numpy.ndarray') -> 'numpy.ndarray':
+            if numpy.any((dice_counts > 0) & (die_maximums < 1)):
+                raise ValueError('cannot roll a die with a maximum value smaller than 1')
+
+            # No sum may exceed the number of dice times the maximum of the die.
+            _check_batch_range(operator.mul, dice_counts, die_maximums)
+
+            sums = numpy.zeros(n, dtype=numpy.int64)
+            max_count = int(dice_counts.max(initial=0))
+
+            if max_count == 0:
+                return sums
+
+            # Executions that roll no dice may have any die maximum, which mustn't reach the generator.
+            highs = numpy.maximum(die_maximums, 1)[:, None]
+            # A scalar maximum, when they're all the same, lets the generator take its fastest path.
+            single_high = int(highs[0, 0]) if numpy.all(highs == highs[0, 0]) else None
+            uniform = bool(numpy.all(dice_counts == max_count))
+
+            if single_high is not None and _is_large_pool(max_count, single_high):
+                # Large pools are sampled from their histograms of faces instead, row by row of the batch.
+                faces = numpy.arange(1, single_high + 1)
+                rows_per_block = max(1, _BATCH_BLOCK_SIZE // single_high)
+
+                for start in range(0, n, rows_per_block):
+                    stop = min(n, start + rows_per_block)
+                    histograms = generator.multinomial(dice_counts[start:stop], [1 / single_high] * single_high)
+                    sums[start:stop] = histograms @ faces
+
+                return sums
+
+            rows_per_block = max(1, _BATCH_BLOCK_SIZE // max_count)
+
+            # The dice are drawn as (rows x max_count) blocks, so that huge batches don't exhaust the memory.
+            for start in range(0, n, rows_per_block):
+                stop = min(n, start + rows_per_block)
+                high = highs[start:stop] if single_high is None else single_high
+                rolls = generator.integers(1, high, size=(stop - start, max_count), endpoint=True)
+
+                if not uniform:
+                    rolls[numpy.arange(max_count) >= dice_counts[start:stop, None]] = 0
+
+                sums[start:stop] = rolls.sum(axis=1)
+
+            return sums
+
+        return roll
+
+    def distribution(self) -> Dict[int, Fraction]:
+        """Returns the distribution of a single roll of the die.
+
+        Returns:
+            A dict mapping each value the die may roll to its probability.
+
+        Raises:
+            ValueError if the die may have a maximum value smaller than 1.
+        """
+
+        result = {}
+
+        for die_maximum, probability in self.maximum_distribution().items():
+            for value, value_probability in _dice_roll_distribution(1, die_maximum).items():
+                result[value] = result.get(value, 0) + probability * value_probability
+
+        return _sorted_distribution(result)
+
+    def maximum_distribution(self) -> Dict[int, Fraction]:
+        """Returns the distribution of the maximum value of the die.
+
+        Returns:
+            A dict mapping each maximum value the die may have to its probability.
+        """
+
+        return _sorted_distribution(_int_distribution(self._operand.distribution()))
+
+    def stats(self) -> Stats:
+        """Returns the statistics of a single roll of the die.
+
+        Raises:
+            UnsupportedStatsError if the maximum value of the die may be fractional.
+            ValueError if the die may have a maximum value smaller than 1.
+        """
+
+        if not _is_integral(self._operand):
+            raise UnsupportedStatsError('the maximum value of the die may be fractional')
+
+        return _dice_roll_stats(Stats(Fraction(1), Fraction(0), 1, 1), self._operand.stats())
+
+
+class DiceRollOp(BinaryOp):
+    """Operation that produces the sum of multiple rolls of a single die type.
+
+    Pools of at least large_pool_threshold dice, with no more faces than dice, aren't rolled die by
+    die. Instead, how many dice show each face is sampled at once, from a multinomial distribution,
+    which costs as much as the number of faces. That requires either NumPy or Python 3.12+'s
+    random.binomialvariate() from the random source; otherwise, such pools are still rolled die by die.
+
+    Parameters:
+        left_operand (Operation): an operation that produces the number of rolled dice.
+        right_operand (Operation): an operation that produces a die type.
+    """
+
+    __slots__ = ()
+
+    # The minimum number of dice of the pools that are sampled from their histogram of faces.
+    large_pool_threshold = 1000
+
+    def __init__(self, left_operand: Operation, right_operand: Operation):
+        super().__init__(left_operand, right_operand)
+
+    def run(self, rng: RandomSource = None) -> int:
+        """Returns the sum of multiple rolls of a single die.
+
+        Returns:
+            The sum of the results of multiple rolls of a single type of die.
+        """
+
+        dice_count = int(self._left_operand.run(rng))
+
+        if dice_count >= self.large_pool_threshold and isinstance(self._right_operand, DieOp):
+            die_maximum = int(self._right_operand._operand.run(rng))
+
+            return _roll_dice(dice_count, die_maximum, _as_random_source(rng))
+
+        die = self._right_operand.run(rng)
+
+        return sum(die() for i in range(dice_count))
+
+    def optimize(self) -> Operation:
+        """Returns an optimized, equivalent version of this dice roll.
+
+        Rolls of a fixed number of a fixed die are specialized into a FixedDiceRollOp. Rolls of no
+        dice at all are folded into a literal zero.
+
+        Returns:
+            The optimized operation.
+        """
+
+        count_operand = self._left_operand.optimize()
+        die_operand = self._right_operand.optimize()
+
+        if (isinstance(count_operand, LiteralValueOp) and isinstance(die_operand, DieOp)
+                and isinstance(die_operand._operand, LiteralValueOp)):
+            dice_count = int(count_operand._value)
+
+            if dice_count <= 0:
+                operation = LiteralValueOp(0)
+            else:
+                operation = FixedDiceRollOp(dice_count, int(die_operand._operand._value))
+        else:
+            operation = DiceRollOp(count_operand, die_operand)
+
+        operation._span = self.span
+        return operation
+
+    def _compile(self) -> Callable[[RandomSource], int]:
+        # When the number of dice and the maximum of the die are literal values, they're computed at compile-time.
+
+        if not isinstance(self._right_operand, DieOp):
+            return super()._compile()
+
+        count_operand = self._left_operand
+        maximum_operand = self._right_operand._operand
+
+        if isinstance(count_operand, LiteralValueOp) and isinstance(maximum_operand, LiteralValueOp):
+            dice_count = int(count_operand._value)
+            die_maximum = int(maximum_operand._value)
+
+            if dice_count <= 0:
+                return lambda rng: 0
+
+            if dice_count == 1 and 1 <= die_maximum <= _FAST_DIE_MAXIMUM:
+                return lambda rng: int(rng.random() * die_maximum) + 1
+
+            if 1 < dice_count < self.large_pool_threshold and 1 <= die_maximum <= _FAST_DIE_MAXIMUM:
+                dice = range(dice_count)
+
+                def roll(rng: RandomSource) -> int:
+                    random = rng.random
+                    return sum([int(random() * die_maximum) for _ in dice]) + dice_count
+
+                return roll
+
+            return lambda rng: _roll_dice(dice_count, die_maximum, rng)
+
+        count = count_operand._compile()
+        maximum = maximum_operand._compile()
+
+        return lambda rng: _roll_dice(int(count(rng)), int(maximum(rng)), rng)
+
+    def run_batch(self, n: int, rng: RandomSource = None) -> 'numpy.ndarray':
+        """Returns the sums of multiple rolls of a single die, n times.
+
+        Parameters:
+            n (int): the number of executions.
+            [optional] rng (RandomSource): the source of the random numbers.
+
+        Returns:
+            A NumPy array of n integer sums.
+        """
+
+        # Like int(), astype() truncates towards zero. Negative counts roll no dice, as with range().
+        dice_counts = numpy.maximum(_int64_batch(self._left_operand.run_batch(n, rng)), 0)
+        die = self._right_operand.run_batch(n, rng)
+
+        return die(dice_counts)
+
+    def distribution(self) -> Dict[int, Fraction]:
+        """Returns the distribution of the sum of multiple rolls of a single die.
+
+        Both the number of rolled dice and the maximum value of the die may be random themselves,
+        in which case the distributions of every combination of them are weighted together.
+
+        Returns:
+            A dict mapping each possible sum to its probability.
+
+        Raises:
+            ValueError if the die may have a maximum value smaller than 1 while being rolled.
+        """
+
+        result = {}
+        dice_counts = _int_distribution(self._left_operand.distribution())
+        die_maximums = self._right_operand.maximum_distribution()
+
+        if len(dice_counts) == 1 and len(die_maximums) == 1:
+            # A fixed pool, whose distribution needs no weighting.
+            return _dice_roll_distribution(next(iter(dice_counts)), next(iter(die_maximums)))
+
+        for dice_count, count_probability in dice_counts.items():
+            for die_maximum, maximum_probability in die_maximums.items():
+                probability = count_probability * maximum_probability
+
+                for value, value_probability in _dice_roll_distribution(dice_count, die_maximum).items():
+                    result[value] = result.get(value, 0) + probability * value_probability
+
+        return _sorted_distribution(result)
+
+    def stats(self) -> Stats:
+        """Returns the statistics of the sum of the rolls of the die.
+
+        Raises:
+            UnsupportedStatsError if the right operand isn't a DieOp, or if the number of dice may be negative
+                                  or fractional, or the maximum value of the die may be fractional.
+            ValueError if the die may have a maximum value smaller than 1.
+        """
+
+        if not isinstance(self._right_operand, DieOp):
+            raise UnsupportedStatsError(
+                f'cannot compute the statistics of rolls of {type(self._right_operand).__name__}')
+
+        if not _is_integral(self._left_operand):
+            raise UnsupportedStatsError('the number of dice may be fractional')
+
+        if not _is_integral(self._right_operand._operand):
+            raise UnsupportedStatsError('the maximum value of the die may be fractional')
+
+        return _dice_roll_stats(self._left_operand.stats(), self._right_operand._operand.stats())
+
+
+class SingleDieRollOp(DiceRollOp):
+    """Operation that evaluates the roll of a single die.
+
+    Equivalent to ``DiceRollOp(LiteralValueOp(1), DieOp(die_faces_operand))``.
+
+    Parameters:
+        operand (Operation): an operation that produces a die type.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, operand: Operation):
+        super().__init__(LiteralValueOp(1), operand)
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self._right_operand!r})'
+
+
+class FixedDiceRollOp(DiceRollOp):
+    """Operation that evaluates the roll of a fixed number of dice of a fixed type.
+
+    Equivalent to ``DiceRollOp(LiteralValueOp(dice_count), DieOp(LiteralValueOp(die_maximum)))``,
+    but the die is kept ready for rolling instead of being rebuilt at each execution. It's produced
+    by the optimization of dice rolls whose operands are literal values.
+
+    Parameters:
+        dice_count (int): the number of rolled dice.
+        die_maximum (int): the maximum value of the die.
+    """
+
+    __slots__ = ('_dice_count', '_die_maximum')
+
+    def __init__(self, dice_count: int, die_maximum: int):
+        super().__init__(LiteralValueOp(dice_count), DieOp(LiteralValueOp(die_maximum)))
+        self._dice_count = dice_count
+        self._die_maximum = die_maximum
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self._dice_count!r}, {self._die_maximum!r})'
+
+    def run(self, rng: RandomSource = None) -> int:
+        """Returns the sum of the rolls of the dice.
+
+        Returns:
+            The sum of the results of the rolls of the fixed dice.
+        """
+
+        return _roll_dice(self._dice_count, self._die_maximum, _as_random_source(rng))
+
+    def optimize(self) -> Operation:
+        return self
+
+
+class NegateOp(UnaryOp):
+    """Operation that produces the arithmetic-negation of a value.
+
+    Parameters:
+        operand (Operation): an operation that produces the value to be arithmetically negated.
+    """
+
+    __slots__ = ()
+
+    def run(self, rng: RandomSource = None) -> Any:
+        """Returns the arithmetic-negation of a value.
+
+        Returns:
+            The result of the expression -n, where n is the value produced the single operand of
+            this operation.
+        """
+
+        return -self._operand.run(rng)
+
+    def optimize(self) -> Operation:
+        """Returns an optimized, equivalent version of this arithmetic-negation.
+
+        Negations of literal values are folded, and double negations are removed.
+
+        Returns:
+            The optimized operation.
+        """
+
+        operand = self._operand.optimize()
+
+        if isinstance(operand, NegateOp):
+            return operand._operand
+
+        operation = NegateOp(operand)
+        operation._span = self.span
+
+        return operation._folded() if isinstance(operand, LiteralValueOp) else operation
+
+    def _compile(self) -> Callable[[RandomSource], Any]:
+        if isinstance(self._operand, LiteralValueOp):
+            value = -self._operand._value
+
+            return lambda rng: value
+
+        operand = self._operand._compile()
+
+        return lambda rng: -operand(rng)
+
+    def run_batch(self, n: int, rng: RandomSource = None) -> 'numpy.ndarray':
+        """Returns the arithmetic-negations of n values.
+
+        Parameters:
+            n (int): the number of executions.
+            [optional] rng (RandomSource): the source of the random numbers.
+
+        Returns:
+            A NumPy array with the results of the expression -n for each execution.
+        """
+
+        return -self._operand.run_batch(n, rng)
+
+    def distribution(self) -> Dict[Any, Fraction]:
+        """Returns the distribution of the arithmetic-negation of a value.
+
+        Returns:
+            A dict mapping each possible result of -n to its probability.
+        """
+
+        result = {}
+
+        for value, probability in self._operand.distribution().items():
+            result[-value] = result.get(-value, 0) + probability
+
+        return _sorted_distribution(result)
+
+    def stats(self) -> Stats:
+        operand = self._operand.stats()
+        return Stats(-operand.mean, operand.variance, -operand.maximum, -operand.minimum)
+
+
+class SumOp(BinaryOp):
+    """Operation that produces the sum of two values.
+
+    Parameters:
+        left_operand (Operation): an operation that produces the left-side value of the sum.
+        right_operand (Operation): an operation that produces the right-side value of the sum.
+    """
+
+    __slots__ = ()
+
+    def run(self, rng: RandomSource = None) -> int:
+        """Returns the sum of two values.
+
+        Returns:
+            The result of the sum (a + b) of the two vales produced by the operands of this operation.
+        """
+
+        return self._left_operand.run(rng) + self._right_operand.run(rng)
+
+    def optimize(self) -> Operation:
+        return _optimize_sum_chain(self)
+
+    def _compile(self) -> Callable[[RandomSource], Any]:
+        if isinstance(self._left_operand, LiteralValueOp):
+            left_value = self._left_operand._value
+            right = self._right_operand._compile()
+
+            return lambda rng: left_value + right(rng)
+
+        left = self._left_operand._compile()
+
+        if isinstance(self._right_operand, LiteralValueOp):
+            right_value = self._right_operand._value
+
+            return lambda rng: left(rng) + right_value
+
+        right = self._right_operand._compile()
+
+        return lambda rng: left(rng) + right(rng)
+
+    def run_batch(self, n: int, rng: RandomSource = None) -> 'numpy.ndarray':
+        """Returns the sums of n pairs of values.
+
+        Parameters:
+            n (int): the number of executions.
+            [optional] rng (RandomSource): the source of the random numbers.
+
+        Returns:
+            A NumPy array with the results of the sum (a + b) for each execution.
+        """
+
+        left_values = self._left_operand.run_batch(n, rng)
+        right_values = self._right_operand.run_batch(n, rng)
+        _check_batch_range(operator.add, left_values, right_values)
+
+        return left_values + right_values
+
+    def distribution(self) -> Dict[Any, Fraction]:
+        """Returns the distribution of the sum of two values.
+
+        Returns:
+            A dict mapping each possible result of (a + b) to its probability.
+        """
+
+        return _combine_distributions(self._left_operand.distribution(), self._right_operand.distribution(),
+                                      lambda a, b: a + b)
+
+    def stats(self) -> Stats:
+        left = self._left_operand.stats()
+        right = self._right_operand.stats()
+        return Stats(left.mean + right.mean, left.variance + right.variance, left.minimum + right.minimum,
+                     left.maximum + right.maximum)
+
+
+class SubtractOp(BinaryOp):
+    """Operation that produces the subtraction of two values.
+
+    Parameters:
+        left_operand (Operation): an operation that produces the left-side value of the subtraction.
+        right_operand (Operation): an operation that produces the right-side value of the subtraction.
+    """
+
+    __slots__ = ()
+
+    def run(self, rng: RandomSource = None) -> int:
+        """Returns the subtraction of two values.
+
+        Returns:
+            The result of the subtraction (a - b) of the two vales produced by the operands of this operation.
+        """
+
+        return self._left_operand.run(rng) - self._right_operand.run(rng)
+
+    def optimize(self) -> Operation:
+        return _optimize_sum_chain(self)
+
+    def _compile(self) -> Callable[[RandomSource], Any]:
+        if isinstance(self._left_operand, LiteralValueOp):
+            left_value = self._left_operand._value
+            right = self._right_operand._compile()
+
+            return lambda rng: left_value - right(rng)
+
+        left = self._left_operand._compile()
+
+        if isinstance(self._right_operand, LiteralValueOp):
+            right_value = self._right_operand._value
+
+            return lambda rng: left(rng) - right_value
+
+        right = self._right_operand._compile()
+
+        return lambda rng: left(rng) - right(rng)
+
+    def run_batch(self, n: int, rng: RandomSource = None) -> 'numpy.ndarray':
+        """Returns the subtractions of n pairs of values.
+
+        Parameters:
+            n (int): the number of executions.
+            [optional] rng (RandomSource): the source of the random numbers.
+
+        Returns:
+            A NumPy array with the results of the subtraction (a - b) for each execution.
+        """
+
+        left_values = self._left_operand.run_batch(n, rng)
+        right_values = self._right_operand.run_batch(n, rng)
+        _check_batch_range(operator.sub, left_values, right_values)
+
+        return left_values - right_values
+
+    def distribution(self) -> Dict[Any, Fraction]:
+        """Returns the distribution of the subtraction of two values.
+
+        Returns:
+            A dict mapping each possible result of (a - b) to its probability.
+        """
+
+        return _combine_distributions(self._left_operand.distribution(), self._right_operand.distribution(),
+                                      lambda a, b: a - b)
+
+    def stats(self) -> Stats:
+        left = self._left_operand.stats()
+        right = self._right_operand.stats()
+        return Stats(left.mean - right.mean, left.variance + right.variance, left.minimum - right.maximum,
+                     left.maximum - right.minimum)
+
+
+class MultiplyOp(BinaryOp):
+    """Operation that produces the multiplication of two values.
+
+    Parameters:
+        left_operand (Operation): an operation that produces the left-side value of the multiplication.
+        right_operand (Operation): an operation that produces the right-side value of the multiplication.
+    """
+
+    __slots__ = ()
+
+    def run(self, rng: RandomSource = None) -> int:
+        """Returns the multiplication of two values.
+
+        Returns:
+            The result of the multiplication (a * b) of the two vales produced by the operands of this operation.
+        """
+
+        return self._left_operand.run(rng) * self._right_operand.run(rng)
+
+    def _compile(self) -> Callable[[RandomSource], Any]:
+        if isinstance(self._left_operand, LiteralValueOp):
+            left_value = self._left_operand._value
+            right = self._right_operand._compile()
+
+            return lambda rng: left_value * right(rng)
+
+        left = self._left_operand._compile()
+
+        if isinstance(self._right_operand, LiteralValueOp):
+            right_value = self._right_operand._value
+
+            return lambda rng: left(rng) * right_value
+
+        right = self._right_operand._compile()
+
+        return lambda rng: left(rng) * right(rng)
+
+    def run_batch(self, n: int, rng: RandomSource = None) -> 'numpy.ndarray':
+        """Returns the multiplications of n pairs of values.
+
+        Parameters:
+            n (int): the number of executions.
+            [optional] rng (RandomSource): the source of the random numbers.
+
+        Returns:
+            A NumPy array with the results of the multiplication (a * b) for each execution.
+        """
+
+        left_values = self._left_operand.run_batch(n, rng)
+        right_values = self._right_operand.run_batch(n, rng)
+        _check_batch_range(operator.mul, left_values, right_values)
+
+        return left_values * right_values
+
+    def distribution(self) -> Dict[Any, Fraction]:
+        """Returns the distribution of the multiplication of two values.
+
+        Returns:
+            A dict mapping each possible result of (a * b) to its probability.
+        """
+
+        return _combine_distributions(self._left_operand.distribution(), self._right_operand.distribution(),
+                                      lambda a, b: a * b)
+
+    def stats(self) -> Stats:
+        # The operands are independent, so the mean of a product is the product of the means.
+
+        left = self._left_operand.stats()
+        right = self._right_operand.stats()
+        mean = left.mean * right.mean
+        variance = (left.variance + left.mean ** 2) * (right.variance + right.mean ** 2) - mean ** 2
+        bounds = [a * b for a in (left.minimum, left.maximum) for b in (right.minimum, right.maximum)]
+        return Stats(mean, variance, min(bounds), max(bounds))
+
+
+class DivideOp(BinaryOp):
+    """Operation that produces the division of two values.
+
+    Parameters:
+        left_operand (Operation): an operation that produces the left-side value of the division.
+        right_operand (Operation): an operation that produces the right-side value of the division.
+    """
+
+    __slots__ = ()
+
+    def run(self, rng: RandomSource = None) -> int:
+        """Returns the division of two values.
+
+        Returns:
+            The result of the division (a / b) of the two vales produced by the operands of this operation.
+        """
+
+        return self._left_operand.run(rng) / self._right_operand.run(rng)
+
+    def _compile(self) -> Callable[[RandomSource], Any]:
+        if isinstance(self._left_operand, LiteralValueOp):
+            left_value = self._left_operand._value
+            right = self._right_operand._compile()
+
+            return lambda rng: left_value / right(rng)
+
+        left = self._left_operand._compile()
+
+        if isinstance(self._right_operand, LiteralValueOp):
+            right_value = self._right_operand._value
+
+            return lambda rng: left(rng) / right_value
+
+        right = self._right_operand._compile()
+
+        return lambda rng: left(rng) / right(rng)
+
+    def run_batch(self, n: int, rng: RandomSource = None) -> 'numpy.ndarray':
+        """Returns the divisions of n pairs of values.
+
+        Parameters:
+            n (int): the number of executions.
+            [optional] rng (RandomSource): the source of the random numbers.
+
+        Returns:
+            A NumPy array with the float results of the division (a / b) for each execution.
+
+        Raises:
+            ZeroDivisionError if any of the right-side values is zero.
+        """
+
+        left_values = self._left_operand.run_batch(n, rng)
+        right_values = self._right_operand.run_batch(n, rng)
+
+        # NumPy would produce infinities instead, while run() raises.
+        if numpy.any(right_values == 0):
+            raise ZeroDivisionError('division by zero')
+
+        return numpy.true_divide(left_values, right_values)
+
+    def distribution(self) -> Dict[Any, Fraction]:
+        """Returns the distribution of the division of two values.
+
+        Returns:
+            A dict mapping each possible result of (a / b) to its probability.
+
+        Raises:
+            ZeroDivisionError if the right-side value may be zero.
+        """
+
+        return _combine_distributions(self._left_operand.distribution(), self._right_operand.distribution(),
+                                      lambda a, b: a / b)
+
+    def stats(self) -> Stats:
+        raise UnsupportedStatsError('cannot compute the statistics of a division from those of its operands; '
+                                    'use distribution() instead')
+
+
+class BinaryLogicalComparisonOp(BinaryOp):
+    __slots__ = ()
+
+    def _compare(self, left_value: Any, right_value: Any) -> bool:
+        raise NotImplementedError
+
+    def run(self, rng: RandomSource = None) -> int:
+        return 1 if self._compare(self._left_operand.run(rng), self._right_operand.run(rng)) else 0
+
+    def _compile(self) -> Callable[[RandomSource], int]:
+        compare = self._compare
+        left = self._left_operand._compile()
+
+        if isinstance(self._right_operand, LiteralValueOp):
+            right_value = self._right_operand._value
+
+            return lambda rng: 1 if compare(left(rng), right_value) else 0
+
+        right = self._right_operand._compile()
+
+        return lambda rng: 1 if compare(left(rng), right(rng)) else 0
+
+    def run_batch(self, n: int, rng: RandomSource = None) -> 'numpy.ndarray':
+        # The comparison operators are applied element-wise by NumPy.
+        return self._compare(self._left_operand.run_batch(n, rng), self._right_operand.run_batch(n, rng)).astype(numpy.int64)
+
+    def distribution(self) -> Dict[int, Fraction]:
+        return _combine_distributions(self._left_operand.distribution(), self._right_operand.distribution(),
+                                      lambda a, b: 1 if self._compare(a, b) else 0)
+
+    def stats(self) -> Stats:
+        raise UnsupportedStatsError('cannot compute the statistics of a comparison from those of its operands; '
+                                    'use distribution() instead')
+
+
+class SmallerOp(BinaryLogicalComparisonOp):
+    __slots__ = ()
+
+    def _compare(self, left_value: Any, right_value: Any) -> bool:
+        return left_value < right_value
+
+
+class GreaterOp(BinaryLogicalComparisonOp):
+    __slots__ = ()
+
+    def _compare(self, left_value: Any, right_value: Any) -> bool:
+        return left_value > right_value
+
+
+class EqualOp(BinaryLogicalComparisonOp):
+    __slots__ = ()
+
+    def _compare(self, left_value: Any, right_value: Any) -> bool:
+        return left_value == right_value
+
+
+class SmallerOrEqualOp(BinaryLogicalComparisonOp):
+    __slots__ = ()
+
+    def _compare(self, left_value: Any, right_value: Any) -> bool:
+        return left_value <= right_value
+
+
+class GreaterOrEqualOp(BinaryLogicalComparisonOp):
+    __slots__ = ()
+
+    def _compare(self, left_value: Any, right_value: Any) -> bool:
+        return left_value >= right_value
+
+
+class NotEqualOp(BinaryLogicalComparisonOp):
+    __slots__ = ()
+
+    def _compare(self, left_value: Any, right_value: Any) -> bool:
+        return left_value != right_value
+
+
+def _is_integral(operation: Operation) -> bool:
+    # Checks if an operation can only produce integer values, regardless of its outcome.
+
+    if isinstance(operation, LiteralValueOp):
+        return type(operation._value) is int
+
+    if isinstance(operation, (DiceRollOp, BinaryLogicalComparisonOp)):
+        return True
+
+    if isinstance(operation, NegateOp):
+        return _is_integral(operation._operand)
+
+    if isinstance(operation, (SumOp, SubtractOp, MultiplyOp)):
+        return _is_integral(operation._left_operand) and _is_integral(operation._right_operand)
+
+    return False
+
+
+def _sum_chain_terms(operation: Operation) -> List[Tuple[bool, Operation]]:
+    # Breaks a chain of sums, subtractions and negations into its terms, as (is negated, operation) pairs.
+
+    terms = []
+    pending = [(False, operation)]
+
+    while pending:
+        negative, operation = pending.pop()
+
+        if type(operation) is SumOp:
+            pending.append((negative, operation._right_operand))
+            pending.append((negative, operation._left_operand))
+        elif type(operation) is SubtractOp:
+            pending.append((not negative, operation._right_operand))
+            pending.append((negative, operation._left_operand))
+        elif type(operation) is NegateOp:
+            pending.append((not negative, operation._operand))
+        else:
+            terms.append((negative, operation))
+
+    return terms
+
+
+def _optimize_sum_chain(operation: BinaryOp) -> Operation:
+    # Optimizes a chain of sums and subtractions. When all of its terms are integers, the order of the terms
+    # doesn't affect the result, so all literal values are folded together and the rolls of the same fixed
+    # die are merged into a single roll (e.g.: 1d6 + 2 + 1d6 + 3 -> 2d6 + 5).
+
+    terms = []
+
+    for negative, term in _sum_chain_terms(operation):
+        term = term.optimize()
+
+        if type(term) in (SumOp, SubtractOp, NegateOp):
+            terms.extend((negative != term_negative, t) for term_negative, t in _sum_chain_terms(term))
+        else:
+            terms.append((negative, term))
+
+    if not all(_is_integral(term) for _, term in terms):
+        return BinaryOp.optimize(operation)
+
+    constant = 0
+    merged_terms = []
+    merged_dice = {}
+    merged_indexes = set()
+
+    for negative, term in terms:
+        if isinstance(term, LiteralValueOp):
+            constant += -term._value if negative else term._value
+            continue
+
+        if isinstance(term, FixedDiceRollOp):
+            index = merged_dice.get((negative, term._die_maximum))
+
+            if index is not None:
+                merged_count = merged_terms[index][1]._dice_count + term._dice_count
+                merged_terms[index] = (negative, FixedDiceRollOp(merged_count, term._die_maximum))
+                merged_indexes.add(index)
+                continue
+
+            merged_dice[(negative, term._die_maximum)] = len(merged_terms)
+
+        merged_terms.append((negative, term))
+
+    if not merged_terms:
+        result = LiteralValueOp(constant)
+        result._span = operation.span
+        return result
+
+    negative, result = merged_terms[0]
+
+    if negative:
+        result = NegateOp(result)
+
+    for negative, term in merged_terms[1:]:
+        result = SubtractOp(result, term) if negative else SumOp(result, term)
+
+    if constant > 0:
+        result = SumOp(result, LiteralValueOp(constant))
+    elif constant < 0:
+        result = SubtractOp(result, LiteralValueOp(-constant))
+
+    # The rebuilt chain takes the span of the original one, unless it comes down to one of its terms, left as it was.
+    if result is not merged_terms[0][1] or 0 in merged_indexes:
+        result._span = operation.span
+
+    return result
+
+
+# The opcodes of the postfix programs operation trees are lowered to (see Operation.lower()). Operands are pushed
+# by PUSH (followed by an integer) or CONSTANT (followed by an index into the program's constants), while the
+# other opcodes pop their operands and push their result. Dice rolls pop the number of dice, then the die maximum.
+# Rolls and binary operations whose right operand is an integer literal take it inline, flagged by _OP_IMMEDIATE.
+_OP_PUSH = 0
+_OP_CONSTANT = 1
+_OP_ROLL = 2
+_OP_ROLL_FIXED = 3
+_OP_NEGATE = 4
+_OP_ADD = 5
+_OP_SUBTRACT = 6
+_OP_MULTIPLY = 7
+_OP_DIVIDE = 8
+_OP_SMALLER = 9
+_OP_GREATER = 10
+_OP_EQUAL = 11
+_OP_SMALLER_EQUAL = 12
+_OP_GREATER_EQUAL = 13
+_OP_NOT_EQUAL = 14
+_OP_IMMEDIATE = 16
+
+_BINARY_OPCODES = {
+        SumOp: _OP_ADD,
+        SubtractOp: _OP_SUBTRACT,
+        MultiplyOp: _OP_MULTIPLY,
+        DivideOp: _OP_DIVIDE,
+        SmallerOp: _OP_SMALLER,
+        GreaterOp: _OP_GREATER,
+        EqualOp: _OP_EQUAL,
+        SmallerOrEqualOp: _OP_SMALLER_EQUAL,
+        GreaterOrEqualOp: _OP_GREATER_EQUAL,
+        NotEqualOp: _OP_NOT_EQUAL
+    }
+
+
+def _comparison(compare: Callable[[Any, Any], bool]) -> Callable[[Any, Any], int]:
+    return lambda left_value, right_value: 1 if compare(left_value, right_value) else 0
+
+
+_BINARY_FUNCTIONS = {
+        _OP_ADD: operator.add,
+        _OP_SUBTRACT: operator.sub,
+        _OP_MULTIPLY: operator.mul,
+        _OP_DIVIDE: operator.truediv,
+        _OP_SMALLER: _comparison(operator.lt),
+        _OP_GREATER: _comparison(operator.gt),
+        _OP_EQUAL: _comparison(operator.eq),
+        _OP_SMALLER_EQUAL: _comparison(operator.le),
+        _OP_GREATER_EQUAL: _comparison(operator.ge),
+        _OP_NOT_EQUAL: _comparison(operator.ne)
+    }
+
+_IMMEDIATE_FUNCTIONS = {opcode | _OP_IMMEDIATE: function for opcode, function in _BINARY_FUNCTIONS.items()}
+
+_INT64_MINIMUM = -1 << 63
+_INT64_MAXIMUM = (1 << 63) - 1
+
+
+def _is_immediate(operation: Operation) -> bool:
+    # Checks if an operation is a literal that fits inline in a program's instructions.
+
+    return (isinstance(operation, LiteralValueOp) and type(operation._value) is int
+            and _INT64_MINIMUM <= operation._value <= _INT64_MAXIMUM)
+
+
+class Program():
+    """A flat, postfix form of an operation tree, executed by a loop over a stack rather than by recursive calls.
+
+    Programs produce the same results, from the same random numbers, as the run() of the operation trees they
+    were lowered from. They're also compact and cheap to copy (e.g., to other processes), as the instructions are
+    kept in a single array of 64-bit integers.
+
+    Parameters:
+        code (array): the instructions, as opcodes each followed by its inline operand, if any.
+        constants (tuple): the values that don't fit in the instructions, such as floats and huge integers.
+    """
+
+    __slots__ = ('code', 'constants')
+
+    def __init__(self, code: array, constants: Tuple = ()):
+        self.code = code
+        self.constants = constants
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self.code!r}, {self.constants!r})'
+
+    def __eq__(self, other: Any) -> bool:
+        return type(other) is type(self) and self.code == other.code and self.constants == other.constants
+
+    def run(self, rng: RandomSource = None) -> Any:
+        """Executes this program, as Operation.run() executes an operation tree.
+
+        Parameters:
+            [optional] rng (RandomSource): the source of the random numbers rolled by the dice.
+                                           The default-value is None, i.e. the calling thread's default_rng().
+
+        Returns:
+            The result of the program.
+        """
+
+        rng = _as_random_source(rng)
+        randint = rng.randint
+        constants = self.constants
+        binary_functions = _BINARY_FUNCTIONS
+        immediate_functions = _IMMEDIATE_FUNCTIONS
+        threshold = DiceRollOp.large_pool_threshold
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        instructions = iter(self.code)
+
+        for opcode in instructions:
+            if opcode == _OP_PUSH:
+                push(next(instructions))
+            elif opcode == _OP_ADD | _OP_IMMEDIATE:
+                stack[-1] += next(instructions)
+            elif opcode == _OP_ROLL | _OP_IMMEDIATE or opcode == _OP_ROLL:
+                die_maximum = next(instructions) if opcode & _OP_IMMEDIATE else int(pop())
+                dice_count = int(stack[-1])
+
+                if dice_count >= threshold:
+                    stack[-1] = _roll_dice(dice_count, die_maximum, rng)
+                else:
+                    stack[-1] = sum([randint(1, die_maximum) for _ in range(dice_count)])
+            elif opcode == _OP_ADD:
+                right_value = pop()
+                stack[-1] += right_value
+            elif opcode in immediate_functions:
+                stack[-1] = immediate_functions[opcode](stack[-1], next(instructions))
+            elif opcode in binary_functions:
+                right_value = pop()
+                stack[-1] = binary_functions[opcode](stack[-1], right_value)
+            elif opcode == _OP_ROLL_FIXED:
+                die_maximum = pop()
+                stack[-1] = _roll_dice(stack[-1], die_maximum, rng)
+            elif opcode == _OP_NEGATE:
+                stack[-1] = -stack[-1]
+            else:
+                push(constants[next(instructions)])
+
+        return stack[0]
+
+
+def _lowered(operation: Operation) -> Program:
+    # Lowers an operation tree into a postfix program, walking it with an explicit stack of pending nodes. A node's
+    # instruction is pushed, as a tuple, under its operands, so that it's emitted once they've been lowered.
+
+    code = array('q')
+    constants = []
+    pending = [(operation, False)]
+
+    while pending:
+        node, expanded = pending.pop()
+
+        if expanded:
+            # The node's operands were lowered already, and its instruction was pending in its place.
+            code.extend(node)
+        elif _is_immediate(node):
+            code.extend((_OP_PUSH, node._value))
+        elif isinstance(node, LiteralValueOp):
+            code.extend((_OP_CONSTANT, len(constants)))
+            constants.append(node._value)
+        elif isinstance(node, FixedDiceRollOp):
+            pending.append(((_OP_ROLL_FIXED, ), True))
+            pending.append((LiteralValueOp(node._die_maximum), False))
+            pending.append((LiteralValueOp(node._dice_count), False))
+        elif isinstance(node, NegateOp):
+            pending.append(((_OP_NEGATE, ), True))
+            pending.append((node._operand, False))
+        else:
+            if isinstance(node, DiceRollOp) and isinstance(node._right_operand, DieOp):
+                opcode = _OP_ROLL
+                right_operand = node._right_operand._operand
+            elif type(node) in _BINARY_OPCODES:
+                opcode = _BINARY_OPCODES[type(node)]
+                right_operand = node._right_operand
+            else:
+                raise TypeError(f'{type(node).__name__} cannot be lowered to a program')
+
+            if _is_immediate(right_operand):
+                pending.append(((opcode | _OP_IMMEDIATE, right_operand._value), True))
+            else:
+                pending.append(((opcode, ), True))
+                pending.append((right_operand, False))
+
+            pending.append((node._left_operand, False))
+
+    return Program(code, tuple(constants))
+
+
+class ProfileEntry(NamedTuple):
+    operation: str
+    span: SourceSpan
+    source: str
+    depth: int
+    calls: int
+    total_time: float
+    self_time: float
+    dice: int
+
+
+class _ProfiledOp(Operation):
+    # Stands for an operation of a profiled tree, recording the calls to it and the time they take.
+
+    __slots__ = ('_operation', 'depth', 'children', 'counted_dice', 'calls', 'total_time', 'dice', 'last_result')
+
+    def __init__(self, operation: Operation, depth: int):
+        super().__init__()
+        self._span = operation.span
+        self._operation = operation
+        self.depth = depth
+        self.children = []
+        self.counted_dice = None
+        self.reset()
+
+    def reset(self) -> None:
+        self.calls = 0
+        self.total_time = 0.0
+        self.dice = 0
+        self.last_result = None
+
+    def run(self, rng: RandomSource = None) -> Any:
+        start = perf_counter()
+        result = self._operation.run(rng)
+        self.total_time += perf_counter() - start
+        self.calls += 1
+        self.last_result = result
+
+        if self.counted_dice is not None:
+            self.dice += self.counted_dice()
+
+        return result
+
+
+def _instrumented(operation: Operation, parent: _ProfiledOp, nodes: List[_ProfiledOp]) -> Operation:
+    # Returns a copy of an operation tree whose nodes are wrapped by profiled ones, which are appended to the list in
+    # pre-order. Die definitions aren't wrapped, as their dice are rolled, and accounted for, by their dice rolls.
+
+    operation = copy(operation)
+    # The copy's operands are replaced below, which invalidates any hash it may have inherited.
+    operation._hash = None
+    profiled = None
+
+    if not isinstance(operation, DieOp):
+        profiled = _ProfiledOp(operation, parent.depth + 1 if parent is not None else 0)
+        nodes.append(profiled)
+
+        if parent is not None:
+            parent.children.append(profiled)
+
+        parent = profiled
+
+    # The operands of fixed dice rolls are never run, and the count of single die rolls isn't part of the source.
+    if isinstance(operation, FixedDiceRollOp):
+        names = ()
+    elif isinstance(operation, SingleDieRollOp):
+        names = ('_right_operand', )
+    else:
+        names = ('_operand', '_left_operand', '_right_operand')
+
+    for name in names:
+        operand = getattr(operation, name, None)
+
+        if operand is not None:
+            setattr(operation, name, _instrumented(operand, parent, nodes))
+
+    if isinstance(operation, FixedDiceRollOp):
+        dice_count = max(0, operation._dice_count)
+        profiled.counted_dice = lambda: dice_count
+    elif isinstance(operation, SingleDieRollOp):
+        profiled.counted_dice = lambda: 1
+    elif isinstance(operation, DiceRollOp):
+        count_operand = operation._left_operand
+        profiled.counted_dice = lambda: max(0, int(count_operand.last_result))
+
+    return profiled if profiled is not None else operation
+
+
+class Profiler():
+    """Class that executes an operation tree while recording, for each of its nodes, the number of calls, the time
+    they took (in total and excluding the node's operands) and, for dice rolls, the number of dice rolled.
+
+    The profiler executes an instrumented copy of the tree, so the tree itself, and its run() method, are left
+    untouched. Compiled and batch executions aren't profiled. The report locates the nodes by their source spans,
+    which are only kept by a Parser(spans=True), such as the one behind profile().
+
+    Parameters:
+        operation (Operation): the operation tree to be profiled.
+        [optional] source (str): the expression the tree was parsed from, to be quoted in the report. The
+                                 default-value is None.
+    """
+
+    def __init__(self, operation: Operation, source: str = None):
+        self._source = source
+        self._nodes = []
+        self._root = _instrumented(operation, None, self._nodes)
+
+    def run(self, rng: RandomSource = None) -> Any:
+        """Executes the profiled tree, as Operation.run() does."""
+
+        return self._root.run(rng)
+
+    def reset(self) -> None:
+        """Clears the recorded calls, times and dice."""
+
+        for node in self._nodes:
+            node.reset()
+
+    def report(self) -> List[ProfileEntry]:
+        """Reports the recorded calls, times (in seconds) and dice of each node, with the tree's nodes in pre-order.
+
+        Returns:
+            A list of ProfileEntry, one per node.
+        """
+
+        return [ProfileEntry(type(node._operation).__name__, node.span, self._source_of(node.span), node.depth,
+                             node.calls, node.total_time,
+                             node.total_time - sum(child.total_time for child in node.children), node.dice)
+                for node in self._nodes]
+
+    def format_report(self) -> str:
+        """Formats the report as a table, with the nodes indented by their depth in the tree."""
+
+        lines = [f'{"calls": >9} {"total ms": >10} {"self ms": >10} {"dice": >10}  operation']
+
+        for entry in self.report():
+            location = f' at {entry.span.line}:{entry.span.column}' if entry.span is not None else ''
+            source = f': {entry.source}' if entry.source is not None else ''
+            lines.append(f'{entry.calls: >9} {entry.total_time * 1e3: >10.3f} {entry.self_time * 1e3: >10.3f} '
+                         f'{entry.dice: >10}  {"  " * entry.depth}{entry.operation}{location}{source}')
+
+        return '\n'.join(lines)
+
+    def _source_of(self, span: SourceSpan) -> str:
+        if self._source is None or span is None:
+            return None
+
+        lines = self._source.splitlines()[span.line - 1:span.end_line]
+        lines[-1] = lines[-1][:span.end_column - 1]
+        lines[0] = lines[0][span.column - 1:]
+        return '\n'.join(lines)
+
+
+class DiceTrace(NamedTuple):
+    """The dice drawn by a dice roll, in the order they were drawn.
+
+    The dice are kept in a typed array, of 16-bit integers for dice of up to 65535 faces and of 32 or 64-bit ones
+    for larger dice, so that they can be stored as they are, e.g. through their tobytes().
+    """
+
+    operation: str
+    span: SourceSpan
+    die_maximum: int
+    dice: array
+
+    @property
+    def total(self) -> int:
+        """The sum of the dice."""
+
+        return sum(self.dice)
+
+
+class RollTrace(NamedTuple):
+    """The result of a traced execution, along with the dice drawn by each dice roll, in the order they were rolled."""
+
+    value: Any
+    dice: Tuple[DiceTrace, ...]
+
+
+def _dice_typecode(die_maximum: int) -> str:
+    # Returns the typecode of the smallest unsigned array able to hold the dice of the given maximum.
+
+    for typecode in ('H', 'I', 'L', 'Q'):
+        if die_maximum < 1 << (8 * array(typecode).itemsize):
+            return typecode
+
+    raise OverflowError(f'cannot trace dice of {die_maximum} faces')
+
+
+def _draw_dice(dice_count: int, die_maximum: int, rng: RandomSource) -> array:
+    # Draws the dice of a roll one by one, from the random numbers _roll_dice() would draw for them.
+
+    if die_maximum > _FAST_DIE_MAXIMUM or die_maximum < 1:
+        randint = rng.randint
+        dice = [randint(1, die_maximum) for _ in range(dice_count)]
+    else:
+        random = rng.random
+        dice = [int(random() * die_maximum) + 1 for _ in range(dice_count)]
+
+    return array(_dice_typecode(die_maximum), dice)
+
+
+class _TracedDiceRollOp(Operation):
+    # Stands for a dice roll of a traced tree, drawing its dice one by one and recording them.
+
+    __slots__ = ('_operation', '_traces')
+
+    def __init__(self, operation: DiceRollOp, traces: List[DiceTrace]):
+        super().__init__()
+        self._span = operation.span
+        self._operation = operation
+        self._traces = traces
+
+    def run(self, rng: RandomSource = None) -> int:
+        operation = self._operation
+        rng = _as_random_source(rng)
+
+        if isinstance(operation, FixedDiceRollOp):
+            die_maximum = operation._die_maximum
+            dice = _draw_dice(max(0, operation._dice_count), die_maximum, rng)
+        else:
+            # The dice are drawn as DiceRollOp.run() draws them: through _roll_dice() for pools of at least
+            # large_pool_threshold dice, and from the die its DieOp would produce for the smaller ones.
+            dice_count = max(0, int(operation._left_operand.run(rng)))
+            die_maximum = int(operation._right_operand._operand.run(rng))
+
+            if dice_count >= operation.large_pool_threshold:
+                dice = _draw_dice(dice_count, die_maximum, rng)
+            else:
+                randint = rng.randint
+                dice = array(_dice_typecode(die_maximum), [randint(1, die_maximum) for _ in range(dice_count)])
+
+        self._traces.append(DiceTrace(type(operation).__name__, operation.span, die_maximum, dice))
+        return sum(dice)
+
+
+def _traced(operation: Operation, traces: List[DiceTrace]) -> Operation:
+    # Returns a copy of an operation tree whose dice rolls are wrapped by traced ones, which record their dice into
+    # the list. The tree's other nodes are copied as they are, only pointing to the copies of their operands.
+
+    if isinstance(operation, SimpleOp):
+        return operation
+
+    operation = copy(operation)
+    operation._hash = None
+
+    for name in ('_operand', '_left_operand', '_right_operand'):
+        operand = getattr(operation, name, None)
+
+        if operand is not None:
+            setattr(operation, name, _traced(operand, traces))
+
+    if isinstance(operation, DiceRollOp) and isinstance(operation._right_operand, DieOp):
+        return _TracedDiceRollOp(operation, traces)
+
+    return operation
+
+
+@unique
+class TokenType(Enum):
+    """Constants enumeration for Py-Dician's token types.
+
+    Parameters:
+        symbol (str): the symbol for that token type.
+                      May be None if it's not represented by a symbol.
+    """
+
+    END = (None, )
+    PLUS = ('+', )
+    MINUS = ('-', )
+    MULTIPLY = ('*', )
+    DIVIDE = ('/', )
+    LEFT_PARENTHESIS = ('(', )
+    RIGHT_PARENTHESIS = (')', )
+    SMALLER = ('<', )
+    GREATER = ('>', )
+    EQUAL = ('=', )
+    SMALLER_EQUAL = ('<=', )
+    GREATER_EQUAL = ('>=', )
+    NOT_EQUAL = ('<>', )
+    DIE = ('d', )
+    INTEGER = (None, )
+
+    def __new__(cls, symbol: str):
+        obj = object.__new__(cls)
+        obj._value_ = len(cls.__members__)
+        obj.symbol = symbol
+        return obj
+
+    def __str__(self) -> str:
+        return self.symbol if self.symbol else f'<{self.name}>'
+
+
+@unique
+class Closure(Enum):
+    """Py-Dician's closures (pairs of tokens that enclose expressions).
+
+    Parameters:
+        begin (TokenType): the type of token that opens the closure.
+        end (TokenType): the type of token that closes the closure.
+    """
+
+    PARENTHESES = (TokenType.LEFT_PARENTHESIS, TokenType.RIGHT_PARENTHESIS)
+
+    def __new__(cls, begin: TokenType, end: TokenType):
+        obj = object.__new__(cls)
+        obj._value_ = len(cls.__members__)
+        obj.begin = begin
+        obj.end = end
+        return obj
+
+    def __str__(self) -> str:
+        return str((str(self.begin), str(self.end)))
+
+
+class Token():
+    """Class that represents a Py-Dician token, extracted from a string.
+
+    Parameters:
+        type (TokenType): a member from the TokenType enum representing the token's type.
+        value (str): the value of the token, extracted from the string.
+        line (int): the line at which the token starts.
+        column (int): the position in the line at which the token starts.
+    """
+
+    __slots__ = ('type', 'value', 'line', 'column')
+
+    def __init__(self, type: TokenType, value: str, line: int, column: int):
+        self.type = type
+        self.value = value
+        self.line = line
+        self.column = column
+
+    def __str__(self) -> str:
+        return self.value if self.value else str(self.type)
+
+
+class ParseError(PyDicianError):
+    """Base-class for parse errors, either of lexical, syntactic or semantic nature.
+
+    Parameters:
+        line (int): the line at which the error occurred.
+        column (int): the position in the line at which the error occurred.
+    """
+
+    def __init__(self, line: int, column: int):
+        self.line = line
+        self.column = column
+
+
+class EndOfStringError(ParseError):
+    """Exception thrown by the Tokenizer class when the parse reaches the end of the parsed string.
+
+    Parameters:
+        line (int): the line at which the string ends.
+        column (int): the position in the line at which the string ends.
+    """
+
+    pass
+
+
+class UnknownSymbolError(ParseError):
+    """Exception thrown by the Tokenizer class when it finds a symbol for which there's no defined token type.
+
+    Parameters:
+        symbol (str): the unknown symbol that was found.
+        line (int): the line where the symbol was found.
+        column (int): the position where the symbol was found in the line.
+    """
+
+    def __init__(self, symbol: str, line: int, column: int):
         super().__init__(line, column)
         self.symbol = symbol
 
 
-class Tokenizer():
-    """Class that parses a string accordingly to Py-Dician, fetching each token sequentially.
+# Matches the blanks before a token, then either a sign, the die tag or an integer. Python's \s is equivalent
+# to str.isspace(), but \d is narrower than str.isdigit(), which is why integers may need to be extended.
+_TOKEN_PATTERN = re.compile(r'(\s*)(?:(<=|>=|<>|[-+*/()<>=dD])|(\d+))?')
+
+_SYMBOL_TOKEN_TYPES = {token_type.symbol: token_type for token_type in TokenType if token_type.symbol}
+_SYMBOL_TOKEN_TYPES['D'] = TokenType.DIE
+
+
+def _iter_tokens(text: str, unknown_symbols: List[UnknownSymbolError] = None) -> Iterator[Token]:
+    # Yields the tokens of a string, from its beginning. Holds no state but its own, so any number of strings may
+    # be tokenized at once (see Tokenizer.iter_tokens()).
+
+    length = len(text)
+    match = _TOKEN_PATTERN.match
+    index = 0
+    line = 1
+    line_start = 0
+
+    while True:
+        token_match = match(text, index)
+        token_start = token_match.end(1)
+
+        if token_start > index:
+            newlines = text.count('\n', index, token_start)
+
+            if newlines:
+                line += newlines
+                line_start = text.rindex('\n', index, token_start) + 1
+
+        index = token_start
+        column = index - line_start + 1
+        symbol = token_match.group(2)
+
+        if symbol is not None:
+            index = token_match.end()
+            yield Token(_SYMBOL_TOKEN_TYPES[symbol], symbol, line, column)
+            continue
+
+        if token_match.group(3) is not None or (index < length and text[index].isdigit()):
+            index = token_match.end()
+
+            while index < length and text[index].isdigit():
+                index += 1
+
+            yield Token(TokenType.INTEGER, text[token_start:index], line, column)
+            continue
+
+        if index >= length:
+            yield Token(TokenType.END, '', line, column)
+            return
+
+        if unknown_symbols is None:
+            raise UnknownSymbolError(text[index].casefold(), line, column)
+
+        unknown_symbols.append(UnknownSymbolError(text[index].casefold(), line, column))
+        index += 1
+
+
+class Tokenizer():
+    """Class that parses a string accordingly to Py-Dician, fetching each token sequentially.
+
+    Parameters:
+        [optional] input_string (str): the string to be parsed. The default-value is an empty string, i.e. no string to parse.
+    """
+
+    def __init__(self, input_string: str = ''):
+        self.set_input_string(input_string)
+
+    def set_input_string(self, input_string: str) -> None:
+        """Sets the string to be parsed and resets the parsing.
+
+        Parameters:
+            input_string (str): the string to be parsed.
+        """
+
+        self._input_string = input_string
+        self.reset()
+
+    def reset(self) -> None:
+        """Resets the parsing to the beginning of the string."""
+
+        self._current_symbol = self._input_string[0:1].casefold()
+        self._current_index = 0
+        self._current_line = 1
+        self._current_column = 1
+        self._begin_token()
+
+    def next_token(self) -> Token:
+        """Fetches the next token from the parsed string.
+
+        Returns:
+            A Token object containing the fetched token.
+            If the end of the string is reached, an END (TokenType) token is returned.
+
+        Raises:
+            UnknownSymbolError if an unknown symbol is found.
+        """
+
+        try:
+            self._skip_blanks()
+            self._begin_token()
+
+            if self._expect_symbol_is_any_of(TokenType.LEFT_PARENTHESIS):
+                return self._fetch_token(TokenType.LEFT_PARENTHESIS)
+
+            if self._expect_symbol_is_any_of(TokenType.RIGHT_PARENTHESIS):
+                return self._fetch_token(TokenType.RIGHT_PARENTHESIS)
+
+            if self._expect_symbol_is_any_of(TokenType.PLUS):
+                return self._fetch_token(TokenType.PLUS)
+
+            if self._expect_symbol_is_any_of(TokenType.MINUS):
+                return self._fetch_token(TokenType.MINUS)
+
+            if self._expect_symbol_is_any_of(TokenType.MULTIPLY):
+                return self._fetch_token(TokenType.MULTIPLY)
+
+            if self._expect_symbol_is_any_of(TokenType.DIVIDE):
+                return self._fetch_token(TokenType.DIVIDE)
+
+            if self._expect_symbol_is_any_of(TokenType.DIE):
+                return self._fetch_token(TokenType.DIE)
+
+            if self._expect_symbol_is_any_of(TokenType.EQUAL):
+                return self._fetch_token(TokenType.EQUAL)
+
+            if self._expect_symbol_is_any_of(TokenType.SMALLER):
+                if self._expect_symbol_is_any_of(TokenType.EQUAL):
+                    return self._fetch_token(TokenType.SMALLER_EQUAL)
+
+                if self._expect_symbol_is_any_of(TokenType.GREATER):
+                    return self._fetch_token(TokenType.NOT_EQUAL)
+
+                return self._fetch_token(TokenType.SMALLER)
+
+            if self._expect_symbol_is_any_of(TokenType.GREATER):
+                if self._expect_symbol_is_any_of(TokenType.EQUAL):
+                    return self._fetch_token(TokenType.GREATER_EQUAL)
+
+                return self._fetch_token(TokenType.GREATER)
+
+            if self._expect_symbol_is_any_digit():
+                return self._fetch_integer()
+
+            self._raise_unknown_symbol_error()
+        except EndOfStringError:
+            return self._fetch_token(TokenType.END)
+
+    def tokenize_all(self) -> List[Token]:
+        """Fetches all the tokens of the parsed string at once, from its beginning.
+
+        It's equivalent to calling next_token() repeatedly after a reset(), but the whole string
+        is scanned in a single pass, which is much faster.
+
+        Returns:
+            A list with the fetched Token objects, always ending with an END (TokenType) token.
+
+        Raises:
+            UnknownSymbolError if an unknown symbol is found.
+        """
+
+        return list(self.iter_tokens())
+
+    def iter_tokens(self, unknown_symbols: List[UnknownSymbolError] = None) -> Iterator[Token]:
+        """Lazily fetches the tokens of the parsed string, from its beginning.
+
+        The tokens are the same tokenize_all() returns, but each one is only scanned when requested.
+        The parsing position of next_token() isn't affected.
+
+        Parameters:
+            [optional] unknown_symbols (list): if given, unknown symbols are skipped, and an UnknownSymbolError
+                                               for each of them is appended to this list instead of raised.
+                                               The default-value is None, i.e. unknown symbols are raised.
+
+        Returns:
+            An iterator over the fetched Token objects, ending with an END (TokenType) token.
+
+        Raises:
+            UnknownSymbolError (while iterating) if an unknown symbol is found, unless unknown_symbols is given.
+        """
+
+        return _iter_tokens(self._input_string, unknown_symbols)
+
+    def _raise_unknown_symbol_error(self) -> None:
+        # Raises an UnknownSymbolError exception for the current symbol.
+
+        unknown_symbol_error = UnknownSymbolError(self._current_symbol, self._current_line, self._current_column)
+
+        self._next_symbol()
+        self._begin_token()
+
+        raise unknown_symbol_error
+
+    def _fetch_integer(self) -> Token:
+        # Fetches an INTEGER (TokenType) token, starting at the current symbol.
+
+        self._skip_digits()
+        return self._fetch_token(TokenType.INTEGER)
+
+    def _has_symbols_left(self) -> bool:
+        return self._current_index < len(self._input_string)
+
+    def _next_symbol(self) -> None:
+        # Advances the parsing to next character of the parsed string.
+
+        if not self._has_symbols_left():
+            raise EndOfStringError(self._current_line, self._current_column)
+
+        self._current_index += 1
+        if self._current_symbol == '\n':
+            self._current_line += 1
+            self._current_column  = 1
+        else:
+            self._current_column += 1
+
+        self._current_symbol = self._input_string[self._current_index : self._current_index+1].casefold()
+
+    def _begin_token(self) -> None:
+        # Begins a new current token.
+
+        self._token_start = self._current_index
+        self._token_line = self._current_line
+        self._token_column = self._current_column
+
+    def _skip_symbols_while(self, condition: Callable[[str], bool]) -> None:
+        # Skips symbols in the parsed string while they satisfy a given condition.
+
+        while self._has_symbols_left():
+            if condition(self._current_symbol):
+                self._next_symbol()
+            else:
+                break
+
+    def _skip_blanks(self) -> None:
+        # Skips blanks (symbol.isspace() == True) in the parsed string.
+
+        self._skip_symbols_while(lambda x: x.isspace())
+
+    def _skip_digits(self) -> None:
+        # Skips digits (symbol.isdigit() == True) in the parsed string.
+
+        self._skip_symbols_while(lambda x: x.isdigit())
+
+    def _fetch_token(self, token_type: TokenType) -> Token:
+        # Returns the current token and begins a new one.
+
+        token_value = self._input_string[self._token_start : self._current_index]
+        token = Token(token_type, token_value, self._token_line, self._token_column)
+
+        self._begin_token()
+
+        return token
+
+    def _expect_symbol_is_any_of(self, *expected_symbols: Tuple[TokenType, ...]) -> bool:
+        # Checks if the current symbol is any of a given set. If it is, advances to the next symbol.
+
+        if not self._current_symbol in (x.symbol for x in expected_symbols):
+            return False
+
+        self._next_symbol()
+
+        return True
+
+    def _expect_symbol_is_any_digit(self) -> bool:
+        # Checks if the symbol a digit. If it is, advances to the next symbol.
+
+        if not self._current_symbol.isdigit():
+            return False
+
+        self._next_symbol()
+
+        return True
+
+
+class UnexpectedTokenError(ParseError):
+    """Exception thrown by the Parser class when a token of a type unexpected by the syntax is found.
+
+    Parameters:
+        found_token (Token): the token that was found.
+    """
+
+    def __init__(self, found_token: Token):
+        super().__init__(found_token.line, found_token.column)
+        self.found_token = found_token
+
+
+class ClosureError(ParseError):
+    """Exception thrown by the Parser class when an error related to an enclosed expression happens.
+
+    Parameters:
+        closure (Closure): the type of closure.
+        line (int): the line at which the error was noticed.
+        column (int): the position in the line at which the error was noticed.
+    """
+
+    def __init__(self, closure: Closure, line: int, column: int):
+        super().__init__(line, column)
+        self.closure = closure
+
+
+class OrphanClosureBeginError(ClosureError):
+    """Exception thrown by the Parser class when there's an enclosed expression left open.
+
+    Parameters:
+        closure (Closure): the type of closure that was left open.
+        line (int): the line at which the enclosed expression begins.
+        column (int): the position in the line at which the enclosed expression begins.
+    """
+
+    pass
+
+
+class OrphanClosureEndError(ClosureError):
+    """Exception thrown by the Parser class when there's a closure's end with no matching begin.
+
+    Parameters:
+        closure (Closure): the type of the unopened closure.
+        line (int): the line at which the closure's end was found.
+        column (int): the position in the line at which the closure's end was found.
+    """
+
+    pass
+
+
+class IncompleteEnclosedExpressionError(ClosureError):
+    """Exception thrown by the Parser class when there's an incomplete enclosed expression.
+
+    Parameters:
+        closure (Closure): the type of closure.
+        line (int): the line at which the enclosed expression begins.
+        column (int): the position in the line at which the enclosed expression begins.
+    """
+
+    pass
+
+
+# The binary operations, by the type of their token, as (precedence, class) pairs. Comparisons bind the loosest, then
+# sums and subtractions, then multiplications and divisions. All of them are left-associative.
+_BINARY_OPERATIONS = {
+        TokenType.SMALLER: (1, SmallerOp),
+        TokenType.GREATER: (1, GreaterOp),
+        TokenType.EQUAL: (1, EqualOp),
+        TokenType.SMALLER_EQUAL: (1, SmallerOrEqualOp),
+        TokenType.GREATER_EQUAL: (1, GreaterOrEqualOp),
+        TokenType.NOT_EQUAL: (1, NotEqualOp),
+        TokenType.PLUS: (2, SumOp),
+        TokenType.MINUS: (2, SubtractOp),
+        TokenType.MULTIPLY: (3, MultiplyOp),
+        TokenType.DIVIDE: (3, DivideOp)
+    }
+
+# The types of the tokens a dice set or a value may start with, and those an operand may start with (i.e., signs).
+_DICE_SET_OR_VALUE_BEGINNINGS = frozenset((TokenType.LEFT_PARENTHESIS, TokenType.INTEGER, TokenType.DIE))
+_OPERAND_BEGINNINGS = _DICE_SET_OR_VALUE_BEGINNINGS | {TokenType.PLUS, TokenType.MINUS}
+
+
+class ParseDiagnostic(NamedTuple):
+    """A problem found in an expression by Parser.parse_many().
+
+    Parameters:
+        error_class (type): the class of the ParseError that Parser.parse() would raise for the problem.
+        line (int): the line at which the problem was found.
+        column (int): the position in the line at which the problem was found.
+        token (Token): the offending token, e.g. an unclosed parenthesis or an unexpected token. None for
+                       unknown symbols, which aren't tokens.
+    """
+
+    error_class: type
+    line: int
+    column: int
+    token: Token
+
+
+class ParseResult(NamedTuple):
+    """The result of the parse of an expression by Parser.parse_many().
+
+    Parameters:
+        operation (Operation): the operation tree of the expression, or None if any problem was found in it,
+                               or if it was empty.
+        diagnostics (tuple): the ParseDiagnostics of the problems found in the expression, in the order they
+                             appear in it. Empty if the expression is valid. The error Parser.parse() would
+                             raise is among them, though not necessarily first: e.g. an unclosed parenthesis
+                             is reported at its own position, before the problem that stops Parser.parse().
+    """
+
+    operation: Operation
+    diagnostics: Tuple[ParseDiagnostic, ...]
+
+    @property
+    def ok(self) -> bool:
+        """Whether the expression is valid."""
+
+        return not self.diagnostics
+
+
+# Stands for missing operands while parsing invalid expressions, whose trees are discarded.
+_MISSING_OPERAND = LiteralValueOp(None)
+
+
+# The maximum number of distinct subtrees a canonical Parser keeps for sharing.
+_CANONICAL_NODES_MAXSIZE = 65536
+
+
+class _ParserState(Enum):
+    # The states of the Parser's loop: expecting an operand, a value, what follows a value, or a binary operation.
+
+    OPERAND = 0
+    VALUE = 1
+    VALUE_END = 2
+    OPERATOR = 3
+
+
+class Parser():
+    """Class that parses a string accordingly to the dice-language, checking its syntactical and semantical validity.
+
+    The state of each parse is kept apart from the parser, so a single parser may be shared by any number of
+    threads, parsing at the same time.
+
+    Parameters:
+        [optional] canonical (bool): whether the parsed trees should be put in their canonical forms (see
+                                     Operation.canonical()), with their identical subtrees shared across all
+                                     the strings this parser parses. Shared subtrees keep the source spans of
+                                     their first occurrences. Up to 65536 subtrees are kept for sharing, the
+                                     least recently used ones being dropped first. The default-value is False.
+        [optional] spans (bool): whether the parsed operations should carry the source spans they were parsed
+                                 from (see Operation.span), for profiling and tracing. Spans are left out by
+                                 default, as they'd take most of the memory of the trees. The default-value
+                                 is False.
+    """
+
+    def __init__(self, canonical: bool = False, spans: bool = False):
+        self._spans = spans
+        # The most recently used distinct subtrees of the canonical trees, each mapped to itself.
+        self._canonical_nodes = OrderedDict() if canonical else None
+        self._canonical_maxsize = _CANONICAL_NODES_MAXSIZE
+        self._canonical_lock = Lock()
+
+    def parse(self, input_string: str, optimize: bool = False) -> Operation:
+        """Parses and validates a string accordingly to the dice-language.
+
+        Parameters:
+            input_string (str): the string to be parsed.
+            [optional] optimize (bool): whether the resulting operation tree should be optimized (see
+                                        Operation.optimize()). The default-value is False.
+
+        Returns:
+            True if the string is valid. False, otherwise.
+
+        Raises:
+            UnexpectedTokenError if a token of an unexpected type is found at any moment.
+        """
+
+        context = _ParseContext(input_string, self._spans)
+        roll_op = context._roll_expression()
+
+        if context._current_token.type is not TokenType.END:
+            context._handle_unexpected_token()
+
+        return self._finished(roll_op, optimize)
+
+    def parse_many(self, input_strings: Iterable[str], optimize: bool = False) -> List[ParseResult]:
+        """Parses and validates a batch of strings, reporting the problems found in each one instead of raising them.
+
+        Rather than stopping at its first problem, the parse of an invalid string skips past it and goes on,
+        so that most of the problems in the string are reported at once.
+
+        Parameters:
+            input_strings (Iterable[str]): the strings to be parsed.
+            [optional] optimize (bool): whether the resulting operation trees should be optimized (see
+                                        Operation.optimize()). The default-value is False.
+
+        Returns:
+            A list with a ParseResult per string, in the same order. Each one holds either the operation
+            tree of the string or the diagnostics of its problems.
+        """
+
+        return [self._parse_with_diagnostics(input_string, optimize) for input_string in input_strings]
+
+    def _parse_with_diagnostics(self, input_string: str, optimize: bool) -> ParseResult:
+        diagnostics = []
+        unknown_symbols = []
+        roll_op = _ParseContext(input_string, self._spans, diagnostics, unknown_symbols)._roll_expression()
+
+        if unknown_symbols:
+            diagnostics.extend(ParseDiagnostic(UnknownSymbolError, error.line, error.column, None)
+                               for error in unknown_symbols)
+            diagnostics.sort(key=lambda diagnostic: (diagnostic.line, diagnostic.column))
+
+        if diagnostics:
+            return ParseResult(None, tuple(diagnostics))
+
+        return ParseResult(self._finished(roll_op, optimize), ())
+
+    def _finished(self, roll_op: Operation, optimize: bool) -> Operation:
+        # Optimizes and canonicalizes a parsed operation tree, as requested.
+
+        if roll_op is None:
+            return None
+
+        if optimize:
+            roll_op = roll_op.optimize()
+
+        if self._canonical_nodes is not None:
+            with self._canonical_lock:
+                roll_op = _canonicalized(roll_op, self._canonical_nodes)
+
+                while len(self._canonical_nodes) > self._canonical_maxsize:
+                    self._canonical_nodes.popitem(last=False)
+
+        return roll_op
+
+
+class _ParseContext():
+    # The state of a single parse: the tokens of the parsed string and the position in them, the open closures, and,
+    # while collecting them, the diagnostics of the problems found. Each parse has its own context, so a Parser may
+    # parse any number of strings at once, e.g. from multiple threads.
+
+    __slots__ = ('_tokens', '_current_token', '_last_token', '_closure_stack', '_spans', '_diagnostics')
+
+    def __init__(self, input_string: str, spans: bool, diagnostics: List[ParseDiagnostic] = None,
+                 unknown_symbols: List[UnknownSymbolError] = None):
+        self._tokens = _iter_tokens(input_string, unknown_symbols)
+        self._current_token = None
+        self._last_token = None
+        self._closure_stack = []
+        self._spans = spans
+        self._diagnostics = diagnostics
+        self._next_token()
+
+    def _roll_expression(self) -> Operation:
+        # Parses a roll expression, starting at the current token. Returns None if no expression starts there.
+        #
+        # Rather than recursing through a function per grammar rule, a single loop climbs the precedences of the
+        # binary operations (see _BINARY_OPERATIONS): it keeps the parsed operands and the operations waiting for
+        # their right operands in stacks, and each parenthesized expression suspends the enclosing one in a frame.
+        # The parse takes linear time, whatever the length and the nesting depth of the expression.
+        #
+        # While collecting diagnostics, each problem is reported, then skipped past: unexpected tokens are dropped,
+        # missing operands are stood for by _MISSING_OPERAND, and parentheses left open are closed.
+
+        if self._current_token.type not in _OPERAND_BEGINNINGS and \
+                (self._diagnostics is None or self._current_token.type is TokenType.END):
+            return None
+
+        frames = []
+        # The operands, as (operation, start token) pairs, and the binary operations, as (precedence, class) pairs.
+        operands = []
+        operators = []
+        state = _ParserState.OPERAND
+
+        while True:
+            if state is _ParserState.OPERAND:
+                # An optionally signed dice set or value.
+                sign = None
+
+                if self._current_token.type in (TokenType.PLUS, TokenType.MINUS):
+                    sign = self._current_token
+                    self._next_token()
+
+                if self._current_token.type not in _DICE_SET_OR_VALUE_BEGINNINGS:
+                    self._report_unexpected_token()
+
+                    if self._at_expression_end(frames):
+                        operands.append((_MISSING_OPERAND, self._current_token))
+                        state = _ParserState.OPERATOR
+                    else:
+                        self._next_token()
+
+                    continue
+
+                start = self._current_token
+                count_op = None
+                die_token = None
+                state = _ParserState.VALUE
+            elif state is _ParserState.VALUE:
+                # The number of dice, which may be missing, or the maximum of the die, if a die token was found.
+                if self._begin_closure(Closure.PARENTHESES):
+                    frames.append((operands, operators, sign, start, count_op, die_token))
+                    operands = []
+                    operators = []
+                    state = _ParserState.OPERAND
+                    continue
+
+                value_op = None
+
+                if self._current_token.type is TokenType.INTEGER:
+                    literal_token = self._current_token
+                    self._next_token()
+                    value_op = self._spanned(LiteralValueOp(int(literal_token.value)), literal_token)
+                elif die_token is not None:
+                    self._report_unexpected_token()
+                    value_op = _MISSING_OPERAND
+
+                state = _ParserState.VALUE_END
+            elif state is _ParserState.VALUE_END:
+                if die_token is None and self._current_token.type is TokenType.DIE:
+                    count_op = value_op
+                    die_token = self._current_token
+                    self._next_token()
+                    state = _ParserState.VALUE
+                    continue
+
+                operand = value_op
+
+                if die_token is not None:
+                    die_op = self._spanned(DieOp(value_op), die_token)
+
+                    if count_op is None:
+                        operand = self._spanned(SingleDieRollOp(die_op), start)
+                    else:
+                        operand = self._spanned(DiceRollOp(count_op, die_op), start)
+
+                if sign is not None and sign.type is TokenType.MINUS:
+                    operand = self._spanned(NegateOp(operand), sign)
+
+                operands.append((operand, sign or start))
+                state = _ParserState.OPERATOR
+            else:
+                binary_operation = _BINARY_OPERATIONS.get(self._current_token.type)
+
+                if binary_operation is not None:
+                    self._reduce(operands, operators, binary_operation[0])
+                    operators.append(binary_operation)
+                    self._next_token()
+                    state = _ParserState.OPERAND
+                    continue
+
+                if self._diagnostics is not None and not self._at_expression_end(frames):
+                    self._report_unexpected_token()
+                    self._skip_unexpected_tokens()
+                    continue
+
+                self._reduce(operands, operators, 0)
+                value_op = operands[0][0]
+
+                if not frames:
+                    return value_op
+
+                if not self._end_closure(Closure.PARENTHESES):
+                    # Only reached at the end of the string, while collecting diagnostics: the parenthesis is closed.
+                    self._report_unexpected_token()
+                    self._closure_stack.pop()
+
+                operands, operators, sign, start, count_op, die_token = frames.pop()
+                state = _ParserState.VALUE_END
+
+    def _reduce(self, operands: List[Tuple[Operation, Token]], operators: List[Tuple[int, type]],
+                precedence: int) -> None:
+        # Builds the pending binary operations whose precedence isn't lower than the given one, from right to left.
+        # Each operation spans from the start of its left operand up to the last token consumed.
+
+        while operators and operators[-1][0] >= precedence:
+            operation_class = operators.pop()[1]
+            right_operand = operands.pop()[0]
+            left_operand, start = operands.pop()
+            operands.append((self._spanned(operation_class(left_operand, right_operand), start), start))
+
+    def _next_token(self) -> None:
+        self._last_token = self._current_token
+        self._current_token = next(self._tokens)
+
+    def _spanned(self, operation: Operation, start: Token) -> Operation:
+        # Sets the source span of an operation, from its start token up to the last token consumed, if spans are kept.
+
+        if not self._spans:
+            return operation
+
+        last = self._last_token
+        operation._span = SourceSpan(start.line, start.column, last.line, last.column + len(last.value))
+        return operation
+
+    def _begin_closure(self, closure: Closure) -> bool:
+        current = self._current_token
+
+        if not current.type is closure.begin:
+            return False
+
+        self._next_token()
+
+        self._closure_stack.append((closure, current))
+
+        return True
+
+    def _end_closure(self, expected_closure: Closure) -> bool:
+        current = self._current_token
+
+        if  not current.type is expected_closure.end:
+            return False
+
+        self._next_token()
+
+        try:
+            opened_closure = self._closure_stack.pop()
+
+            if opened_closure[0] != expected_closure:
+                raise OrphanClosureBeginError(opened_closure[0], opened_closure[1].line, opened_closure[1].column)
+        except IndexError:
+            # It seems that, if this one is ever raised, it'll be most likely an error in the parsing process.
+            raise OrphanClosureEndError(expected_closure, current.line, current.column)
+
+        return True
+
+    def _handle_unexpected_token(self) -> None:
+        raise self._unexpected_token_error()[0]
+
+    def _report_unexpected_token(self) -> None:
+        # Raises the error of the current token, unless collecting diagnostics. Then, its diagnostic is collected,
+        # except if it repeats the last one, which happens when a problem is noticed again while skipping past it.
+
+        if self._diagnostics is None:
+            self._handle_unexpected_token()
+
+        error, token = self._unexpected_token_error()
+        diagnostic = ParseDiagnostic(type(error), error.line, error.column, token)
+
+        if not self._diagnostics or self._diagnostics[-1] != diagnostic:
+            self._diagnostics.append(diagnostic)
+
+    def _unexpected_token_error(self) -> Tuple[ParseError, Token]:
+        # Returns the error of an unexpected current token, along with the offending token.
+
+        current = self._current_token
+
+        if current.type is TokenType.END:
+            return self._orphan_closure_begin_error() or (EndOfStringError(current.line, current.column), current)
+
+        return self._incomplete_enclosed_expression_error() or (UnexpectedTokenError(current), current)
+
+    def _orphan_closure_begin_error(self) -> Tuple[ParseError, Token]:
+        if not self._closure_stack:
+            return None
+
+        orphan_closure, token = self._closure_stack[-1]
+        return OrphanClosureBeginError(orphan_closure, token.line, token.column), token
+
+    def _incomplete_enclosed_expression_error(self) -> Tuple[ParseError, Token]:
+        ended_closure = next((c for c in Closure if c.end==self._current_token.type), None)
+
+        if ended_closure is None or not self._closure_stack or self._closure_stack[-1][0] is not ended_closure:
+            return None
+
+        opened_closure, token = self._closure_stack[-1]
+        return IncompleteEnclosedExpressionError(opened_closure, token.line, token.column), token
+
+    def _at_expression_end(self, frames: list) -> bool:
+        # Checks if the current token ends the expression being parsed: either the whole string, or a parenthesized
+        # expression.
+
+        token_type = self._current_token.type
+        return token_type is TokenType.END or (token_type is TokenType.RIGHT_PARENTHESIS and bool(frames))
+
+    def _skip_unexpected_tokens(self) -> None:
+        # Skips the current token and the ones after it, up to the next binary operation or end of an expression,
+        # along with any parenthesized expressions in between.
+
+        depth = 0
+
+        while True:
+            token_type = self._current_token.type
+
+            if token_type is TokenType.LEFT_PARENTHESIS:
+                depth += 1
+            elif token_type is TokenType.RIGHT_PARENTHESIS and depth > 0:
+                depth -= 1
+
+            self._next_token()
+            token_type = self._current_token.type
+
+            if token_type is TokenType.END or (depth == 0 and (token_type in _BINARY_OPERATIONS or
+                                                              token_type is TokenType.RIGHT_PARENTHESIS)):
+                return
+
+
+class ParseCacheInfo(NamedTuple):
+    """Statistics of a ParseCache.
+
+    Parameters:
+        hits (int): how many lookups found their operation tree in the cache.
+        misses (int): how many lookups had to parse their expression.
+        evictions (int): how many operation trees were discarded to respect the maximum size.
+        maxsize (int): the maximum number of cached operation trees.
+        currsize (int): the current number of cached operation trees.
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
+
+
+def _checked_maxsize(maxsize: int) -> int:
+    # Validates the maximum size of a ParseCache, which operator.index() turns into a plain int.
+
+    maxsize = operator.index(maxsize)
+
+    if maxsize < 0:
+        raise ValueError('the maximum size of the cache cannot be negative')
+
+    return maxsize
+
+
+# Stands for the absence of a tree in a ParseCache, where None is the cached tree of an empty expression.
+_NOT_CACHED = object()
+
+
+class ParseCache():
+    """Size-bounded, least-recently-used cache of operation trees, keyed by the text of their expressions.
+
+    Operation trees are stateless when executed, so a single cached tree may be safely shared by
+    any number of callers. The cache is thread-safe.
+
+    Parameters:
+        [optional] maxsize (int): the maximum number of cached operation trees. Zero disables the cache.
+                                  The default-value is 1024.
+
+    Raises:
+        TypeError if maxsize isn't an integer.
+        ValueError if maxsize is negative.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self._lock = Lock()
+        self._parser = Parser()
+        self._trees = OrderedDict()
+        self._maxsize = _checked_maxsize(maxsize)
+        self._reset_counters()
+
+    def parse(self, input_string: str, optimize: bool = False) -> Operation:
+        """Parses a string accordingly to the dice-language, reusing a cached operation tree if there's one.
+
+        Parameters:
+            input_string (str): the string to be parsed.
+            [optional] optimize (bool): whether the resulting operation tree should be optimized.
+                                        The default-value is False.
+
+        Returns:
+            The operation tree of the string.
+
+        Raises:
+            The same errors as Parser.parse(). Strings that fail to parse are never cached.
+        """
+
+        key = (input_string, optimize)
+
+        with self._lock:
+            tree = self._trees.get(key, _NOT_CACHED)
+
+            if tree is not _NOT_CACHED:
+                self._hits += 1
+                self._trees.move_to_end(key)
+                return tree
+
+            self._misses += 1
+
+        tree = self._parser.parse(input_string, optimize)
+
+        with self._lock:
+            if self._maxsize > 0:
+                self._trees[key] = tree
+                self._evict(self._maxsize)
+
+        return tree
+
+    def info(self) -> ParseCacheInfo:
+        """Returns the statistics of the cache.
+
+        Returns:
+            A ParseCacheInfo with the counters and sizes of the cache.
+        """
+
+        with self._lock:
+            return ParseCacheInfo(self._hits, self._misses, self._evictions, self._maxsize, len(self._trees))
+
+    def clear(self) -> None:
+        """Discards all cached operation trees and resets the statistics."""
+
+        with self._lock:
+            self._trees.clear()
+            self._reset_counters()
+
+    def resize(self, maxsize: int) -> None:
+        """Changes the maximum number of cached operation trees, discarding the least recently used ones if needed.
+
+        Parameters:
+            maxsize (int): the new maximum size. Zero disables the cache.
+
+        Raises:
+            TypeError if maxsize isn't an integer.
+            ValueError if maxsize is negative.
+        """
+
+        maxsize = _checked_maxsize(maxsize)
+
+        with self._lock:
+            self._maxsize = maxsize
+            self._evict(maxsize)
+
+    def _reset_counters(self) -> None:
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _evict(self, maxsize: int) -> None:
+        # Discards the least recently used operation trees until there are at most maxsize of them.
+
+        while len(self._trees) > maxsize:
+            self._trees.popitem(last=False)
+            self._evictions += 1
+
+
+# The cache behind the parse(), compile() and roll() free functions.
+parse_cache = ParseCache()
+
+# The parser behind the free functions that map their reports back to the source, profile() and roll_detailed().
+_spanned_parser = Parser(spans=True)
+
+
+def parse(input: str, optimize: bool = False) -> Operation:
+    return parse_cache.parse(input, optimize)
+
+
+def compile(input: str) -> Callable[[], Any]:
+    roll_tree = parse(input)
+    return roll_tree.compile() if roll_tree else None
+
+
+def roll(input: str, rng: RandomSource = None) -> Any:
+    roll_tree = parse(input)
+    return roll_tree.run(rng) if roll_tree else None
+
+
+def roll_detailed(input: str, rng: RandomSource = None) -> RollTrace:
+    roll_tree = _spanned_parser.parse(input)
+    return roll_tree.run_traced(rng) if roll_tree else None
+
+
+def iter_rolls(input: str, chunk_size: int = None, limit: int = None, rng: RandomSource = None) -> Iterator:
+    roll_tree = parse(input)
+    return roll_tree.stream(chunk_size, limit, rng) if roll_tree else iter(())
+
+
+def profile(input: str, n: int = 1, rng: RandomSource = None) -> Profiler:
+    roll_tree = _spanned_parser.parse(input)
+
+    if not roll_tree:
+        return None
+
+    profiler = Profiler(roll_tree, input)
+
+    for _ in range(n):
+        profiler.run(rng)
+
+    return profiler
+
+
+# Operation trees are serialized in postfix order, as an array of 64-bit integers: each node is a tag, optionally
+# followed by an inline value, and takes its operands from the nodes before it. Literals that don't fit inline are
+# kept apart, as constants.
+_TREE_FORMAT_MAGIC = b'PYDT'
+_TREE_FORMAT_VERSION = 1
+
+_TAG_LITERAL = 0
+_TAG_CONSTANT = 1
+_TAG_FIXED_DICE_ROLL = 2
+
+# The tags of the other nodes, which are rebuilt by calling their class with their operands.
+_TREE_CLASSES = (
+        DieOp,
+        DiceRollOp,
+        SingleDieRollOp,
+        NegateOp,
+        SumOp,
+        SubtractOp,
+        MultiplyOp,
+        DivideOp,
+        SmallerOp,
+        GreaterOp,
+        EqualOp,
+        SmallerOrEqualOp,
+        GreaterOrEqualOp,
+        NotEqualOp
+    )
+_FIRST_CLASS_TAG = 3
+_TREE_CLASS_TAGS = {tree_class: tag for tag, tree_class in enumerate(_TREE_CLASSES, _FIRST_CLASS_TAG)}
+
+# A serialized tree's header: the format's magic and version, the number of integers of its code, and the length of
+# its constants, which follow the code as a JSON list.
+_TREE_HEADER = struct.Struct('<4sHxxQQ')
 
-    Parameters:
-        [optional] input_string (str): the string to be parsed. The default-value is an empty string, i.e. no string to parse.
-    """
 
-    def __init__(self, input_string: str = ''):
-        self.set_input_string(input_string)
+def _tree_operands(operation: Operation) -> List[Operation]:
+    if isinstance(operation, SingleDieRollOp):
+        return [operation._right_operand]
 
-    def set_input_string(self, input_string: str) -> None:
-        """Sets the string to be parsed and resets the parsing.
+    if isinstance(operation, UnaryOp):
+        return [operation._operand]
 
-        Parameters:
-            input_string (str): the string to be parsed.
-        """
+    if isinstance(operation, BinaryOp):
+        return [operation._left_operand, operation._right_operand]
 
-        self._input_string = input_string
-        self.reset()
+    return []
 
-    def reset(self) -> None:
-        """Resets the parsing to the beginning of the string."""
 
-        self._current_symbol = self._input_string[0:1]
-        self._current_index = 0
-        self._current_line = 1
-        self._current_column = 1
-        self._begin_token()
+def serialize_tree(operation: Operation) -> bytes:
+    """Serializes an operation tree into a compact, versioned binary form, which deserialize_tree() reads back.
 
-    def next_token(self) -> Token:
-        """Fetches the next token from the parsed string.
+    Source spans aren't kept.
 
-        Returns:
-            A Token object containing the fetched token.
-            If the end of the string is reached, an END (TokenType) token is returned.
+    Parameters:
+        operation (Operation): the operation tree to be serialized.
 
-        Raises:
-            UnknownSymbolError if an unknown symbol is found.
-        """
+    Returns:
+        The serialized tree.
 
-        try:
-            self._skip_blanks()
-            self._begin_token()
+    Raises:
+        TypeError if the tree holds an operation of a type unknown to the format.
+    """
 
-            if self._expect_symbol_is_any_of(TokenType.LEFT_PARENTHESIS):
-                return self._fetch_token(TokenType.LEFT_PARENTHESIS)
+    code = array('q')
+    constants = []
+    pending = [(operation, False)]
+
+    while pending:
+        node, expanded = pending.pop()
+
+        if expanded:
+            code.append(_TREE_CLASS_TAGS[type(node)])
+        elif isinstance(node, (LiteralValueOp, FixedDiceRollOp)):
+            tag = _TAG_LITERAL if isinstance(node, LiteralValueOp) else _TAG_FIXED_DICE_ROLL
+            values = (node._value, ) if tag == _TAG_LITERAL else (node._dice_count, node._die_maximum)
+
+            for value in values:
+                if type(value) is int and _INT64_MINIMUM <= value <= _INT64_MAXIMUM:
+                    code.extend((_TAG_LITERAL, value))
+                else:
+                    code.extend((_TAG_CONSTANT, len(constants)))
+                    constants.append(value)
+
+            if tag == _TAG_FIXED_DICE_ROLL:
+                code.append(tag)
+        elif type(node) in _TREE_CLASS_TAGS:
+            pending.append((node, True))
+            pending.extend((operand, False) for operand in reversed(_tree_operands(node)))
+        else:
+            raise TypeError(f'{type(node).__name__} cannot be serialized')
 
-            if self._expect_symbol_is_any_of(TokenType.RIGHT_PARENTHESIS):
-                return self._fetch_token(TokenType.RIGHT_PARENTHESIS)
+    if sys.byteorder == 'big':
+        code.byteswap()
 
-            if self._expect_symbol_is_any_of(TokenType.PLUS):
-                return self._fetch_token(TokenType.PLUS)
+    encoded_constants = json.dumps(constants).encode() if constants else b''
+    return (_TREE_HEADER.pack(_TREE_FORMAT_MAGIC, _TREE_FORMAT_VERSION, len(code), len(encoded_constants))
+            + code.tobytes() + encoded_constants)
 
-            if self._expect_symbol_is_any_of(TokenType.MINUS):
-                return self._fetch_token(TokenType.MINUS)
 
-            if self._expect_symbol_is_any_of(TokenType.MULTIPLY):
-                return self._fetch_token(TokenType.MULTIPLY)
+def deserialize_tree(data: bytes) -> Operation:
+    """Rebuilds an operation tree from the form written by serialize_tree(), without parsing its expression.
 
-            if self._expect_symbol_is_any_of(TokenType.DIVIDE):
-                return self._fetch_token(TokenType.DIVIDE)
+    Parameters:
+        data (bytes): the serialized tree, or any buffer holding it (such as a memoryview).
 
-            if self._expect_symbol_is_any_of(TokenType.DIE):
-                return self._fetch_token(TokenType.DIE)
+    Returns:
+        The operation tree.
 
-            if self._expect_symbol_is_any_of(TokenType.EQUAL):
-                return self._fetch_token(TokenType.EQUAL)
+    Raises:
+        ValueError if the data isn't a serialized tree of a supported version.
+    """
 
-            if self._expect_symbol_is_any_of(TokenType.SMALLER):
-                if self._expect_symbol_is_any_of(TokenType.EQUAL):
-                    return self._fetch_token(TokenType.SMALLER_EQUAL)
+    data = memoryview(data)
 
-                if self._expect_symbol_is_any_of(TokenType.GREATER):
-                    return self._fetch_token(TokenType.NOT_EQUAL)
+    if len(data) < _TREE_HEADER.size:
+        raise ValueError('not a serialized operation tree')
 
-                return self._fetch_token(TokenType.SMALLER)
+    magic, version, code_length, constants_length = _TREE_HEADER.unpack_from(data)
 
-            if self._expect_symbol_is_any_of(TokenType.GREATER):
-                if self._expect_symbol_is_any_of(TokenType.EQUAL):
-                    return self._fetch_token(TokenType.GREATER_EQUAL)
+    if magic != _TREE_FORMAT_MAGIC:
+        raise ValueError('not a serialized operation tree')
 
-                return self._fetch_token(TokenType.GREATER)
+    if version != _TREE_FORMAT_VERSION:
+        raise ValueError(f'unsupported serialized operation tree version: {version}')
 
-            if self._expect_symbol_is_any_digit():
-                return self._fetch_integer()
+    code_end = _TREE_HEADER.size + 8 * code_length
+    code = array('q')
+    code.frombytes(data[_TREE_HEADER.size:code_end])
 
-            self._raise_unknown_symbol_error()
-        except EndOfStringError:
-            return self._fetch_token(TokenType.END)
+    if sys.byteorder == 'big':
+        code.byteswap()
 
-    def _raise_unknown_symbol_error(self) -> None:
-        # Raises an UnknownSymbolError exception for the current symbol.
+    constants = json.loads(bytes(data[code_end:code_end + constants_length])) if constants_length else []
+    stack = []
+    tags = iter(code)
 
-        unknown_symbol_error = UnknownSymbolError(self._current_symbol, self._current_line, self._current_column)
+    try:
+        for tag in tags:
+            if tag == _TAG_LITERAL:
+                stack.append(LiteralValueOp(next(tags)))
+            elif tag == _TAG_CONSTANT:
+                index = next(tags)
 
-        self._next_symbol()
-        self._begin_token()
+                # Negative indexes would wrap around, picking an unrelated constant rather than failing.
+                if not 0 <= index < len(constants):
+                    raise IndexError
 
-        raise unknown_symbol_error
+                stack.append(LiteralValueOp(constants[index]))
+            elif tag == _TAG_FIXED_DICE_ROLL:
+                die_maximum = stack.pop()._value
+                stack[-1] = FixedDiceRollOp(stack[-1]._value, die_maximum)
+            elif _FIRST_CLASS_TAG <= tag < _FIRST_CLASS_TAG + len(_TREE_CLASSES):
+                tree_class = _TREE_CLASSES[tag - _FIRST_CLASS_TAG]
 
-    def _fetch_integer(self) -> Token:
-        # Fetches an INTEGER (TokenType) token, starting at the current symbol.
+                if issubclass(tree_class, BinaryOp) and tree_class is not SingleDieRollOp:
+                    right_operand = stack.pop()
+                    stack[-1] = tree_class(stack[-1], right_operand)
+                else:
+                    stack[-1] = tree_class(stack[-1])
+            else:
+                raise ValueError(f'unknown tag in serialized operation tree: {tag}')
+    except (AttributeError, IndexError, StopIteration):
+        # Missing operands, or fixed dice rolls of anything but literal values.
+        raise ValueError('corrupted serialized operation tree')
 
-        self._skip_digits()
-        return self._fetch_token(TokenType.INTEGER)
+    if len(stack) != 1:
+        raise ValueError('corrupted serialized operation tree')
 
-    def _has_symbols_left(self) -> bool:
-        return self._current_index < len(self._input_string)
+    return stack[0]
 
-    def _next_symbol(self) -> None:
-        # Advances the parsing to next character of the parsed string.
 
-        if not self._has_symbols_left():
-            raise EndOfStringError(self._current_line, self._current_column)
+def _tree_label(operation: Operation) -> Any:
+    # Identifies an operation, apart from its operands. The tags of the serialized trees are used where possible,
+    # as their hashes don't change from a process to another, unlike the hashes of classes and strings.
 
-        self._current_index += 1
-        if self._current_symbol == '\n':
-            self._current_line += 1
-            self._current_column  = 1
-        else:
-            self._current_column += 1
+    if type(operation) is LiteralValueOp:
+        return (_TAG_LITERAL, operation._value)
 
-        self._current_symbol = self._input_string[self._current_index : self._current_index+1].casefold()
+    if type(operation) is FixedDiceRollOp:
+        return _TAG_FIXED_DICE_ROLL
 
-    def _begin_token(self) -> None:
-        # Begins a new current token.
+    return _TREE_CLASS_TAGS.get(type(operation), type(operation).__qualname__)
 
-        self._token_start = self._current_index
-        self._token_line = self._current_line
-        self._token_column = self._current_column
 
-    def _skip_symbols_while(self, condition: Callable[[str], bool]) -> None:
-        # Skips symbols in the parsed string while they satisfy a given condition.
+def _structural_hash(operation: Operation) -> int:
+    # Hashes an operation tree from the hashes of its operands, without recursing, caching the hash of each node.
 
-        while self._has_symbols_left():
-            if condition(self._current_symbol):
-                self._next_symbol()
-            else:
-                break
+    pending = [operation]
 
-    def _skip_blanks(self) -> None:
-        # Skips blanks (symbol.isspace() == True) in the parsed string.
+    while pending:
+        node = pending[-1]
+        operands = _tree_operands(node)
+        unhashed = [operand for operand in operands if getattr(operand, '_hash', None) is None]
 
-        self._skip_symbols_while(lambda x: x.isspace())
+        if unhashed:
+            pending.extend(unhashed)
+            continue
 
-    def _skip_digits(self) -> None:
-        # Skips digits (symbol.isdigit() == True) in the parsed string.
+        pending.pop()
+        node._hash = hash((_tree_label(node), ) + tuple(operand._hash for operand in operands))
 
-        self._skip_symbols_while(lambda x: x.isdigit())
+    return operation._hash
 
-    def _fetch_token(self, token_type: TokenType) -> Token:
-        # Returns the current token and begins a new one.
 
-        token_value = self._input_string[self._token_start : self._current_index]
-        token = Token(token_type, token_value, self._token_line, self._token_column)
+def _structurally_equal(left: Operation, right: Operation) -> bool:
+    # Compares two operation trees node by node, without recursing.
 
-        self._begin_token()
+    pending = [(left, right)]
 
-        return token
+    while pending:
+        left, right = pending.pop()
 
-    def _expect_symbol_is_any_of(self, *expected_symbols: Tuple[TokenType, ...]) -> bool:
-        # Checks if the current symbol is any of a given set. If it is, advances to the next symbol.
+        if left is right:
+            continue
 
-        if not self._current_symbol in (x.symbol for x in expected_symbols):
+        if type(left) is not type(right) or hash(left) != hash(right):
             return False
 
-        self._next_symbol()
+        if type(left) is LiteralValueOp:
+            if type(left._value) is not type(right._value) or left._value != right._value:
+                return False
+        else:
+            left_operands = _tree_operands(left)
+            right_operands = _tree_operands(right)
 
-        return True
+            if len(left_operands) != len(right_operands):
+                return False
 
-    def _expect_symbol_is_any_digit(self) -> bool:
-        # Checks if the symbol a digit. If it is, advances to the next symbol.
+            pending.extend(zip(left_operands, right_operands))
 
-        if not self._current_symbol.isdigit():
-            return False
+    return True
 
-        self._next_symbol()
 
-        return True
+# The operations whose operands may be swapped without changing their results.
+_COMMUTATIVE_CLASSES = (SumOp, MultiplyOp, EqualOp, NotEqualOp)
 
 
-class UnexpectedTokenError(ParseError):
-    """Exception thrown by the Parser class when a token of a type unexpected by the syntax is found.
+def _canonical_order(operation: Operation) -> Tuple[bool, int]:
+    return isinstance(operation, LiteralValueOp), hash(operation)
 
-    Parameters:
-        found_token (Token): the token that was found.
-    """
 
-    def __init__(self, found_token: Token):
-        super().__init__(found_token.line, found_token.column)
-        self.found_token = found_token
+def _canonicalized(operation: Operation, nodes: 'OrderedDict[Operation, Operation]') -> Operation:
+    # Returns the canonical form of an operation tree, sharing its subtrees with the equal ones found in nodes,
+    # to which the new subtrees are added. The subtrees used are moved to the end of nodes, as the most recently
+    # used ones. Works bottom-up, without recursing.
 
+    canonical_nodes = {}
+    pending = [(operation, False)]
 
-class ClosureError(ParseError):
-    """Exception thrown by the Parser class when an error related to an enclosed expression happens.
+    while pending:
+        node, expanded = pending.pop()
+        # Fixed dice rolls keep their own operands, as their class isn't rebuilt from operations.
+        operands = _tree_operands(node) if type(node) is not FixedDiceRollOp else []
 
-    Parameters:
-        closure (Closure): the type of closure.
-        line (int): the line at which the error was noticed.
-        column (int): the position in the line at which the error was noticed.
-    """
+        if not expanded:
+            if id(node) not in canonical_nodes:
+                pending.append((node, True))
+                pending.extend((operand, False) for operand in operands)
 
-    def __init__(self, closure: Closure, line: int, column: int):
-        super().__init__(line, column)
-        self.closure = closure
+            continue
 
+        canonical_operands = [canonical_nodes[id(operand)] for operand in operands]
 
-class OrphanClosureBeginError(ClosureError):
-    """Exception thrown by the Parser class when there's an enclosed expression left open.
+        if isinstance(node, _COMMUTATIVE_CLASSES) and \
+                _canonical_order(canonical_operands[1]) < _canonical_order(canonical_operands[0]):
+            canonical_operands.reverse()
 
-    Parameters:
-        closure (Closure): the type of closure that was left open.
-        line (int): the line at which the enclosed expression begins.
-        column (int): the position in the line at which the enclosed expression begins.
-    """
+        canonical_node = node
 
-    pass
+        if any(canonical is not operand for canonical, operand in zip(canonical_operands, operands)):
+            canonical_node = type(node)(*canonical_operands)
+            canonical_node._span = node.span
 
+        canonical_node = nodes.setdefault(canonical_node, canonical_node)
+        nodes.move_to_end(canonical_node)
+        canonical_nodes[id(node)] = canonical_node
 
-class OrphanClosureEndError(ClosureError):
-    """Exception thrown by the Parser class when there's a closure's end with no matching begin.
+    return canonical_nodes[id(operation)]
 
-    Parameters:
-        closure (Closure): the type of the unopened closure.
-        line (int): the line at which the closure's end was found.
-        column (int): the position in the line at which the closure's end was found.
-    """
 
-    pass
+# An expression store's file begins with a header: the format's magic and version, whether its trees were optimized,
+# the number of entries, and the offset of its index. The index is a table of (name offset, name length, entry offset,
+# entry length) records, sorted by name, so that entries can be looked up without reading the whole file. Each entry
+# is an expression's source followed by its serialized tree.
+_STORE_FORMAT_MAGIC = b'PYDS'
+_STORE_FORMAT_VERSION = 1
+_STORE_HEADER = struct.Struct('<4sHHQQ')
+_STORE_INDEX_RECORD = struct.Struct('<QQQQ')
+_STORE_ENTRY_HEADER = struct.Struct('<Q')
 
 
-class IncompleteEnclosedExpressionError(ClosureError):
-    """Exception thrown by the Parser class when there's an incomplete enclosed expression.
+class ExpressionStore():
+    """Read-only store of named, precompiled expressions, memory-mapped from a file written by ExpressionStore.write().
+
+    Opening a store only reads its header, whatever its size. Entries are looked up by a binary search through the
+    file's index, and their operation trees are rebuilt on first use, without parsing, then kept for later lookups.
+    The store is thread-safe.
 
     Parameters:
-        closure (Closure): the type of closure.
-        line (int): the line at which the enclosed expression begins.
-        column (int): the position in the line at which the enclosed expression begins.
+        path (str): the path of the store's file.
+
+    Raises:
+        ValueError if the file isn't an expression store of a supported version.
     """
 
-    pass
+    def __init__(self, path: str):
+        self._lock = Lock()
+        self._trees = {}
 
+        with open(path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size < _STORE_HEADER.size:
+                raise ValueError('not an expression store')
 
-class Parser():
-    """Class that parses a string accordingly to the dice-language, checking its syntactical and semantical validity."""
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
 
-    def __init__(self):
-        self._tokenizer = Tokenizer()
+        magic, version, flags, self._count, self._index_offset = _STORE_HEADER.unpack_from(self._mmap)
 
-    def parse(self, input_string: str) -> Operation:
-        """Parses and validates a string accordingly to the dice-language.
+        if magic != _STORE_FORMAT_MAGIC or version != _STORE_FORMAT_VERSION:
+            self.close()
+            raise ValueError('not an expression store' if magic != _STORE_FORMAT_MAGIC else
+                             f'unsupported expression store version: {version}')
 
-        Parameters:
-            input_string (str): the string to be parsed.
+        self.optimized = bool(flags & 1)
 
-        Returns:
-            True if the string is valid. False, otherwise.
+    @staticmethod
+    def write(path: str, expressions: Any, optimize: bool = False) -> None:
+        """Parses named expressions and writes their operation trees to a store's file.
+
+        Parameters:
+            path (str): the path of the file to be written.
+            expressions (Mapping[str, str] or Iterable[Tuple[str, str]]): the expressions, by name.
+            [optional] optimize (bool): whether the operation trees should be optimized. The default-value is False.
 
         Raises:
-            UnexpectedTokenError if a token of an unexpected type is found at any moment.
+            ValueError if a name is repeated. The same errors as Parser.parse(), if an expression is invalid.
         """
 
-        self._ready(input_string)
+        items = expressions.items() if hasattr(expressions, 'items') else expressions
+        parser = Parser()
+        entries = {}
 
-        roll_op = self._roll_expression()
+        for name, expression in items:
+            encoded_name = name.encode()
 
-        if self._current_token.type is TokenType.END:
-            return roll_op
+            if encoded_name in entries:
+                raise ValueError(f'repeated expression name: {name!r}')
 
-        self._handle_unexpected_token()
+            tree = parser.parse(expression, optimize)
+            encoded_expression = expression.encode()
+            entries[encoded_name] = (_STORE_ENTRY_HEADER.pack(len(encoded_expression)) + encoded_expression
+                                     + (serialize_tree(tree) if tree is not None else b''))
 
-    def _ready(self, input_string: str) -> None:
-        self._tokenizer.set_input_string(input_string)
-        self._reset_diagnostic()
-        self._next_token()
+        with open(path, 'wb') as file:
+            file.write(_STORE_HEADER.pack(_STORE_FORMAT_MAGIC, _STORE_FORMAT_VERSION, int(optimize), len(entries), 0))
+            records = []
 
-    def _reset_diagnostic(self) -> None:
-        self._closure_stack = []
+            for encoded_name in sorted(entries):
+                name_offset = file.tell()
+                file.write(encoded_name)
+                entry_offset = file.tell()
+                file.write(entries[encoded_name])
+                records.append(_STORE_INDEX_RECORD.pack(name_offset, len(encoded_name), entry_offset,
+                                                        len(entries[encoded_name])))
 
-    def _roll_expression(self) -> Operation:
-        # Tries to parse a roll expression, starting at the current token.
+            index_offset = file.tell()
+            file.write(b''.join(records))
+            file.seek(0)
+            file.write(_STORE_HEADER.pack(_STORE_FORMAT_MAGIC, _STORE_FORMAT_VERSION, int(optimize), len(entries),
+                                          index_offset))
 
-        return self._logical_comparison()
+    def __len__(self) -> int:
+        return self._count
 
-    def _logical_comparison(self) -> Operation:
-        left_operand = self._addition_or_subtraction()
+    def __contains__(self, name: str) -> bool:
+        return self._find(name) is not None
 
-        if left_operand is None:
-            return None
+    def __iter__(self) -> Iterator[str]:
+        for position in range(self._count):
+            yield self._name_at(position).decode()
 
-        return self._logical_comparison_right_hand(left_operand)
+    def __getitem__(self, name: str) -> Operation:
+        with self._lock:
+            if name in self._trees:
+                return self._trees[name]
 
-    def _logical_comparison_right_hand(self, left_operand: Operation) -> Operation:
-        op_token_type = self._current_token.type
+        record = self._find(name)
 
-        if op_token_type not in (TokenType.SMALLER, TokenType.GREATER, TokenType.EQUAL,
-                                 TokenType.SMALLER_EQUAL, TokenType.GREATER_EQUAL, TokenType.NOT_EQUAL):
-            return left_operand
+        if record is None:
+            raise KeyError(name)
 
-        self._next_token()
+        _, _, entry_offset, entry_length = record
+        source_length, = _STORE_ENTRY_HEADER.unpack_from(self._mmap, entry_offset)
+        tree_offset = entry_offset + _STORE_ENTRY_HEADER.size + source_length
+        tree_end = entry_offset + entry_length
+        tree = deserialize_tree(memoryview(self._mmap)[tree_offset:tree_end]) if tree_offset < tree_end else None
 
-        right_operand = self._addition_or_subtraction()
+        with self._lock:
+            return self._trees.setdefault(name, tree)
 
-        if right_operand is None:
-            self._handle_unexpected_token()
+    def __enter__(self) -> 'ExpressionStore':
+        return self
 
-        operation = None
-
-        if op_token_type is TokenType.SMALLER:
-            operation = SmallerOp(left_operand, right_operand)
-        elif op_token_type is TokenType.GREATER:
-            operation = GreaterOp(left_operand, right_operand)
-        elif op_token_type is TokenType.EQUAL:
-            operation = EqualOp(left_operand, right_operand)
-        elif op_token_type is TokenType.SMALLER_EQUAL:
-            operation = SmallerOrEqualOp(left_operand, right_operand)
-        elif op_token_type is TokenType.GREATER_EQUAL:
-            operation = GreaterOrEqualOp(left_operand, right_operand)
-        else:
-            operation = NotEqualOp(left_operand, right_operand)
+    def __exit__(self, *exc_info: Tuple) -> None:
+        self.close()
 
-        return self._logical_comparison_right_hand(operation)
+    def get(self, name: str, default: Any = None) -> Operation:
+        """Returns the operation tree of a named expression, or the default if there's none by that name."""
 
-    def _addition_or_subtraction(self) -> Operation:
-        # Tries to parse an addition or a subtraction, starting at the current token.
+        try:
+            return self[name]
+        except KeyError:
+            return default
 
-        left_operand = self._product_or_division()
+    def source(self, name: str) -> str:
+        """Returns the source of a named expression.
 
-        if left_operand is None:
-            return None
+        Raises:
+            KeyError if there's no expression by that name.
+        """
 
-        return self._addition_or_subtraction_right_hand(left_operand)
+        record = self._find(name)
 
-    def _addition_or_subtraction_right_hand(self, left_operand: Operation) -> Operation:
-        # Tries to parse the optional right side of an addition or a subtraction, starting at the current token.
+        if record is None:
+            raise KeyError(name)
 
-        op_token_type = self._current_token.type
+        entry_offset = record[2]
+        source_length, = _STORE_ENTRY_HEADER.unpack_from(self._mmap, entry_offset)
+        source_offset = entry_offset + _STORE_ENTRY_HEADER.size
+        return self._mmap[source_offset:source_offset + source_length].decode()
 
-        if not op_token_type in (TokenType.PLUS, TokenType.MINUS):
-            return left_operand
+    def close(self) -> None:
+        """Closes the store's file. The operation trees already loaded remain usable."""
 
-        self._next_token()
+        self._mmap.close()
 
-        right_operand = self._product_or_division()
+    def _record_at(self, position: int) -> Tuple[int, int, int, int]:
+        return _STORE_INDEX_RECORD.unpack_from(self._mmap, self._index_offset + position * _STORE_INDEX_RECORD.size)
 
-        if right_operand is None:
-            self._handle_unexpected_token()
+    def _name_at(self, position: int) -> bytes:
+        name_offset, name_length, _, _ = self._record_at(position)
+        return self._mmap[name_offset:name_offset + name_length]
 
-        operation = None
+    def _find(self, name: str) -> Tuple[int, int, int, int]:
+        # Binary-searches the index for a name, returning its record, or None.
 
-        if op_token_type is TokenType.PLUS:
-            operation = SumOp(left_operand, right_operand)
-        else:
-            operation = SubtractOp(left_operand, right_operand)
+        encoded_name = name.encode()
+        low, high = 0, self._count
 
-        return self._addition_or_subtraction_right_hand(operation)
+        while low < high:
+            middle = (low + high) // 2
 
-    def _product_or_division(self) -> Operation:
-        # Tries to parse a multiplication or a division, starting at the current token.
+            if self._name_at(middle) < encoded_name:
+                low = middle + 1
+            else:
+                high = middle
 
-        left_operand = self._positive_or_negative()
+        if low < self._count and self._name_at(low) == encoded_name:
+            return self._record_at(low)
 
-        if left_operand is None:
-            return None
+        return None
 
-        return self._product_or_division_right_hand(left_operand)
 
-    def _product_or_division_right_hand(self, left_operand: Operation) -> Operation:
-        # Tries to parse the optional right side of a multiplication or a division, starting at the current token.
+# Simulations are split into blocks of a fixed size, each rolled with its own random stream. The streams depend only
+# on the seed and the block's index, so the outcome doesn't depend on how many workers share the blocks.
+_SIMULATION_BLOCK_SIZE = 1 << 16
 
-        op_token_type = self._current_token.type
+# The compiled tree and the view of the results, as set up in each worker process.
+_simulation_worker = None
 
-        if not op_token_type in (TokenType.MULTIPLY, TokenType.DIVIDE):
-            return left_operand
 
-        self._next_token()
+def _simulation_block_rng(seed: Any, block_index: int) -> Random:
+    return Random(f'pydician.simulate:{seed!r}:{block_index}')
 
-        right_operand = self._positive_or_negative()
 
-        if right_operand is None:
-            self._handle_unexpected_token()
+def _simulate_block(compiled: Callable[..., Any], results: memoryview, block_index: int, start: int, stop: int,
+                    seed: Any) -> None:
+    rng = _simulation_block_rng(seed, block_index)
 
-        operation = None
+    for index in range(start, stop):
+        results[index] = compiled(rng)
 
-        if op_token_type is TokenType.MULTIPLY:
-            operation = MultiplyOp(left_operand, right_operand)
-        else:
-            operation = DivideOp(left_operand, right_operand)
 
-        return self._product_or_division_right_hand(operation)
+def _start_simulation_worker(roll_tree: Operation, memory_name: str, typecode: str) -> None:
+    global _simulation_worker
 
-    def _positive_or_negative(self) -> Operation:
-        # Tries to parse a positive or a negative value, starting at the current token.
+    memory = shared_memory.SharedMemory(memory_name)
+    _simulation_worker = (roll_tree.compile(), memory, memory.buf.cast(typecode))
 
-        op_token_type = self._current_token.type
 
-        if not op_token_type in (TokenType.PLUS, TokenType.MINUS):
-            return self._dice_set_or_value()
+def _run_simulation_block(block_index: int, start: int, stop: int, seed: Any) -> None:
+    compiled, _, results = _simulation_worker
+    _simulate_block(compiled, results, block_index, start, stop, seed)
 
-        self._next_token()
 
-        dice_val_op = self._dice_set_or_value()
+def simulate(input: str, n: int, workers: int = None, seed: Any = None,
+             block_size: int = _SIMULATION_BLOCK_SIZE) -> array:
+    """Rolls an expression n times across a pool of worker processes.
 
-        if dice_val_op is None:
-            self._handle_unexpected_token()
+    The rolls are split into blocks of block_size rolls, each rolled with a random stream derived from the seed and
+    the block's index. The same seed and block size always give the same results, whatever the number of workers.
+    The workers write their results straight into a block of shared memory.
 
-        if op_token_type is TokenType.MINUS:
-            return NegateOp(dice_val_op)
+    Parameters:
+        input (str): the expression to be rolled.
+        n (int): the number of rolls.
+        [optional] workers (int): the number of worker processes. With 1, or if there's a single block, the rolls
+                                  are made in the calling process. The default-value is None, i.e. the number
+                                  of CPUs.
+        [optional] seed (Any): the seed the random streams of the blocks are derived from, through its repr(),
+                               such as an int or a str. The default-value is None, i.e. a random one.
+        [optional] block_size (int): the number of rolls of each block. The default-value is 65536.
+
+    Returns:
+        An array of the n rolls: of signed 64-bit integers ('q'), or of floats ('d') if the expression may produce
+        non-integer values. Empty if the expression is.
+
+    Raises:
+        ValueError if n is negative or block_size isn't positive. The same errors as Parser.parse(), if the
+        expression is invalid.
+    """
 
-        return dice_val_op
+    if n < 0:
+        raise ValueError('the number of rolls must be non-negative')
 
-    def _dice_set_or_value(self) -> Operation:
-        # Tries to parse a dice set or a value, starting at the current token.
+    if block_size < 1:
+        raise ValueError('the block size must be positive')
 
-        value_op = self._value_expression()
-        die_op = self._die_expression()
+    roll_tree = parse(input)
 
-        if value_op is None:
-            return SingleDieRollOp(die_op)
+    if not roll_tree:
+        return array('q')
 
-        if die_op is None:
-            return value_op
+    if seed is None:
+        seed = Random().getrandbits(128)
 
-        return DiceRollOp(value_op, die_op)
+    typecode = 'q' if _is_integral(roll_tree) else 'd'
+    blocks = [(start, min(start + block_size, n)) for start in range(0, n, block_size)]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(blocks)))
+    itemsize = array(typecode).itemsize
+    memory = shared_memory.SharedMemory(create=True, size=max(n, 1) * itemsize)
 
-    def _die_expression(self) -> Operation:
-        # Tries to parse a die definition, starting at the current token.
+    try:
+        if workers == 1:
+            compiled = roll_tree.compile()
 
-        if not self._current_token.type is TokenType.DIE:
-            return None
+            with memory.buf.cast(typecode) as results:
+                for block_index, (start, stop) in enumerate(blocks):
+                    _simulate_block(compiled, results, block_index, start, stop, seed)
+        else:
+            with ProcessPoolExecutor(workers, initializer=_start_simulation_worker,
+                                     initargs=(roll_tree, memory.name, typecode)) as executor:
+                futures = [executor.submit(_run_simulation_block, block_index, start, stop, seed)
+                           for block_index, (start, stop) in enumerate(blocks)]
 
-        self._next_token()
+                for future in futures:
+                    future.result()
 
-        die_maximum_op = self._value_expression()
+        rolls = array(typecode)
+        rolls.frombytes(memory.buf[:n * itemsize])
+        return rolls
+    finally:
+        memory.close()
+        memory.unlink()
 
-        if die_maximum_op is None:
-            self._handle_unexpected_token()
 
-        return DieOp(die_maximum_op)
+# The command-line evaluator reads its input in blocks of this many lines. With a seed, each block is rolled with a
+# random stream derived from the seed and the block's index, as simulate() does.
+_CLI_BLOCK_SIZE = 1000
 
-    def _value_expression(self) -> Operation:
-        # Tries to parse a value, starting at the current token.
 
-        value_op = self._parenthesized_expression()
+class _CliRecord(NamedTuple):
+    line: int
+    id: Any
+    expression: str
+    count: int
+    error: Dict[str, Any]
 
-        if value_op is None:
-            value_op = self._literal_expression()
 
-        return value_op
+def describe_error(error: Exception) -> Dict[str, Any]:
+    """Describes an error as a JSON-ready dict, as the bulk evaluator and the roll server report them.
 
-    def _parenthesized_expression(self) -> Operation:
-        # Tries to parse an expression enclosed by parentheses, starting at the current token.
+    Parameters:
+        error (Exception): the error to be described.
 
-        if not self._begin_closure(Closure.PARENTHESES):
-            return None
+    Returns:
+        A dict with the "type" and "message" of the error and, for ParseErrors, the "line" and "column" at which
+        it was found.
+    """
 
-        roll_op = self._roll_expression()
+    description = {'type': type(error).__name__, 'message': str(error)}
 
-        if roll_op is None:
-            self._handle_unexpected_token()
+    if isinstance(error, ParseError):
+        description['line'] = error.line
+        description['column'] = error.column
 
-        if self._end_closure(Closure.PARENTHESES):
-            return roll_op
+    return description
 
-        self._handle_unexpected_token()
 
-    def _literal_expression(self) -> Operation:
-        # Tries to parse a literal value expression, starting at the current token.
+def _read_cli_record(line_number: int, line: str, input_format: str, default_count: int, max_count: int) -> _CliRecord:
+    text = line.strip()
 
-        return self._numeric_literal()
+    if input_format == 'text' or (input_format == 'auto' and not text.startswith('{')):
+        return _CliRecord(line_number, None, text, default_count, None)
 
-    def _numeric_literal(self) -> Operation:
-        # Tries to parse a numeric literal value expression, starting at the current token.
+    try:
+        fields = json.loads(text)
 
-        if not self._current_token.type is TokenType.INTEGER:
-            return None
+        if not isinstance(fields, dict) or not isinstance(fields.get('expr'), str) or not fields['expr'].strip():
+            raise ValueError('expected an object with a non-empty "expr" string')
 
-        literal_op = LiteralValueOp(int(self._current_token.value))
+        count = fields.get('count', default_count)
 
-        self._next_token()
+        if count is not None and (type(count) is not int or not 1 <= count <= max_count):
+            raise ValueError(f'the count must be an integer from 1 to {max_count}')
+    except ValueError as error:
+        return _CliRecord(line_number, None, text, None, {'type': 'InvalidInputError', 'message': str(error)})
 
-        return literal_op
+    return _CliRecord(line_number, fields.get('id'), fields['expr'], count, None)
 
-    def _next_token(self) -> None:
-        self._current_token = self._tokenizer.next_token()
 
-    def _begin_closure(self, closure: Closure) -> bool:
-        current = self._current_token
+def _read_cli_records(lines: Iterable[str], input_format: str, default_count: int, max_count: int,
+                      dedupe: bool) -> Iterator[_CliRecord]:
+    # Yields a record per non-blank line. With dedupe, lines that repeat an earlier expression and count are skipped.
 
-        if not current.type is closure.begin:
-            return False
+    seen = set()
 
-        self._next_token()
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
 
-        self._closure_stack.append((closure, current))
+        record = _read_cli_record(line_number, line, input_format, default_count, max_count)
 
-        return True
+        if dedupe and record.error is None:
+            key = (record.expression, record.count)
 
-    def _end_closure(self, expected_closure: Closure) -> bool:
-        current = self._current_token
+            if key in seen:
+                continue
 
-        if  not current.type is expected_closure.end:
-            return False
+            seen.add(key)
 
-        self._next_token()
+        yield record
 
-        try:
-            opened_closure = self._closure_stack.pop()
 
-            if opened_closure[0] != expected_closure:
-                raise OrphanClosureBeginError(opened_closure[0], opened_closure[1].line, opened_closure[1].column)
-        except IndexError:
-            # It seems that, if this one is ever raised, it'll be most likely an error in the parsing process.
-            raise OrphanClosureEndError(expected_closure, current.line, current.column)
+def _evaluate_cli_block(block_index: int, records: List[_CliRecord], seed: Any) -> List[str]:
+    # Evaluates a block of records, returning their results as JSON lines.
 
-        return True
+    rng = None if seed is None else Random(f'pydician.cli:{seed!r}:{block_index}')
+    output = []
 
-    def _handle_unexpected_token(self) -> None:
-        if self._current_token.type is TokenType.END:
-            self._check_orphan_closure_begin()
+    for record in records:
+        result = {'line': record.line}
 
-            raise EndOfStringError(self._current_token.line, self._current_token.column)
+        if record.id is not None:
+            result['id'] = record.id
 
-        self._check_incomplete_enclosed_expression()
+        result['expr'] = record.expression
 
-        raise UnexpectedTokenError(self._current_token)
+        if record.error is not None:
+            result['error'] = record.error
+        else:
+            try:
+                roll_tree = parse(record.expression)
 
-    def _check_orphan_closure_begin(self) -> None:
-        try:
-            orphan_closure = self._closure_stack.pop()
+                if record.count is None:
+                    result['result'] = roll_tree.run(rng)
+                else:
+                    result['results'] = list(roll_tree.stream(limit=record.count, rng=rng))
+            except Exception as error:
+                result['error'] = describe_error(error)
 
-            raise OrphanClosureBeginError(orphan_closure[0], orphan_closure[1].line, orphan_closure[1].column)
-        except IndexError:
-            pass
+        output.append(json.dumps(result))
 
-    def _check_incomplete_enclosed_expression(self) -> None:
-        ended_closure = next((c for c in Closure if c.end==self._current_token.type), None)
+    return output
 
-        if ended_closure is None:
-            return
 
-        try:
-            opened_closure = self._closure_stack.pop()
+def _evaluate_cli_records(records: Iterator[_CliRecord], seed: Any, workers: int) -> Iterator[str]:
+    # Yields the JSON lines of the records' results, in order. Only a few blocks are held in memory at once.
 
-            if opened_closure[0] is ended_closure:
-                raise IncompleteEnclosedExpressionError(opened_closure[0], opened_closure[1].line, opened_closure[1].column)
+    blocks = enumerate(iter(lambda: list(islice(records, _CLI_BLOCK_SIZE)), []))
 
-            self._closure_stack.append(opened_closure)
-        except IndexError:
-            pass
+    if workers == 1:
+        for block_index, block in blocks:
+            yield from _evaluate_cli_block(block_index, block, seed)
 
+        return
 
-def parse(input: str) -> Operation:
-    return Parser().parse(input)
+    with ProcessPoolExecutor(workers) as executor:
+        pending = []
 
+        for block_index, block in blocks:
+            pending.append(executor.submit(_evaluate_cli_block, block_index, block, seed))
 
-def roll(input: str) -> Any:
-    roll_tree = parse(input)
-    return roll_tree.run() if roll_tree else None
+            if len(pending) > 2 * workers:
+                yield from pending.pop(0).result()
+
+        for future in pending:
+            yield from future.result()
+
+
+def main(argv: List[str] = None, stdin: TextIO = None, stdout: TextIO = None) -> int:
+    """Evaluates roll expressions in bulk, from a file or the standard input, writing their results as JSON lines.
+
+    Each input line is either a plain expression or a JSON object with an "expr" string and, optionally, a "count"
+    and an "id". Each output line carries the input's line number, its id and expression, and either a "result", a
+    list of "results" (when a count is given), or an "error". Errors are reported per line, and parse errors include
+    their line and column within the expression.
+
+    Returns:
+        The exit status.
+    """
+
+    arg_parser = argparse.ArgumentParser(prog='python -m pydician',
+                                         description='Evaluates roll expressions, writing their results as JSON lines.')
+    arg_parser.add_argument('input', nargs='?', default='-', help='the input file (default: the standard input)')
+    arg_parser.add_argument('-o', '--output', default='-', help='the output file (default: the standard output)')
+    arg_parser.add_argument('-f', '--format', choices=('auto', 'text', 'jsonl'), default='auto',
+                            help='the input format; "auto" reads lines starting with "{" as JSON (default: auto)')
+    arg_parser.add_argument('-n', '--count', type=int, help='roll each expression this many times, by default')
+    arg_parser.add_argument('--max-count', type=int, default=1000000, help='the maximum count of a single line')
+    arg_parser.add_argument('-s', '--seed', help='seed the rolls, for reproducible results')
+    arg_parser.add_argument('-d', '--dedupe', action='store_true',
+                            help='skip lines that repeat an earlier expression and count')
+    arg_parser.add_argument('-j', '--workers', type=int, default=1,
+                            help='the number of worker processes; 0 means one per CPU (default: 1)')
+    args = arg_parser.parse_args(argv)
+
+    if args.count is not None and not 1 <= args.count <= args.max_count:
+        arg_parser.error(f'the count must be an integer from 1 to {args.max_count}')
+
+    workers = args.workers or os.cpu_count() or 1
+    input_file = (stdin or sys.stdin) if args.input == '-' else open(args.input, encoding='utf-8')
+    output_file = (stdout or sys.stdout) if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+
+    try:
+        records = _read_cli_records(input_file, args.format, args.count, args.max_count, args.dedupe)
+
+        for result in _evaluate_cli_records(records, args.seed, workers):
+            output_file.write(result + '\n')
+    finally:
+        if input_file is not (stdin or sys.stdin):
+            input_file.close()
+
+        if output_file is not (stdout or sys.stdout):
+            output_file.close()
+        else:
+            output_file.flush()
+
+    return 0
+
+
+if __name__ == '__main__':
+    # Runs the module as imported, so that worker processes can find its functions and classes.
+    import pydician
+    sys.exit(pydician.main())
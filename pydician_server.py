@@ -0,0 +1,453 @@
+"""A JSON-lines roll service built on Py-Dician.
+
+Clients connect through TCP or a Unix socket and send one JSON object per line:
+
+    {"id": 1, "op": "roll", "expression": "2d6 + 3"}
+    {"id": 2, "op": "roll", "expression": "1d20", "count": 10, "timeout": 0.5}
+    {"id": 3, "op": "parse", "expression": "4d6"}
+
+Each request is answered by a line carrying the same id and either a result or an error:
+
+    {"id": 1, "result": 11}
+    {"id": 2, "result": [3, 17, 8, 20, 1, 12, 9, 9, 14, 5]}
+    {"id": 3, "result": "DiceRollOp(LiteralValueOp(4), DieOp(LiteralValueOp(6)))"}
+    {"id": 4, "error": {"type": "UnknownSymbolError", "message": "...", "line": 1, "column": 5}}
+
+Responses may come back out of order. Concurrent roll requests for the same expression, from any connection, are
+coalesced into a single batched evaluation, and parsed trees are shared through a parse cache.
+
+Run it from the repository folder:
+
+    > python -m pydician_server --port 8765
+"""
+
+import argparse
+import asyncio
+import json
+from typing import Any, Dict, List, NamedTuple, Tuple
+import pydician
+
+
+class RollServiceError(pydician.PyDicianError):
+    """Exception thrown by the RollClient class when the server answers a request with an error.
+
+    Parameters:
+        type (str): the name of the error's type, as reported by the server.
+        message (str): the error's message.
+    """
+
+    def __init__(self, type: str, message: str):
+        super().__init__(f'{type}: {message}')
+        self.type = type
+        self.message = message
+
+
+class RequestError(pydician.PyDicianError):
+    """Exception thrown by the RollServer class when a request is malformed."""
+
+    pass
+
+
+class RollServerInfo(NamedTuple):
+    requests: int
+    batches: int
+    rolls: int
+    pending: int
+
+
+# Batches of at least this many rolls are evaluated through Operation.run_batch(), if NumPy is available.
+_VECTORIZED_BATCH_MINIMUM = 64
+
+
+class _Batch():
+    __slots__ = ('roll_tree', 'requests')
+
+    def __init__(self, roll_tree: pydician.Operation):
+        self.roll_tree = roll_tree
+        self.requests = []
+
+
+class RollServer():
+    """Class that serves parse and roll requests, as JSON lines, to any number of connections.
+
+    Roll requests for the same expression that arrive within batch_delay seconds of each other are evaluated as a
+    single batch. Batches are evaluated in the event loop's default executor, so that large ones don't hold up the
+    other connections. Each connection may have up to max_pending requests in flight; past that, the server stops reading
+    from it until some are answered. Each request is given up to timeout seconds, which it may shorten through its
+    own "timeout" field.
+
+    Parameters:
+        [optional] rng (RandomSource): the random source used for the rolls. The default-value is None (the
+                                       thread's default source).
+        [optional] batch_delay (float): how long, in seconds, a batch waits for more requests. The default-value
+                                        is 0, which still coalesces the requests that are already queued.
+        [optional] timeout (float): the maximum time, in seconds, given to a request. The default-value is 5.
+        [optional] max_count (int): the maximum number of rolls in a single request. The default-value is 100000.
+        [optional] max_pending (int): the maximum number of requests in flight per connection. The default-value
+                                      is 256.
+        [optional] max_line_length (int): the maximum length of a request line. The default-value is 65536.
+        [optional] parse_cache (ParseCache): the cache of parsed trees. The default-value is None (the module's
+                                             shared cache).
+    """
+
+    def __init__(self, rng: pydician.RandomSource = None, batch_delay: float = 0.0, timeout: float = 5.0,
+                 max_count: int = 100000, max_pending: int = 256, max_line_length: int = 65536,
+                 parse_cache: pydician.ParseCache = None):
+        self._rng = rng
+        self._batch_delay = batch_delay
+        self._timeout = timeout
+        self._max_count = max_count
+        self._max_pending = max_pending
+        self._max_line_length = max_line_length
+        self._parse_cache = parse_cache if parse_cache is not None else pydician.parse_cache
+        self._batches = {}
+        self._running_batches = set()
+        self._requests = 0
+        self._batches_run = 0
+        self._rolls = 0
+
+    async def start(self, host: str = None, port: int = None, path: str = None) -> asyncio.AbstractServer:
+        """Starts listening on a TCP address or, if a path is given, on a Unix socket.
+
+        Returns:
+            The asyncio server, already serving.
+        """
+
+        if path is not None:
+            return await asyncio.start_unix_server(self._handle_connection, path, limit=self._max_line_length)
+
+        return await asyncio.start_server(self._handle_connection, host, port, limit=self._max_line_length)
+
+    def info(self) -> RollServerInfo:
+        """Reports the requests answered, the batches and rolls evaluated, and the batches still pending."""
+
+        return RollServerInfo(self._requests, self._batches_run, self._rolls, len(self._batches))
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        in_flight = asyncio.Semaphore(self._max_pending)
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        def request_done(task: asyncio.Task) -> None:
+            tasks.discard(task)
+            in_flight.release()
+
+        try:
+            while True:
+                await in_flight.acquire()
+
+                try:
+                    line = await reader.readline()
+                except ValueError as error:
+                    # The line overran the limit, and there's no telling where the next one begins.
+                    await self._respond(writer, write_lock, {'id': None, 'error': pydician.describe_error(error)})
+                    break
+
+                if not line:
+                    break
+
+                task = asyncio.create_task(self._serve_line(line, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(request_done)
+
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+
+            writer.close()
+
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _serve_line(self, line: bytes, writer: asyncio.StreamWriter, write_lock: asyncio.Lock) -> None:
+        request_id = None
+
+        try:
+            request = json.loads(line)
+
+            if not isinstance(request, dict):
+                raise RequestError('a request must be a JSON object')
+
+            request_id = request.get('id')
+            timeout = self._request_timeout(request)
+            response = {'id': request_id, 'result': await asyncio.wait_for(self._serve(request), timeout)}
+        except asyncio.TimeoutError:
+            response = {'id': request_id, 'error': {'type': 'TimeoutError', 'message': 'the request timed out'}}
+        except Exception as error:
+            response = {'id': request_id, 'error': pydician.describe_error(error)}
+
+        self._requests += 1
+        await self._respond(writer, write_lock, response)
+
+    async def _respond(self, writer: asyncio.StreamWriter, write_lock: asyncio.Lock, response: Dict) -> None:
+        async with write_lock:
+            writer.write(json.dumps(response).encode() + b'\n')
+            # Waits for slow readers, so that responses don't pile up in memory.
+            await writer.drain()
+
+    def _request_timeout(self, request: Dict) -> float:
+        timeout = request.get('timeout')
+
+        if timeout is None:
+            return self._timeout
+
+        if type(timeout) not in (int, float) or timeout <= 0:
+            raise RequestError('the timeout must be a positive number')
+
+        return min(timeout, self._timeout)
+
+    async def _serve(self, request: Dict) -> Any:
+        op = request.get('op', 'roll')
+        expression = request.get('expression')
+
+        if not isinstance(expression, str):
+            raise RequestError('the expression must be a string')
+
+        if op == 'parse':
+            return repr(self._parse(expression))
+
+        if op != 'roll':
+            raise RequestError(f'unknown operation: {op!r}')
+
+        count = request.get('count')
+
+        if count is None:
+            return (await self._roll(expression, 1))[0]
+
+        if type(count) is not int or not 1 <= count <= self._max_count:
+            raise RequestError(f'the count must be an integer from 1 to {self._max_count}')
+
+        return await self._roll(expression, count)
+
+    async def _roll(self, expression: str, count: int) -> List[Any]:
+        loop = asyncio.get_running_loop()
+        batch = self._batches.get(expression)
+
+        if batch is None:
+            batch = self._batches[expression] = _Batch(self._parse(expression))
+            loop.call_later(self._batch_delay, self._run_batch, expression)
+
+        future = loop.create_future()
+        batch.requests.append((future, count))
+        return await future
+
+    def _parse(self, expression: str) -> pydician.Operation:
+        roll_tree = self._parse_cache.parse(expression, False)
+
+        if roll_tree is None:
+            raise RequestError('the expression is empty')
+
+        return roll_tree
+
+    def _run_batch(self, expression: str) -> None:
+        batch = self._batches.pop(expression)
+        # Requests that timed out in the meantime are left out.
+        requests = [(future, count) for future, count in batch.requests if not future.done()]
+
+        if not requests:
+            return
+
+        self._batches_run += 1
+        self._rolls += sum(count for _, count in requests)
+
+        # The task is kept referenced until it's done, as the event loop only keeps weak references to its tasks.
+        task = asyncio.create_task(self._settle_batch(batch.roll_tree, requests))
+        self._running_batches.add(task)
+        task.add_done_callback(self._running_batches.discard)
+
+    async def _settle_batch(self, roll_tree: pydician.Operation, requests: List[Tuple[asyncio.Future, int]]) -> None:
+        counts = [count for _, count in requests]
+        results = await asyncio.get_running_loop().run_in_executor(None, self._evaluate_batch, roll_tree, counts)
+
+        for (future, _), result in zip(requests, results):
+            # Requests may have timed out while their batch was being evaluated.
+            if future.done():
+                continue
+
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def _evaluate_batch(self, roll_tree: pydician.Operation, counts: List[int]) -> List[Any]:
+        # Returns the rolls of each request of a batch or, for the requests whose rolls failed, their error.
+
+        try:
+            rolls = self._evaluate(roll_tree, sum(counts))
+        except Exception:
+            # A single failed roll (e.g., a division by zero) shouldn't fail every request in the batch.
+            results = []
+
+            for count in counts:
+                try:
+                    results.append(self._evaluate(roll_tree, count))
+                except Exception as error:
+                    results.append(error)
+
+            return results
+
+        results = []
+        start = 0
+
+        for count in counts:
+            results.append(rolls[start:start + count])
+            start += count
+
+        return results
+
+    def _evaluate(self, roll_tree: pydician.Operation, total: int) -> List[Any]:
+        if pydician.numpy is not None and total >= _VECTORIZED_BATCH_MINIMUM:
+            try:
+                return roll_tree.run_batch(total, self._rng).tolist()
+            except OverflowError:
+                # Results out of the range of NumPy's 64-bit integers are rolled exactly, one by one.
+                pass
+
+        compiled = roll_tree.compile()
+        return [compiled(self._rng) for _ in range(total)]
+
+
+class RollClient():
+    """Class that sends requests to a RollServer through a single connection.
+
+    Requests may be sent concurrently; each is matched to its response by id. Use RollClient.connect() to create
+    instances.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._next_id = 0
+        self._pending = {}
+        self._listener = asyncio.create_task(self._listen())
+
+    @classmethod
+    async def connect(cls, host: str = None, port: int = None, path: str = None) -> 'RollClient':
+        """Connects to a server on a TCP address or, if a path is given, on a Unix socket."""
+
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+
+        return cls(reader, writer)
+
+    async def roll(self, expression: str, count: int = None, timeout: float = None) -> Any:
+        """Rolls an expression once or, if a count is given, count times.
+
+        Raises:
+            RollServiceError if the server answers with an error.
+        """
+
+        request = {'op': 'roll', 'expression': expression}
+
+        if count is not None:
+            request['count'] = count
+
+        if timeout is not None:
+            request['timeout'] = timeout
+
+        return await self.request(request)
+
+    async def parse(self, expression: str) -> str:
+        """Parses an expression, returning the representation of its tree.
+
+        Raises:
+            RollServiceError if the server answers with an error.
+        """
+
+        return await self.request({'op': 'parse', 'expression': expression})
+
+    async def request(self, request: Dict) -> Any:
+        """Sends a raw request, returning its result. The request's id is assigned by the client.
+
+        Raises:
+            RollServiceError if the server answers with an error.
+        """
+
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+
+        try:
+            self._writer.write(json.dumps(dict(request, id=request_id)).encode() + b'\n')
+            await self._writer.drain()
+            return await future
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def close(self) -> None:
+        """Closes the connection, failing any request still waiting for its response."""
+
+        self._writer.close()
+
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+
+        await self._listener
+
+    async def __aenter__(self) -> 'RollClient':
+        return self
+
+    async def __aexit__(self, *exc_info: Tuple) -> None:
+        await self.close()
+
+    async def _listen(self) -> None:
+        try:
+            async for line in self._reader:
+                response = json.loads(line)
+                future = self._pending.get(response.get('id'))
+
+                if future is None or future.done():
+                    continue
+
+                if 'error' in response:
+                    error = response['error']
+                    future.set_exception(RollServiceError(error['type'], error['message']))
+                else:
+                    future.set_result(response['result'])
+        except ConnectionError:
+            pass
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError('the connection was closed'))
+
+
+async def serve(host: str = None, port: int = None, path: str = None, **options: Any) -> None:
+    """Serves rolls until cancelled. The options are passed on to RollServer."""
+
+    server = await RollServer(**options).start(host, port, path)
+
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(prog='pydician_server', description='Serves dice rolls as JSON lines.')
+    arg_parser.add_argument('--host', default='127.0.0.1', help='the address to listen on')
+    arg_parser.add_argument('--port', type=int, default=8765, help='the port to listen on')
+    arg_parser.add_argument('--unix', metavar='PATH', help='listen on a Unix socket instead')
+    arg_parser.add_argument('--batch-delay', type=float, default=0.0, help='seconds a batch waits for requests')
+    arg_parser.add_argument('--timeout', type=float, default=5.0, help='maximum seconds per request')
+    arg_parser.add_argument('--max-pending', type=int, default=256, help='maximum requests in flight per connection')
+    args = arg_parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, batch_delay=args.batch_delay, timeout=args.timeout,
+                          max_pending=args.max_pending))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
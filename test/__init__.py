@@ -14,8 +14,52 @@ from .test_operations import (
         TestEqualOp,
         TestSmallerOrEqualOp,
         TestGreaterOrEqualOp,
-        TestNotEqualOp
+        TestNotEqualOp,
+        TestSlots
     )
+from .test_distribution import (
+        TestLiteralValueOpDistribution,
+        TestDiceRollOpDistribution,
+        TestDiceDistributionKernel,
+        TestArithmeticOpDistribution,
+        TestBinaryLogicalComparisonOpDistribution
+    )
+from .test_batch import TestRunBatch
+from .test_compile import TestCompile
+from .test_optimize import TestOptimize
+from .test_parse_cache import TestParseCache
+from .test_tokenizer import TestTokenizeAll
+from .test_rng import (
+        TestRandomSources,
+        TestDefaultRandomSource
+    )
+from .test_large_pools import TestLargePools
+from .test_simulate import TestSimulate
+from .test_server import TestRollServer
+from .test_stream import TestStream
+from .test_cli import TestCommandLine
+from .test_parser import (
+        TestParser,
+        TestParseMany
+    )
+from .test_program import TestProgram
+from .test_store import (
+        TestSerializeTree,
+        TestExpressionStore
+    )
+from .test_profile import (
+        TestSourceSpans,
+        TestProfiler
+    )
+from .test_stats import TestStats
+from .test_cumulative import TestCumulativeDistribution
+from .test_canonical import (
+        TestStructuralEquality,
+        TestCanonicalForm,
+        TestCanonicalParser
+    )
+from .test_threads import TestThreadSafety
+from .test_trace import TestRollTrace
 
 __all__ = [
         'TestOperation',
@@ -33,5 +77,37 @@ __all__ = [
         'TestEqualOp',
         'TestSmallerOrEqualOp',
         'TestGreaterOrEqualOp',
-        'TestNotEqualOp'
+        'TestNotEqualOp',
+        'TestSlots',
+        'TestLiteralValueOpDistribution',
+        'TestDiceRollOpDistribution',
+        'TestDiceDistributionKernel',
+        'TestArithmeticOpDistribution',
+        'TestBinaryLogicalComparisonOpDistribution',
+        'TestRunBatch',
+        'TestCompile',
+        'TestOptimize',
+        'TestParseCache',
+        'TestTokenizeAll',
+        'TestRandomSources',
+        'TestDefaultRandomSource',
+        'TestLargePools',
+        'TestSimulate',
+        'TestRollServer',
+        'TestStream',
+        'TestCommandLine',
+        'TestSourceSpans',
+        'TestProfiler',
+        'TestParser',
+        'TestParseMany',
+        'TestProgram',
+        'TestSerializeTree',
+        'TestExpressionStore',
+        'TestStats',
+        'TestCumulativeDistribution',
+        'TestStructuralEquality',
+        'TestCanonicalForm',
+        'TestCanonicalParser',
+        'TestThreadSafety',
+        'TestRollTrace'
     ]
@@ -0,0 +1,66 @@
+import unittest
+import pydician
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class TestRunBatch(unittest.TestCase):
+    _N = 10000
+
+    def test_literal(self):
+        results = pydician.parse('7').run_batch(self._N)
+        self.assertEqual(results.shape, (self._N, ))
+        self.assertTrue(numpy.all(results == 7))
+
+    def test_dice_roll_range(self):
+        results = pydician.parse('3d6').run_batch(self._N)
+        self.assertEqual(results.dtype.kind, 'i')
+        self.assertEqual(results.min(), 3)
+        self.assertEqual(results.max(), 18)
+        self.assertAlmostEqual(results.mean(), 10.5, delta=0.2)
+
+    def test_random_dice_count_and_maximum(self):
+        results = pydician.parse('(1d4)d(1d6)').run_batch(self._N)
+        self.assertEqual(results.min(), 1)
+        self.assertLessEqual(results.max(), 24)
+
+    def test_no_dice(self):
+        results = pydician.parse('(1d2-2)d0').run_batch(self._N)
+        self.assertTrue(numpy.all(results == 0))
+
+    def test_arithmetic(self):
+        results = pydician.parse('-1d6 * 2 + 10').run_batch(self._N)
+        self.assertEqual(set(results.tolist()), {-2, 0, 2, 4, 6, 8})
+
+    def test_division_produces_floats(self):
+        results = pydician.parse('1d2 / 2').run_batch(self._N)
+        self.assertEqual(results.dtype.kind, 'f')
+        self.assertEqual(set(results.tolist()), {0.5, 1.0})
+
+    def test_division_by_zero(self):
+        with self.assertRaises(ZeroDivisionError):
+            pydician.parse('1 / (1d2 - 1)').run_batch(self._N)
+
+    def test_comparison(self):
+        results = pydician.parse('1d6 >= 4').run_batch(self._N)
+        self.assertEqual(set(results.tolist()), {0, 1})
+        self.assertAlmostEqual(results.mean(), 0.5, delta=0.05)
+
+    def test_out_of_range_values(self):
+        for expression in ('3d6 * 4000000000000000000', '1000d1000000000000000000', '10000000000000000000 + 1',
+                           '-9223372036854775807 - 1d2', '(1d2)d(9223372036854775807 / 2)'):
+            with self.subTest(expression=expression):
+                with self.assertRaises(OverflowError):
+                    pydician.parse(expression).run_batch(self._N)
+
+    def test_values_near_the_bounds(self):
+        results = pydician.parse('9223372036854775807 - 1d2 + 1').run_batch(self._N)
+        self.assertEqual(results.dtype, numpy.int64)
+        self.assertEqual(set(results.tolist()), {9223372036854775806, 9223372036854775807})
+
+        results = pydician.parse('-1d6 * 1537228672809129301').run_batch(self._N)
+        self.assertEqual(results.min(), -9223372036854775806)
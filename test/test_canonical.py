@@ -0,0 +1,132 @@
+import random
+import unittest
+import pydician
+
+
+class TestStructuralEquality(unittest.TestCase):
+    def test_equal_trees(self):
+        for left, right in [('1d6 + 2', '1D6+2'), ('-(1d4)d6 * 3', '- ( 1d4 ) D6 * 3'), ('d6 <> 3', 'D6<>3')]:
+            with self.subTest(left=left, right=right):
+                self.assertEqual(pydician.parse(left), pydician.parse(right))
+                self.assertEqual(hash(pydician.parse(left)), hash(pydician.parse(right)))
+
+    def test_different_trees(self):
+        for left, right in [('1d6 + 2', '2 + 1d6'), ('1d6 + 2', '1d6 + 3'), ('1d6 + 2', '1d6 - 2'),
+                            ('1d6', 'd6'), ('1d6 < 2', '2 > 1d6')]:
+            with self.subTest(left=left, right=right):
+                self.assertNotEqual(pydician.parse(left), pydician.parse(right))
+
+    def test_literal_types(self):
+        self.assertNotEqual(pydician.LiteralValueOp(1), pydician.LiteralValueOp(1.0))
+        self.assertNotEqual(pydician.LiteralValueOp(1), pydician.LiteralValueOp(True))
+        self.assertEqual(pydician.LiteralValueOp(1.5), pydician.LiteralValueOp(1.5))
+
+    def test_optimized_trees(self):
+        self.assertEqual(pydician.parse('3d6 + 1', optimize=True), pydician.parse('3D6+1', optimize=True))
+        self.assertEqual(pydician.parse('3d6', optimize=True), pydician.FixedDiceRollOp(3, 6))
+        self.assertNotEqual(pydician.parse('3d6', optimize=True), pydician.parse('3d6'))
+
+    def test_ignores_spans(self):
+        self.assertEqual(pydician.parse('1d6+2'), pydician.SumOp(pydician.DiceRollOp(pydician.LiteralValueOp(1),
+                         pydician.DieOp(pydician.LiteralValueOp(6))), pydician.LiteralValueOp(2)))
+
+    def test_not_equal_to_other_types(self):
+        self.assertNotEqual(pydician.parse('2'), 2)
+        self.assertNotEqual(pydician.parse('1d6'), '1d6')
+
+    def test_dict_keys(self):
+        stats = {pydician.parse('1d6 + 2'): 'stats'}
+        self.assertEqual(stats.get(pydician.parse('1D6 + 2')), 'stats')
+
+    def test_deep_trees(self):
+        expression = '(' * 25000 + '1d6' + ' + 1)' * 25000
+        self.assertEqual(pydician.parse(expression), pydician.parse(expression))
+        self.assertNotEqual(pydician.parse(expression), pydician.parse(expression.replace('1d6', '1d8')))
+
+
+class TestCanonicalForm(unittest.TestCase):
+    def test_commutative_operands(self):
+        for spellings in [('1d6 + 2', '2+1D6', '2 + 1d6'), ('3 * 1d4', '1d4 * 3'), ('1d6 = 1d8', '1d8 = 1d6'),
+                          ('2 <> 1d20', '1d20 <> 2'), ('(1d4 + 1d6) * 2', '2 * (1d6 + 1d4)')]:
+            with self.subTest(spellings=spellings):
+                canonical_forms = {pydician.parse(spelling).canonical() for spelling in spellings}
+                self.assertEqual(len(canonical_forms), 1)
+
+    def test_literals_go_last(self):
+        self.assertEqual(pydician.parse('2 + 1d6').canonical(), pydician.parse('1d6 + 2'))
+
+    def test_non_commutative_operands(self):
+        for left, right in [('1d6 - 2', '2 - 1d6'), ('1d6 / 2', '2 / 1d6'), ('1d6 < 2', '2 < 1d6'),
+                            ('(2)d6', '(6)d2')]:
+            with self.subTest(left=left, right=right):
+                self.assertNotEqual(pydician.parse(left).canonical(), pydician.parse(right).canonical())
+
+    def test_same_distribution(self):
+        for expression in ('2 + 1d6 * (1d4 = 3)', '3 * -1d4 + 1d8 <> 2 + 1d6'):
+            with self.subTest(expression=expression):
+                op = pydician.parse(expression)
+                self.assertEqual(op.canonical().distribution(), op.distribution())
+
+    def test_reuses_canonical_trees(self):
+        op = pydician.parse('1d6 + 2')
+        self.assertIs(op.canonical(), op)
+
+    def test_shares_identical_subtrees(self):
+        op = pydician.parse('(1d6 + 2) * (2 + 1d6)').canonical()
+        self.assertIs(op._left_operand, op._right_operand)
+
+    def test_keeps_spans(self):
+        op = pydician.Parser(spans=True).parse('2 + 1d6').canonical()
+        self.assertEqual(op.span, pydician.SourceSpan(1, 1, 1, 8))
+        self.assertEqual(op._left_operand.span, pydician.SourceSpan(1, 5, 1, 8))
+
+    def test_still_runs(self):
+        op = pydician.parse('2 + 3d6').canonical()
+        self.assertTrue(5 <= op.run(random.Random(1)) <= 20)
+
+
+class TestCanonicalParser(unittest.TestCase):
+    def test_shares_trees(self):
+        parser = pydician.Parser(canonical=True)
+        trees = [parser.parse(spelling) for spelling in ('1d6 + 2', '2+1D6', '2 + 1d6')]
+        self.assertIs(trees[0], trees[1])
+        self.assertIs(trees[0], trees[2])
+
+    def test_shares_subtrees_across_strings(self):
+        parser = pydician.Parser(canonical=True)
+        first = parser.parse('1d6 + 2')
+        second = parser.parse('3 * (2 + 1d6)')
+        self.assertIs(second._left_operand, first)
+
+    def test_optimized_trees(self):
+        parser = pydician.Parser(canonical=True)
+        self.assertIs(parser.parse('3d6 + 2', optimize=True), parser.parse('2 + 3D6', optimize=True))
+
+    def test_shared_subtrees_are_bounded(self):
+        parser = pydician.Parser(canonical=True)
+        parser._canonical_maxsize = 8
+        first = parser.parse('1d6 + 2')
+
+        for value in range(8):
+            parser.parse(str(value))
+
+        self.assertEqual(len(parser._canonical_nodes), 8)
+        self.assertIsNot(parser.parse('2 + 1d6'), first)
+
+    def test_recently_used_subtrees_are_kept(self):
+        parser = pydician.Parser(canonical=True)
+        parser._canonical_maxsize = 8
+        first = parser.parse('1d6 + 2')
+
+        for value in range(20):
+            parser.parse(str(value))
+            parser.parse('1d6 + 2')
+
+        self.assertIs(parser.parse('2 + 1d6'), first)
+
+    def test_default_parser_does_not_share(self):
+        parser = pydician.Parser()
+        self.assertIsNot(parser.parse('1d6 + 2'), parser.parse('1d6 + 2'))
+
+    def test_empty_input(self):
+        self.assertIsNone(pydician.Parser(canonical=True).parse(''))
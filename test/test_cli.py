@@ -0,0 +1,67 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+import pydician
+
+
+class TestCommandLine(unittest.TestCase):
+    def _run(self, input_text, *args):
+        stdout = io.StringIO()
+        self.assertEqual(pydician.main(list(args), stdin=io.StringIO(input_text), stdout=stdout), 0)
+        return [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+    def test_plain_lines(self):
+        results = self._run('2d6 + 3\n\n4\n')
+        self.assertEqual([r['line'] for r in results], [1, 3])
+        self.assertIn(results[0]['result'], range(5, 16))
+        self.assertEqual(results[1], {'line': 3, 'expr': '4', 'result': 4})
+
+    def test_json_lines(self):
+        results = self._run('{"expr": "1d6", "count": 4, "id": "a"}\n{"expr": "2"}\n')
+        self.assertEqual(results[0]['id'], 'a')
+        self.assertEqual(len(results[0]['results']), 4)
+        self.assertEqual(results[1]['result'], 2)
+
+    def test_default_count(self):
+        results = self._run('3\n{"expr": "2", "count": 2}\n', '--count', '3')
+        self.assertEqual([r['results'] for r in results], [[3, 3, 3], [2, 2]])
+
+    def test_errors_are_reported_per_line(self):
+        results = self._run('(1d6\n1d6 $\n2d6 +\n6 / 0\n{"expr": 5}\n{"expr": " "}\n{"expr": "1", "count": 0}\n1\n')
+        errors = [r.get('error', {}).get('type') for r in results]
+        self.assertEqual(errors, ['OrphanClosureBeginError', 'UnknownSymbolError', 'EndOfStringError',
+                                  'ZeroDivisionError', 'InvalidInputError', 'InvalidInputError', 'InvalidInputError',
+                                  None])
+        self.assertEqual((results[1]['error']['line'], results[1]['error']['column']), (1, 5))
+
+    def test_text_format_does_not_read_json(self):
+        results = self._run('{"expr": "1"}\n', '--format', 'text')
+        self.assertIn('error', results[0])
+
+    def test_dedupe(self):
+        results = self._run('1d6\n2\n1d6\n{"expr": "1d6", "count": 2}\n2\n', '--dedupe')
+        self.assertEqual([r['line'] for r in results], [1, 2, 4])
+
+    def test_seeded_results_do_not_depend_on_worker_count(self):
+        input_text = '(1d4)d6 + 3d8 * 2 - 1d100\n' * 2500
+        expected = self._run(input_text, '--seed', '42')
+        self.assertEqual(self._run(input_text, '--seed', '42', '--workers', '2'), expected)
+        self.assertNotEqual(self._run(input_text, '--seed', '43'), expected)
+
+    def test_files(self):
+        folder = tempfile.mkdtemp()
+        input_path, output_path = os.path.join(folder, 'in.txt'), os.path.join(folder, 'out.jsonl')
+
+        with open(input_path, 'w') as input_file:
+            input_file.write('1\n2\n')
+
+        self.assertEqual(pydician.main([input_path, '-o', output_path]), 0)
+
+        with open(output_path) as output_file:
+            self.assertEqual([json.loads(line)['result'] for line in output_file], [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import pydician
+
+
+class TestCompile(unittest.TestCase):
+    _RUNS = 2000
+
+    def _assert_outcomes(self, expression, expected_outcomes):
+        compiled = pydician.compile(expression)
+        outcomes = set(compiled() for _ in range(self._RUNS))
+        self.assertEqual(outcomes, set(expected_outcomes))
+
+    def test_returns_callable(self):
+        self.assertTrue(callable(pydician.parse('1d20 + 5').compile()))
+
+    def test_deterministic_expressions_match_run(self):
+        for expression in ['1 + 2 * 3', '-(2 * 3) / 4', '(1 + 1) = 2', '7 - 9 <> 2', '10 / 4']:
+            op = pydician.parse(expression)
+            result = op.compile()()
+            self.assertEqual(result, op.run())
+            self.assertEqual(type(result), type(op.run()))
+
+    def test_dice_roll_outcomes(self):
+        self._assert_outcomes('1d20 + 5', range(6, 26))
+        self._assert_outcomes('2d4', range(2, 9))
+        self._assert_outcomes('d6 * 2', range(2, 13, 2))
+
+    def test_random_dice_count_and_maximum(self):
+        self._assert_outcomes('(1d2)d(1d2)', range(1, 5))
+
+    def test_no_dice(self):
+        self._assert_outcomes('0d6', [0])
+        self._assert_outcomes('(1d2 - 2)d0', [0])
+
+    def test_comparison_outcomes(self):
+        self._assert_outcomes('1d6 >= 4', [0, 1])
+
+    def test_invalid_die(self):
+        with self.assertRaises(ValueError):
+            pydician.compile('1d0')()
+
+    def test_division_by_zero(self):
+        compiled = pydician.compile('1 / (1d2 - 1d2)')
+        with self.assertRaises(ZeroDivisionError):
+            for _ in range(self._RUNS):
+                compiled()
+
+    def test_operation_without_specialization(self):
+        class ConstantOp(pydician.Operation):
+            def run(self, rng=None):
+                return 3
+
+        op = pydician.SumOp(ConstantOp(), pydician.LiteralValueOp(1))
+        self.assertEqual(op.compile()(), 4)
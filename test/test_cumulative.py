@@ -0,0 +1,72 @@
+import unittest
+from fractions import Fraction
+import pydician
+
+
+class TestCumulativeDistribution(unittest.TestCase):
+    _EXPRESSIONS = [
+            '7',
+            '2d6 + 3',
+            '(1d4)d6 - 1d8',
+            '1d6 * -1d4',
+            '1d10 / 4',
+            '2d6 >= 8'
+        ]
+
+    def _probability(self, distribution, predicate):
+        return sum((probability for value, probability in distribution.items() if predicate(value)), Fraction(0))
+
+    def test_matches_distribution(self):
+        for expression in self._EXPRESSIONS:
+            with self.subTest(expression=expression):
+                op = pydician.parse(expression)
+                distribution = op.distribution()
+                cumulative = op.cumulative_distribution()
+                values = list(distribution)
+                targets = values + [min(values) - 1, max(values) + 1] + [v + Fraction(1, 2) for v in values]
+
+                for x in targets:
+                    self.assertEqual(cumulative.at_most(x), self._probability(distribution, lambda v: v <= x))
+                    self.assertEqual(cumulative.less_than(x), self._probability(distribution, lambda v: v < x))
+                    self.assertEqual(cumulative.at_least(x), self._probability(distribution, lambda v: v >= x))
+                    self.assertEqual(cumulative.greater_than(x), self._probability(distribution, lambda v: v > x))
+
+                for a in targets:
+                    for b in targets:
+                        self.assertEqual(cumulative.between(a, b),
+                                         self._probability(distribution, lambda v: a <= v <= b))
+
+    def test_values_and_probabilities(self):
+        cumulative = pydician.parse('1d4 + 1d4').cumulative_distribution()
+        self.assertEqual(cumulative.values, (2, 3, 4, 5, 6, 7, 8))
+        self.assertEqual(cumulative.probabilities, [Fraction(n, 16) for n in (1, 2, 3, 4, 3, 2, 1)])
+        self.assertEqual(len(cumulative), 7)
+
+    def test_quantile(self):
+        cumulative = pydician.parse('2d6 + 3').cumulative_distribution()
+        self.assertEqual(cumulative.quantile(0), 5)
+        self.assertEqual(cumulative.quantile(Fraction(1, 36)), 5)
+        self.assertEqual(cumulative.quantile(Fraction(2, 36)), 6)
+        self.assertEqual(cumulative.quantile(0.5), 10)
+        self.assertEqual(cumulative.quantile(1), 15)
+
+        for p in (-0.1, 1.5):
+            with self.assertRaises(ValueError):
+                cumulative.quantile(p)
+
+    def test_quantile_is_inverse_of_at_most(self):
+        cumulative = pydician.parse('(1d4)d6').cumulative_distribution()
+
+        for n in range(101):
+            p = Fraction(n, 100)
+            x = cumulative.quantile(p)
+            self.assertGreaterEqual(cumulative.at_most(x), p)
+            self.assertTrue(x == cumulative.values[0] or cumulative.less_than(x) < p)
+
+    def test_from_distribution(self):
+        cumulative = pydician.CumulativeDistribution({3: Fraction(1, 2), 1: Fraction(1, 2)})
+        self.assertEqual(cumulative.values, (1, 3))
+        self.assertEqual(cumulative.at_most(2), Fraction(1, 2))
+
+        with self.assertRaises(ValueError):
+            pydician.CumulativeDistribution({1: Fraction(1, 2), 'a': Fraction(1, 2)})
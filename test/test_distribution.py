@@ -0,0 +1,151 @@
+import itertools
+import sys
+import unittest
+from fractions import Fraction
+import pydician
+
+
+def _enumerate_dice_sums(dice_count, die_maximum):
+    # Brute-force distribution of the sum of a few dice.
+    result = {}
+    for faces in itertools.product(range(1, die_maximum+1), repeat=dice_count):
+        result[sum(faces)] = result.get(sum(faces), 0) + Fraction(1, die_maximum**dice_count)
+    return result
+
+
+class TestLiteralValueOpDistribution(unittest.TestCase):
+    def test_is_certain(self):
+        self.assertEqual(pydician.LiteralValueOp(5).distribution(), {5: 1})
+
+
+class TestDiceRollOpDistribution(unittest.TestCase):
+    def test_matches_enumeration(self):
+        for dice_count, die_maximum in [(1, 6), (2, 6), (3, 4), (4, 3)]:
+            op = pydician.parse(f'{dice_count}d{die_maximum}')
+            self.assertEqual(op.distribution(), _enumerate_dice_sums(dice_count, die_maximum))
+
+    def test_no_dice(self):
+        self.assertEqual(pydician.parse('0d6').distribution(), {0: 1})
+
+    def test_random_dice_count(self):
+        expected = {}
+        for dice_count in range(1, 5):
+            for value, probability in _enumerate_dice_sums(dice_count, 6).items():
+                expected[value] = expected.get(value, 0) + probability/4
+        self.assertEqual(pydician.parse('(1d4)d6').distribution(), expected)
+
+    def test_random_die_maximum(self):
+        expected = {}
+        for die_maximum in range(1, 5):
+            for value, probability in _enumerate_dice_sums(2, die_maximum).items():
+                expected[value] = expected.get(value, 0) + probability/4
+        self.assertEqual(pydician.parse('2d(1d4)').distribution(), expected)
+
+    def test_sums_to_one(self):
+        self.assertEqual(sum(pydician.parse('(1d3)d(1d6+2)').distribution().values()), 1)
+
+
+def _convolve_dice_sums(dice_count, die_maximum):
+    # Counts of each sum of the dice, by convolving one die at a time.
+    counts = {0: 1}
+    for _ in range(dice_count):
+        next_counts = {}
+        for value, count in counts.items():
+            for face in range(1, die_maximum+1):
+                next_counts[value+face] = next_counts.get(value+face, 0) + count
+        counts = next_counts
+    return counts
+
+
+class TestDiceDistributionKernel(unittest.TestCase):
+    def test_matches_convolution(self):
+        for dice_count in range(1, 13):
+            for die_maximum in range(1, 13):
+                with self.subTest(dice_count=dice_count, die_maximum=die_maximum):
+                    expected = _convolve_dice_sums(dice_count, die_maximum)
+                    self.assertEqual(pydician._dice_sum_counts(dice_count, die_maximum), list(expected.values()))
+
+    def test_large_pools(self):
+        for dice_count, die_maximum in [(64, 6), (100, 20), (30, 100)]:
+            with self.subTest(dice_count=dice_count, die_maximum=die_maximum):
+                expected = _convolve_dice_sums(dice_count, die_maximum)
+                total = die_maximum**dice_count
+                distribution = pydician.parse(f'{dice_count}d{die_maximum}').distribution()
+                self.assertEqual(distribution, {value: Fraction(count, total) for value, count in expected.items()})
+
+    def test_cache_shares_counts(self):
+        cache = pydician._DiceSumCountsCache(1 << 20)
+        counts = cache.get(10, 6)
+        self.assertIs(cache.get(10, 6), counts)
+        self.assertEqual(sum(counts), 6 ** 10)
+
+    def test_cache_size_is_memory_use(self):
+        cache = pydician._DiceSumCountsCache(1 << 20)
+        counts = cache.get(300, 10)
+        halves = counts[:len(counts) // 2 + 1]
+        self.assertEqual(cache._size, sys.getsizeof(counts) + sum(sys.getsizeof(count) for count in halves))
+        # The second half of the counts are the very same integers as the first half.
+        self.assertTrue(all(counts[i] is counts[-1 - i] for i in range(len(counts))))
+
+    def test_large_pools_are_cached(self):
+        pydician._dice_sum_counts_cache.clear()
+        pydician.parse('1000d100').distribution()
+        self.assertIn((1000, 100), pydician._dice_sum_counts_cache._counts)
+
+    def test_reduced_probabilities(self):
+        for dice_count, die_maximum in [(7, 12), (13, 30), (40, 8), (300, 10), (3, 1), (2, 1000003)]:
+            with self.subTest(dice_count=dice_count, die_maximum=die_maximum):
+                total = die_maximum ** dice_count
+                counts = pydician._dice_sum_counts(dice_count, die_maximum)
+                distribution = pydician._dice_roll_distribution(dice_count, die_maximum)
+                self.assertEqual([probability.as_integer_ratio() for probability in distribution.values()],
+                                 [Fraction(count, total).as_integer_ratio() for count in counts])
+
+    def test_cache_evicts_least_recently_used(self):
+        cache = pydician._DiceSumCountsCache(1 << 20)
+        cache.get(1, 6)
+        cache.get(1, 8)
+        cache._maxsize = cache._size
+        cache.get(1, 6)
+        cache.get(1, 7)
+        self.assertEqual(list(cache._counts), [(1, 6), (1, 7)])
+        self.assertLessEqual(cache._size, cache._maxsize)
+
+    def test_cache_skips_oversized_counts(self):
+        cache = pydician._DiceSumCountsCache(0)
+        counts = cache.get(10, 6)
+        self.assertIsNot(cache.get(10, 6), counts)
+        self.assertEqual(cache._size, 0)
+
+    def test_operations_do_not_modify_cached_distributions(self):
+        op = pydician.parse('10d6')
+        op.distribution()[10] = 0
+        self.assertEqual(op.distribution(), pydician._dice_roll_distribution(10, 6))
+        self.assertEqual(sum(op.distribution().values()), 1)
+
+
+class TestArithmeticOpDistribution(unittest.TestCase):
+    def test_subtraction(self):
+        distribution = pydician.parse('1d6 - 1d6').distribution()
+        self.assertEqual(list(distribution), list(range(-5, 6)))
+        self.assertEqual(distribution[0], Fraction(1, 6))
+        self.assertEqual(distribution[5], Fraction(1, 36))
+
+    def test_negate(self):
+        self.assertEqual(pydician.parse('-1d4').distribution(), {-4: Fraction(1, 4), -3: Fraction(1, 4),
+                                                                 -2: Fraction(1, 4), -1: Fraction(1, 4)})
+
+    def test_division_produces_floats(self):
+        self.assertEqual(pydician.parse('1d2 / 2').distribution(), {0.5: Fraction(1, 2), 1.0: Fraction(1, 2)})
+
+    def test_division_by_zero(self):
+        with self.assertRaises(ZeroDivisionError):
+            pydician.parse('1 / (1d2 - 1)').distribution()
+
+
+class TestBinaryLogicalComparisonOpDistribution(unittest.TestCase):
+    def test_greater_or_equal(self):
+        self.assertEqual(pydician.parse('2d6 >= 10').distribution(), {0: Fraction(5, 6), 1: Fraction(1, 6)})
+
+    def test_equal(self):
+        self.assertEqual(pydician.parse('1d6 = 1d6').distribution(), {0: Fraction(5, 6), 1: Fraction(1, 6)})
@@ -0,0 +1,91 @@
+import random
+import unittest
+import pydician
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class _MinimalRandomSource():
+    # A random source with nothing but the required methods, which can't sample histograms.
+
+    def __init__(self, seed):
+        self._random = random.Random(seed)
+
+    def random(self):
+        return self._random.random()
+
+    def randint(self, a, b):
+        return self._random.randint(a, b)
+
+
+class TestLargePools(unittest.TestCase):
+    _EXPRESSION = '40d6'
+    _SAMPLES = 4000
+
+    def setUp(self):
+        self._threshold = pydician.DiceRollOp.large_pool_threshold
+        pydician.DiceRollOp.large_pool_threshold = 20
+
+    def tearDown(self):
+        pydician.DiceRollOp.large_pool_threshold = self._threshold
+
+    def _assert_matches_distribution(self, samples):
+        # Kolmogorov-Smirnov test against the exact distribution, at a significance level of about 0.001.
+        distribution = pydician.parse(self._EXPRESSION).distribution()
+        cumulative = 0
+        max_difference = 0
+        samples = sorted(samples)
+        index = 0
+        for value, probability in distribution.items():
+            cumulative += probability
+            while index < len(samples) and samples[index] <= value:
+                index += 1
+            max_difference = max(max_difference, abs(index / len(samples) - float(cumulative)))
+        self.assertEqual(index, len(samples))
+        self.assertLess(max_difference, 1.95 / len(samples) ** 0.5)
+
+    def _assert_roll_matches_distribution(self, roll, rng):
+        self._assert_matches_distribution([roll(rng) for _ in range(self._SAMPLES)])
+
+    @unittest.skipIf(numpy is None and not hasattr(random.Random, 'binomialvariate'),
+                     'neither NumPy nor random.binomialvariate() are available')
+    def test_run(self):
+        self._assert_roll_matches_distribution(pydician.parse(self._EXPRESSION).run, random.Random(1))
+
+    @unittest.skipIf(numpy is None and not hasattr(random.Random, 'binomialvariate'),
+                     'neither NumPy nor random.binomialvariate() are available')
+    def test_compiled(self):
+        self._assert_roll_matches_distribution(pydician.compile(self._EXPRESSION), random.Random(2))
+
+    def test_fixed_dice(self):
+        self._assert_roll_matches_distribution(pydician.FixedDiceRollOp(40, 6).run, random.Random(3))
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_numpy_generator(self):
+        rng = pydician.NumpyRandomSource(numpy.random.default_rng(4))
+        self._assert_roll_matches_distribution(pydician.parse(self._EXPRESSION).run, rng)
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_run_batch(self):
+        samples = pydician.parse(self._EXPRESSION).run_batch(self._SAMPLES, numpy.random.default_rng(5))
+        self._assert_matches_distribution(samples.tolist())
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_run_batch_from_minimal_source(self):
+        op = pydician.parse(self._EXPRESSION)
+        samples = op.run_batch(self._SAMPLES, _MinimalRandomSource(8))
+        self._assert_matches_distribution(samples.tolist())
+        self.assertEqual(samples.tolist(), op.run_batch(self._SAMPLES, _MinimalRandomSource(8)).tolist())
+
+    @unittest.skipIf(not hasattr(random.Random, 'binomialvariate'), 'random.binomialvariate() is not available')
+    def test_binomial_sampling(self):
+        class NoNumpyRandom(random.Random):
+            getrandbits = None
+
+        self._assert_roll_matches_distribution(pydician.parse(self._EXPRESSION).run, NoNumpyRandom(6))
+
+    def test_falls_back_to_single_dice(self):
+        self._assert_roll_matches_distribution(pydician.parse(self._EXPRESSION).run, _MinimalRandomSource(7))
@@ -167,3 +167,22 @@ class TestNotEqualOp(_TestBinaryLogicalComparisonOp):
                 op = pydician.NotEqualOp(pydician.LiteralValueOp(lv),
                                          pydician.LiteralValueOp(rv))
                 self.assertEqual(op.run(), 1 if lv!=rv else 0)
+
+
+class TestSlots(unittest.TestCase):
+    def test_operations_have_no_dict(self):
+        ops = [
+                pydician.parse('-(1d4)d6 + 2 * 3 - 1 / 2 >= 10'),
+                pydician.parse('d6 < 1 > 2 = 3 <= 4 >= 5 <> 6'),
+                pydician.FixedDiceRollOp(3, 6)
+            ]
+        while ops:
+            op = ops.pop()
+            self.assertFalse(hasattr(op, '__dict__'), type(op).__name__)
+            ops.extend(getattr(op, name) for name in ('_operand', '_left_operand', '_right_operand')
+                       if hasattr(op, name))
+
+    def test_token_has_no_dict(self):
+        token = pydician.Token(pydician.TokenType.INTEGER, '6', 1, 2)
+        self.assertFalse(hasattr(token, '__dict__'))
+        self.assertEqual((token.type, token.value, token.line, token.column), (pydician.TokenType.INTEGER, '6', 1, 2))
@@ -0,0 +1,55 @@
+import unittest
+import pydician
+
+
+class TestOptimize(unittest.TestCase):
+    def _assert_optimized(self, expression, expected_repr):
+        self.assertEqual(repr(pydician.parse(expression, optimize=True)), expected_repr)
+
+    def test_not_optimized_by_default(self):
+        self.assertEqual(repr(pydician.parse('2 + 3')), 'SumOp(LiteralValueOp(2), LiteralValueOp(3))')
+
+    def test_folds_deterministic_operations(self):
+        self._assert_optimized('(2 + 3) * 4', 'LiteralValueOp(20)')
+        self._assert_optimized('-(10 / 4)', 'LiteralValueOp(-2.5)')
+        self._assert_optimized('1 + 1 = 2', 'LiteralValueOp(1)')
+        self._assert_optimized('0d6', 'LiteralValueOp(0)')
+
+    def test_keeps_failing_operations(self):
+        op = pydician.parse('1 / 0', optimize=True)
+        self.assertIsInstance(op, pydician.DivideOp)
+        with self.assertRaises(ZeroDivisionError):
+            op.run()
+
+    def test_specializes_fixed_dice(self):
+        self._assert_optimized('d20', 'FixedDiceRollOp(1, 20)')
+        self._assert_optimized('(1 + 2)d(2 * 3)', 'FixedDiceRollOp(3, 6)')
+        self._assert_optimized('(1d4)d6', 'DiceRollOp(FixedDiceRollOp(1, 4), DieOp(LiteralValueOp(6)))')
+
+    def test_merges_dice_chains(self):
+        self._assert_optimized('1d6 + 1d6 + 1d6', 'FixedDiceRollOp(3, 6)')
+        self._assert_optimized('2 + 1d6 + 3 + 1d6', 'SumOp(FixedDiceRollOp(2, 6), LiteralValueOp(5))')
+        self._assert_optimized('-1d6 - 1d6', 'NegateOp(FixedDiceRollOp(2, 6))')
+        self._assert_optimized('1d6 - 1d6', 'SubtractOp(FixedDiceRollOp(1, 6), FixedDiceRollOp(1, 6))')
+
+    def test_removes_double_negation(self):
+        self._assert_optimized('-(-1d6)', 'FixedDiceRollOp(1, 6)')
+
+    def test_keeps_order_of_non_integer_chains(self):
+        self._assert_optimized('1d6 / 2 + 1 + 2', 'SumOp(SumOp(DivideOp(FixedDiceRollOp(1, 6), LiteralValueOp(2)), '
+                                                  'LiteralValueOp(1)), LiteralValueOp(2))')
+
+    def test_leaves_original_untouched(self):
+        op = pydician.parse('1d6 + 1d6')
+        original_repr = repr(op)
+        op.optimize()
+        self.assertEqual(repr(op), original_repr)
+
+    def test_preserves_distribution(self):
+        for expression in ['1d6 + 2 - 1d6 + 1d6 - 3', '(1d2)d4 * 2 + 1d4 >= 5', '-(2 - 1d4) + (1 + 1)d3']:
+            op = pydician.parse(expression)
+            self.assertEqual(op.optimize().distribution(), op.distribution())
+
+    def test_fixed_dice_roll_range(self):
+        op = pydician.FixedDiceRollOp(3, 4)
+        self.assertEqual(set(op.run() for _ in range(2000)), set(range(3, 13)))
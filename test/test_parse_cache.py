@@ -0,0 +1,78 @@
+import unittest
+import pydician
+
+
+class TestParseCache(unittest.TestCase):
+    def test_reuses_trees(self):
+        cache = pydician.ParseCache()
+        first = cache.parse('1d20 + 5')
+        second = cache.parse('1d20 + 5')
+        self.assertIs(first, second)
+        self.assertEqual(cache.info(), pydician.ParseCacheInfo(hits=1, misses=1, evictions=0, maxsize=1024, currsize=1))
+
+    def test_optimized_trees_are_cached_apart(self):
+        cache = pydician.ParseCache()
+        self.assertIsNot(cache.parse('1 + 2'), cache.parse('1 + 2', optimize=True))
+        self.assertIsInstance(cache.parse('1 + 2', optimize=True), pydician.LiteralValueOp)
+
+    def test_evicts_least_recently_used(self):
+        cache = pydician.ParseCache(2)
+        first = cache.parse('1d4')
+        cache.parse('1d6')
+        cache.parse('1d4')
+        cache.parse('1d8')
+        self.assertIs(cache.parse('1d4'), first)
+        self.assertEqual(cache.info(), pydician.ParseCacheInfo(hits=2, misses=3, evictions=1, maxsize=2, currsize=2))
+
+    def test_resize(self):
+        cache = pydician.ParseCache()
+        for expression in ['1d4', '1d6', '1d8']:
+            cache.parse(expression)
+        cache.resize(1)
+        self.assertEqual(cache.info().currsize, 1)
+        self.assertEqual(cache.info().evictions, 2)
+        with self.assertRaises(ValueError):
+            cache.resize(-1)
+        with self.assertRaises(TypeError):
+            cache.resize(1.5)
+        self.assertEqual(cache.info().maxsize, 1)
+
+    def test_invalid_maxsize(self):
+        with self.assertRaises(ValueError):
+            pydician.ParseCache(-1)
+
+        for maxsize in (1.5, '8', None):
+            with self.subTest(maxsize=maxsize):
+                with self.assertRaises(TypeError):
+                    pydician.ParseCache(maxsize)
+
+    def test_disabled(self):
+        cache = pydician.ParseCache(0)
+        self.assertIsNot(cache.parse('1d6'), cache.parse('1d6'))
+        self.assertEqual(cache.info(), pydician.ParseCacheInfo(hits=0, misses=2, evictions=0, maxsize=0, currsize=0))
+
+    def test_clear(self):
+        cache = pydician.ParseCache()
+        cache.parse('1d6')
+        cache.parse('1d6')
+        cache.clear()
+        self.assertEqual(cache.info(), pydician.ParseCacheInfo(hits=0, misses=0, evictions=0, maxsize=1024, currsize=0))
+
+    def test_errors_are_not_cached(self):
+        cache = pydician.ParseCache()
+        for _ in range(2):
+            with self.assertRaises(pydician.ParseError):
+                cache.parse('1d')
+        self.assertEqual(cache.info().currsize, 0)
+
+    def test_empty_expressions_are_cached(self):
+        cache = pydician.ParseCache()
+        self.assertIsNone(cache.parse(''))
+        self.assertIsNone(cache.parse(''))
+        self.assertEqual(cache.info(), pydician.ParseCacheInfo(hits=1, misses=1, evictions=0, maxsize=1024, currsize=1))
+
+    def test_free_functions_use_cache(self):
+        pydician.parse_cache.clear()
+        pydician.roll('1d6 + 1')
+        pydician.parse('1d6 + 1')
+        self.assertEqual(pydician.parse_cache.info().hits, 1)
@@ -0,0 +1,165 @@
+import unittest
+import pydician
+
+
+_ERROR_CASES = {
+        '1 +': (pydician.EndOfStringError, 1, 4),
+        '1 + * 2': (pydician.UnexpectedTokenError, 1, 5),
+        '--1': (pydician.UnexpectedTokenError, 1, 2),
+        '2d6d6': (pydician.UnexpectedTokenError, 1, 4),
+        '1d)': (pydician.UnexpectedTokenError, 1, 3),
+        '1 2': (pydician.UnexpectedTokenError, 1, 3),
+        ')': (pydician.UnexpectedTokenError, 1, 1),
+        '(1 + (2)': (pydician.OrphanClosureBeginError, 1, 1),
+        '((1) + (': (pydician.OrphanClosureBeginError, 1, 8),
+        '1 + ()': (pydician.IncompleteEnclosedExpressionError, 1, 5),
+        '(1 + )': (pydician.IncompleteEnclosedExpressionError, 1, 1),
+        '(1 2)': (pydician.UnexpectedTokenError, 1, 4)
+    }
+
+
+class TestParser(unittest.TestCase):
+    def test_precedence_and_associativity(self):
+        cases = {
+                '1 + 2 * 3 - 4': 'SubtractOp(SumOp(LiteralValueOp(1), MultiplyOp(LiteralValueOp(2), '
+                                 'LiteralValueOp(3))), LiteralValueOp(4))',
+                '-2 * 3': 'MultiplyOp(NegateOp(LiteralValueOp(2)), LiteralValueOp(3))',
+                '1 < 2 + 3 >= 4': 'GreaterOrEqualOp(SmallerOp(LiteralValueOp(1), SumOp(LiteralValueOp(2), '
+                                  'LiteralValueOp(3))), LiteralValueOp(4))',
+                '(1d4)d(2 + 4)': 'DiceRollOp(DiceRollOp(LiteralValueOp(1), DieOp(LiteralValueOp(4))), '
+                                 'DieOp(SumOp(LiteralValueOp(2), LiteralValueOp(4))))',
+                '+d6': 'SingleDieRollOp(DieOp(LiteralValueOp(6)))'
+            }
+
+        for expression, expected in cases.items():
+            with self.subTest(expression=expression):
+                self.assertEqual(repr(pydician.Parser().parse(expression)), expected)
+
+    def test_empty_expression(self):
+        self.assertIsNone(pydician.Parser().parse(''))
+        self.assertIsNone(pydician.Parser().parse('   '))
+
+    def test_empty_expression_in_free_functions(self):
+        for expression in ('', '   '):
+            with self.subTest(expression=expression):
+                self.assertIsNone(pydician.parse(expression))
+                self.assertIsNone(pydician.roll(expression))
+                self.assertIsNone(pydician.roll_detailed(expression))
+                self.assertIsNone(pydician.compile(expression))
+                self.assertIsNone(pydician.profile(expression))
+                self.assertEqual(list(pydician.iter_rolls(expression)), [])
+                self.assertEqual(list(pydician.simulate(expression, 10, workers=1)), [])
+
+    def test_errors(self):
+        for expression, (error, line, column) in _ERROR_CASES.items():
+            with self.subTest(expression=expression):
+                with self.assertRaises(error) as context:
+                    pydician.Parser().parse(expression)
+
+                self.assertEqual((context.exception.line, context.exception.column), (line, column))
+
+    def test_long_chain(self):
+        terms = 20000
+        op = pydician.Parser().parse(' + '.join(['1d6'] * terms))
+        depth = 0
+
+        while isinstance(op, pydician.SumOp):
+            self.assertIsInstance(op._right_operand, pydician.DiceRollOp)
+            op = op._left_operand
+            depth += 1
+
+        self.assertEqual(depth, terms - 1)
+
+    def test_deep_nesting(self):
+        depth = 20000
+        op = pydician.Parser(spans=True).parse('(' * depth + '1d6' + ' + 1)' * depth)
+        self.assertEqual(op.span, pydician.SourceSpan(1, 2, 1, 6 * depth + 3))
+
+        with self.assertRaises(pydician.OrphanClosureBeginError) as context:
+            pydician.Parser().parse('(' * depth + '1')
+
+        self.assertEqual(context.exception.column, depth)
+
+
+class TestParseMany(unittest.TestCase):
+    def test_valid_expressions(self):
+        expressions = ['1d20 + 5', '(1d4)d6 >= 10', '', '3D6']
+        results = pydician.Parser().parse_many(expressions)
+        self.assertEqual(len(results), len(expressions))
+
+        for expression, result in zip(expressions, results):
+            with self.subTest(expression=expression):
+                self.assertTrue(result.ok)
+                self.assertEqual(result.diagnostics, ())
+                self.assertEqual(result.operation, pydician.Parser().parse(expression))
+
+    def test_diagnostics_include_raised_error(self):
+        expressions = list(_ERROR_CASES) + ['1d6 + x', '1\n  + ?', '(x10>=d10', '((1?10']
+        results = pydician.Parser().parse_many(expressions)
+
+        for expression, result in zip(expressions, results):
+            with self.subTest(expression=expression):
+                with self.assertRaises(pydician.ParseError) as context:
+                    pydician.Parser().parse(expression)
+
+                self.assertFalse(result.ok)
+                self.assertIsNone(result.operation)
+                self.assertIn((type(context.exception), context.exception.line, context.exception.column),
+                              [(diagnostic.error_class, diagnostic.line, diagnostic.column)
+                               for diagnostic in result.diagnostics])
+
+    def test_diagnostics_are_in_source_order(self):
+        diagnostics = pydician.Parser().parse_many(['(x10>=d10'])[0].diagnostics
+        self.assertEqual([(diagnostic.error_class, diagnostic.column) for diagnostic in diagnostics],
+                         [(pydician.OrphanClosureBeginError, 1), (pydician.UnknownSymbolError, 2)])
+
+    def test_offending_tokens(self):
+        cases = {
+                '1 + * 2': (pydician.TokenType.MULTIPLY, 1, 5),
+                '(1 + 2': (pydician.TokenType.LEFT_PARENTHESIS, 1, 1),
+                '1 +': (pydician.TokenType.END, 1, 4)
+            }
+
+        for expression, (token_type, line, column) in cases.items():
+            with self.subTest(expression=expression):
+                token = pydician.Parser().parse_many([expression])[0].diagnostics[0].token
+                self.assertEqual((token.type, token.line, token.column), (token_type, line, column))
+
+        self.assertIsNone(pydician.Parser().parse_many(['1 $ 2'])[0].diagnostics[0].token)
+
+    def test_multiple_problems(self):
+        cases = {
+                '1 + * 2 - / 3': [(pydician.UnexpectedTokenError, 1, 5), (pydician.UnexpectedTokenError, 1, 11)],
+                '((1 +': [(pydician.OrphanClosureBeginError, 1, 2), (pydician.OrphanClosureBeginError, 1, 1)],
+                '1d6 $ + () + 2 2': [(pydician.UnknownSymbolError, 1, 5),
+                                     (pydician.IncompleteEnclosedExpressionError, 1, 9),
+                                     (pydician.UnexpectedTokenError, 1, 16)],
+                '2d6d6 + 1d': [(pydician.UnexpectedTokenError, 1, 4), (pydician.EndOfStringError, 1, 11)],
+                '1 (2 + 3) + (': [(pydician.UnexpectedTokenError, 1, 3), (pydician.OrphanClosureBeginError, 1, 13)]
+            }
+
+        for expression, expected in cases.items():
+            with self.subTest(expression=expression):
+                diagnostics = pydician.Parser().parse_many([expression])[0].diagnostics
+                self.assertEqual([(d.error_class, d.line, d.column) for d in diagnostics], expected)
+
+    def test_parser_still_raises_afterwards(self):
+        parser = pydician.Parser()
+        parser.parse_many(['1 +'])
+
+        with self.assertRaises(pydician.EndOfStringError):
+            parser.parse('1 +')
+
+    def test_optimize(self):
+        result = pydician.Parser().parse_many(['1d6 + 1d6 + 2 * 3'], optimize=True)[0]
+        self.assertEqual(result.operation, pydician.SumOp(pydician.FixedDiceRollOp(2, 6), pydician.LiteralValueOp(6)))
+
+    def test_deep_nesting(self):
+        depth = 20000
+        diagnostics = pydician.Parser().parse_many(['(' * depth + '1 +'])[0].diagnostics
+        self.assertEqual(len(diagnostics), depth)
+        self.assertEqual(diagnostics[0].column, depth)
+
+
+if __name__ == '__main__':
+    unittest.main()
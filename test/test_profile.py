@@ -0,0 +1,143 @@
+import random
+import unittest
+import pydician
+
+
+def _nodes(op):
+    nodes = [op]
+
+    for name in ('_operand', '_left_operand', '_right_operand'):
+        if hasattr(op, name):
+            nodes.extend(_nodes(getattr(op, name)))
+
+    return nodes
+
+
+class TestSourceSpans(unittest.TestCase):
+    def test_spans(self):
+        source = '-(1d4)d6 + 2 *  3 >= 10'
+        spans = [(type(op).__name__, source[op.span.column - 1:op.span.end_column - 1])
+                 for op in _nodes(pydician.Parser(spans=True).parse(source))]
+        self.assertEqual(spans, [
+                ('GreaterOrEqualOp', source),
+                ('SumOp', '-(1d4)d6 + 2 *  3'),
+                ('NegateOp', '-(1d4)d6'),
+                ('DiceRollOp', '(1d4)d6'),
+                ('DiceRollOp', '1d4'),
+                ('LiteralValueOp', '1'),
+                ('DieOp', 'd4'),
+                ('LiteralValueOp', '4'),
+                ('DieOp', 'd6'),
+                ('LiteralValueOp', '6'),
+                ('MultiplyOp', '2 *  3'),
+                ('LiteralValueOp', '2'),
+                ('LiteralValueOp', '3'),
+                ('LiteralValueOp', '10')
+            ])
+
+    def test_single_die_span(self):
+        self.assertEqual(pydician.Parser(spans=True).parse('  d20').span, pydician.SourceSpan(1, 3, 1, 6))
+
+    def test_optimize_keeps_spans(self):
+        op = pydician.Parser(spans=True).parse('(1d6)d(2 * 3) * 2', optimize=True)
+        self.assertEqual(op.span, pydician.SourceSpan(1, 1, 1, 18))
+
+    def test_optimized_nodes_keep_spans(self):
+        source = '(1d6)d(2 * 3) + -(4 - 1) + 0d8'
+        op = pydician.Parser(spans=True).parse(source, optimize=True)
+        spans = [(type(node).__name__, source[node.span.column - 1:node.span.end_column - 1])
+                 for node in _nodes(op) if node.span is not None]
+        self.assertEqual(spans, [
+                ('SubtractOp', source),
+                ('DiceRollOp', '(1d6)d(2 * 3)'),
+                ('FixedDiceRollOp', '1d6'),
+                ('DieOp', 'd(2 * 3)'),
+                ('LiteralValueOp', '2 * 3')
+            ])
+
+    def test_merged_dice_take_the_chain_span(self):
+        self.assertEqual(pydician.Parser(spans=True).parse('1d6 + 2d6', optimize=True).span, pydician.SourceSpan(1, 1, 1, 10))
+
+    def test_spans_are_opt_in(self):
+        self.assertTrue(all(node.span is None for node in _nodes(pydician.Parser().parse('(1d4)d6 + 2'))))
+        self.assertTrue(all(node.span is None for node in _nodes(pydician.parse('(1d4)d6 + 2'))))
+
+    def test_built_operations_have_no_span(self):
+        self.assertIsNone(pydician.SumOp(pydician.LiteralValueOp(1), pydician.LiteralValueOp(2)).span)
+
+
+class TestProfiler(unittest.TestCase):
+    def test_report(self):
+        source = '(1d4)d6 + 2 * 3d8'
+        report = pydician.profile(source, 100).report()
+        self.assertEqual([(e.operation, e.depth, e.source) for e in report], [
+                ('SumOp', 0, source),
+                ('DiceRollOp', 1, '(1d4)d6'),
+                ('DiceRollOp', 2, '1d4'),
+                ('LiteralValueOp', 3, '1'),
+                ('LiteralValueOp', 3, '4'),
+                ('LiteralValueOp', 2, '6'),
+                ('MultiplyOp', 1, '2 * 3d8'),
+                ('LiteralValueOp', 2, '2'),
+                ('DiceRollOp', 2, '3d8'),
+                ('LiteralValueOp', 3, '3'),
+                ('LiteralValueOp', 3, '8')
+            ])
+        self.assertTrue(all(e.calls == 100 for e in report))
+        self.assertTrue(all(0 <= e.self_time <= e.total_time for e in report))
+        self.assertEqual(report[2].dice, 100)
+        self.assertEqual(report[8].dice, 300)
+        self.assertTrue(100 <= report[1].dice <= 400)
+
+    def test_fixed_dice_are_counted(self):
+        profiler = pydician.Profiler(pydician.FixedDiceRollOp(4, 6))
+
+        for _ in range(10):
+            profiler.run()
+
+        self.assertEqual(profiler.report()[0].dice, 40)
+
+    def test_results_match_run(self):
+        op = pydician.parse('(1d4)d6 + 2 * 3d8 - 1d100 / 3')
+        profiler = pydician.Profiler(op)
+        rng = random.Random(5)
+        expected = [op.run(rng) for _ in range(50)]
+        rng = random.Random(5)
+        self.assertEqual([profiler.run(rng) for _ in range(50)], expected)
+
+    def test_tree_is_left_untouched(self):
+        op = pydician.Parser(spans=True).parse('1d6 + 2')
+        nodes = _nodes(op)
+        pydician.Profiler(op).run()
+        self.assertEqual(_nodes(op), nodes)
+        self.assertFalse(any(type(node).__name__ == '_ProfiledOp' for node in nodes))
+
+    def test_synthetic_operands_are_not_reported(self):
+        source = 'd6 + 3d8'
+        profiler = pydician.Profiler(pydician.Parser(spans=True).parse(source, optimize=True), source)
+        profiler.run()
+        self.assertEqual([(e.operation, e.source, e.dice) for e in profiler.report()], [
+                ('SumOp', source, 0),
+                ('FixedDiceRollOp', 'd6', 1),
+                ('FixedDiceRollOp', '3d8', 3)
+            ])
+
+        profiler = pydician.profile('d6', 4)
+        self.assertEqual([(e.operation, e.source, e.dice) for e in profiler.report()], [
+                ('SingleDieRollOp', 'd6', 4),
+                ('LiteralValueOp', '6', 0)
+            ])
+
+    def test_reset(self):
+        profiler = pydician.profile('1d6', 5)
+        profiler.reset()
+        self.assertEqual([(e.calls, e.dice, e.total_time) for e in profiler.report()], [(0, 0, 0.0)] * 3)
+
+    def test_format_report(self):
+        text = pydician.profile('1d6 + 2', 3).format_report()
+        self.assertIn('SumOp at 1:1: 1d6 + 2', text)
+        self.assertIn('    LiteralValueOp at 1:7: 2', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import pickle
+import random
+import unittest
+import pydician
+
+
+class TestProgram(unittest.TestCase):
+    _EXPRESSIONS = [
+            '1d20 + 5',
+            '(1d4)d6 + 2 * 3d8 - 1d100 / 3',
+            '-d6 <> 3',
+            '1d6 < 1d6 > 0 = 1 <= 1 >= 0',
+            '7 / 2 * 2d6',
+            '(1d2 - 1)d6',
+            '3d(1d4 + 1) - -2',
+            '99999999999999999999 * 1d6 + 1'
+        ]
+
+    def _assert_matches_run(self, op):
+        program = op.lower()
+        expected = [op.run(random.Random(seed)) for seed in range(20)]
+        results = [program.run(random.Random(seed)) for seed in range(20)]
+        self.assertEqual(results, expected)
+        self.assertEqual([type(r) for r in results], [type(r) for r in expected])
+
+    def test_matches_run(self):
+        for expression in self._EXPRESSIONS:
+            with self.subTest(expression=expression):
+                self._assert_matches_run(pydician.parse(expression))
+
+    def test_matches_run_of_optimized_trees(self):
+        for expression in self._EXPRESSIONS:
+            with self.subTest(expression=expression):
+                self._assert_matches_run(pydician.parse(expression, optimize=True))
+
+    def test_matches_run_of_large_pools(self):
+        self._assert_matches_run(pydician.parse('(1000 + 1d10)d6 + 2000d(1d3 + 10)'))
+        self._assert_matches_run(pydician.FixedDiceRollOp(5000, 20))
+
+    def test_deep_trees(self):
+        terms = 50000
+        op = pydician.Parser().parse(' - '.join(['1'] * terms))
+        self.assertEqual(op.lower().run(), 2 - terms)
+
+    def test_constants(self):
+        program = pydician.SumOp(pydician.LiteralValueOp(1.5), pydician.LiteralValueOp(1 << 70)).lower()
+        self.assertEqual(program.constants, (1.5, 1 << 70))
+        self.assertEqual(program.run(), 1.5 + (1 << 70))
+
+    def test_pickle(self):
+        program = pydician.parse('(1d4)d6 + 2 * 3d8 / 7').lower()
+        self.assertEqual(pickle.loads(pickle.dumps(program)), program)
+
+    def test_lone_die_cannot_be_lowered(self):
+        with self.assertRaises(TypeError):
+            pydician.DieOp(pydician.LiteralValueOp(6)).lower()
+
+
+if __name__ == '__main__':
+    unittest.main()
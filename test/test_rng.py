@@ -0,0 +1,79 @@
+import random
+import threading
+import unittest
+import pydician
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class TestRandomSources(unittest.TestCase):
+    _EXPRESSION = '(1d4)d6 + 3d8 * 2 - 1d100'
+
+    def _rolls(self, roll, rng_factory):
+        return [[roll(rng) for _ in range(50)] for rng in (rng_factory(), rng_factory())]
+
+    def test_seeded_run_is_reproducible(self):
+        op = pydician.parse(self._EXPRESSION)
+        first, second = self._rolls(op.run, lambda: random.Random(42))
+        self.assertEqual(first, second)
+
+    def test_seeded_compiled_is_reproducible(self):
+        compiled = pydician.compile(self._EXPRESSION)
+        first, second = self._rolls(compiled, lambda: random.Random(42))
+        self.assertEqual(first, second)
+
+    def test_seeded_roll_is_reproducible(self):
+        first, second = self._rolls(lambda rng: pydician.roll(self._EXPRESSION, rng), lambda: random.Random(7))
+        self.assertEqual(first, second)
+
+    def test_system_random(self):
+        result = pydician.parse('3d6').run(random.SystemRandom())
+        self.assertTrue(3 <= result <= 18)
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_numpy_generator(self):
+        op = pydician.parse(self._EXPRESSION)
+        first, second = self._rolls(op.run, lambda: numpy.random.default_rng(3))
+        self.assertEqual(first, second)
+        first, second = self._rolls(op.compile(), lambda: pydician.NumpyRandomSource(numpy.random.default_rng(3)))
+        self.assertEqual(first, second)
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_seeded_run_batch_is_reproducible(self):
+        op = pydician.parse(self._EXPRESSION)
+        for rng_factory in (lambda: numpy.random.default_rng(5), lambda: random.Random(5)):
+            first, second = (op.run_batch(100, rng_factory()) for _ in range(2))
+            self.assertEqual(first.tolist(), second.tolist())
+
+    def test_invalid_source(self):
+        with self.assertRaises(TypeError):
+            pydician.parse('1d6').run(object())
+
+
+class TestDefaultRandomSource(unittest.TestCase):
+    def test_seed(self):
+        op = pydician.parse('10d10')
+        pydician.seed(1234)
+        first = [op.run() for _ in range(20)]
+        pydician.seed(1234)
+        self.assertEqual([op.run() for _ in range(20)], first)
+
+    def test_thread_local(self):
+        found = []
+        thread = threading.Thread(target=lambda: found.append(pydician.default_rng()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(found[0], pydician.default_rng())
+
+    def test_set_default_rng(self):
+        previous = pydician.default_rng()
+        try:
+            pydician.set_default_rng(random.Random(9))
+            first = pydician.roll('5d20')
+            pydician.set_default_rng(random.Random(9))
+            self.assertEqual(pydician.roll('5d20'), first)
+        finally:
+            pydician.set_default_rng(previous)
@@ -0,0 +1,115 @@
+import asyncio
+import os
+import random
+import tempfile
+import unittest
+import pydician
+import pydician_server
+
+
+class TestRollServer(unittest.IsolatedAsyncioTestCase):
+    async def _serve(self, **options):
+        self.server = pydician_server.RollServer(rng=random.Random(42), **options)
+        listener = await self.server.start('127.0.0.1', 0)
+        self.addAsyncCleanup(listener.wait_closed)
+        self.addCleanup(listener.close)
+        client = await pydician_server.RollClient.connect('127.0.0.1', listener.sockets[0].getsockname()[1])
+        self.addAsyncCleanup(client.close)
+        return client
+
+    async def test_roll(self):
+        client = await self._serve()
+        self.assertIn(await client.roll('1d6'), range(1, 7))
+        self.assertEqual(await client.roll('2 * 3'), 6)
+
+    async def test_roll_count(self):
+        client = await self._serve()
+        rolls = await client.roll('2d6', count=500)
+        self.assertEqual(len(rolls), 500)
+        self.assertTrue(all(r in range(2, 13) for r in rolls))
+
+    async def test_parse(self):
+        client = await self._serve()
+        self.assertEqual(await client.parse('4d6'), repr(pydician.parse('4d6')))
+
+    async def test_concurrent_requests_are_batched(self):
+        client = await self._serve(batch_delay=0.01)
+        rolls = await asyncio.gather(*(client.roll('1d20') for _ in range(50)), client.roll('1d4', count=3))
+        self.assertTrue(all(r in range(1, 21) for r in rolls[:-1]))
+        self.assertEqual(len(rolls[-1]), 3)
+        self.assertEqual(self.server.info(), pydician_server.RollServerInfo(51, 2, 53, 0))
+
+    async def test_errors(self):
+        client = await self._serve()
+
+        with self.assertRaises(pydician_server.RollServiceError) as context:
+            await client.roll('1d6 $')
+
+        self.assertEqual(context.exception.type, 'UnknownSymbolError')
+
+        with self.assertRaises(pydician_server.RollServiceError) as context:
+            await client.roll('1d6', count=0)
+
+        self.assertEqual(context.exception.type, 'RequestError')
+
+        with self.assertRaises(pydician_server.RollServiceError) as context:
+            await client.request({'op': 'shuffle', 'expression': '1d6'})
+
+        self.assertEqual(context.exception.type, 'RequestError')
+
+        for op in ('roll', 'parse'):
+            with self.assertRaises(pydician_server.RollServiceError) as context:
+                await client.request({'op': op, 'expression': '  '})
+
+            self.assertEqual(context.exception.type, 'RequestError')
+
+        # The connection outlives its failed requests.
+        self.assertIn(await client.roll('1d6'), range(1, 7))
+
+    async def test_failed_roll_does_not_fail_its_batch(self):
+        client = await self._serve(batch_delay=0.01)
+        results = await asyncio.gather(*(client.roll('6 / (1d2 - 1)') for _ in range(20)), return_exceptions=True)
+        failed = [r for r in results if isinstance(r, pydician_server.RollServiceError)]
+        self.assertTrue(0 < len(failed) < 20)
+        self.assertTrue(all(r.type == 'ZeroDivisionError' for r in failed))
+
+    async def test_large_magnitude_rolls_are_exact(self):
+        client = await self._serve()
+
+        # Both below and above the size of the requests that are rolled through run_batch().
+        for count in (2, 500):
+            with self.subTest(count=count):
+                rolls = await client.roll('3d6 * 4000000000000000000', count=count)
+                self.assertEqual(len(rolls), count)
+                self.assertTrue(all(r in range(12000000000000000000, 72000000000000000001, 4000000000000000000)
+                                    for r in rolls))
+
+    async def test_timeout(self):
+        client = await self._serve(batch_delay=0.5)
+
+        with self.assertRaises(pydician_server.RollServiceError) as context:
+            await client.roll('1d6', timeout=0.01)
+
+        self.assertEqual(context.exception.type, 'TimeoutError')
+
+    async def test_large_batches_do_not_block_other_requests(self):
+        client = await self._serve()
+        # Each of these rolls draws about 100000 dice, one by one.
+        large = asyncio.ensure_future(client.roll('(100000 + 1d2)d1000000', count=50))
+        await asyncio.sleep(0.01)
+        self.assertIn(await client.roll('1d6'), range(1, 7))
+        self.assertFalse(large.done())
+        self.assertEqual(len(await large), 50)
+
+    @unittest.skipUnless(hasattr(asyncio, 'start_unix_server'), 'Unix sockets are not available')
+    async def test_unix_socket(self):
+        path = os.path.join(tempfile.mkdtemp(), 'pydician.sock')
+        listener = await pydician_server.RollServer().start(path=path)
+
+        async with listener:
+            async with await pydician_server.RollClient.connect(path=path) as client:
+                self.assertIn(await client.roll('1d6'), range(1, 7))
+
+
+if __name__ == '__main__':
+    unittest.main()
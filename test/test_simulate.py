@@ -0,0 +1,51 @@
+import unittest
+import pydician
+
+
+class TestSimulate(unittest.TestCase):
+    _EXPRESSION = '(1d4)d6 + 3d8 * 2 - 1d100'
+
+    def test_number_of_rolls(self):
+        for n in (0, 1, 99, 100, 101):
+            self.assertEqual(len(pydician.simulate('1d6', n, workers=1, seed=1, block_size=10)), n)
+
+    def test_rolls_are_in_range(self):
+        rolls = pydician.simulate('2d6', 1000, workers=1, seed=1)
+        self.assertTrue(all(2 <= r <= 12 for r in rolls))
+        self.assertEqual(set(rolls), set(range(2, 13)))
+
+    def test_integer_expressions_give_integer_arrays(self):
+        self.assertEqual(pydician.simulate('1d6 + 1', 10, workers=1, seed=1).typecode, 'q')
+        self.assertEqual(pydician.simulate('1d6 > 3', 10, workers=1, seed=1).typecode, 'q')
+
+    def test_divisions_give_float_arrays(self):
+        rolls = pydician.simulate('1d6 / 2', 100, workers=1, seed=1)
+        self.assertEqual(rolls.typecode, 'd')
+        self.assertTrue(all(r * 2 in range(1, 7) for r in rolls))
+
+    def test_seeded_simulation_is_reproducible(self):
+        first = pydician.simulate(self._EXPRESSION, 500, workers=1, seed=42, block_size=64)
+        second = pydician.simulate(self._EXPRESSION, 500, workers=1, seed=42, block_size=64)
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, pydician.simulate(self._EXPRESSION, 500, workers=1, seed=43, block_size=64))
+
+    def test_results_do_not_depend_on_worker_count(self):
+        # Including more workers than blocks, the default number of workers, and a last block of a single roll.
+        for seed in ('nightly', 7):
+            expected = pydician.simulate(self._EXPRESSION, 1001, workers=1, seed=seed, block_size=100)
+
+            for workers in (2, 3, 16, None):
+                with self.subTest(seed=seed, workers=workers):
+                    self.assertEqual(pydician.simulate(self._EXPRESSION, 1001, workers=workers, seed=seed,
+                                                       block_size=100), expected)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            pydician.simulate('1d6', -1)
+
+        with self.assertRaises(ValueError):
+            pydician.simulate('1d6', 10, block_size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+from fractions import Fraction
+import pydician
+
+
+class TestStats(unittest.TestCase):
+    _EXPRESSIONS = [
+            '7',
+            '1d6',
+            '3d6 + 2',
+            '(1d4)d6',
+            '(1d3 - 1)d(2d4)',
+            '(1d4)d(1d6 + 2) * 2 - -1d3',
+            '2d6 * 1d4',
+            '-1d6 * -2d4',
+            '1d20 - 1d20',
+            '7 + 1d4 * (1d2 + 1)d6'
+        ]
+
+    def _assert_matches_distribution(self, op):
+        distribution = op.distribution()
+        mean = sum(value * probability for value, probability in distribution.items())
+        variance = sum(value * value * probability for value, probability in distribution.items()) - mean ** 2
+
+        stats = op.stats()
+        self.assertEqual(stats.mean, mean)
+        self.assertEqual(stats.variance, variance)
+        self.assertEqual(stats.minimum, min(distribution))
+        self.assertEqual(stats.maximum, max(distribution))
+
+    def test_matches_distribution(self):
+        for expression in self._EXPRESSIONS:
+            with self.subTest(expression=expression):
+                self._assert_matches_distribution(pydician.parse(expression))
+
+    def test_matches_distribution_of_optimized_trees(self):
+        for expression in self._EXPRESSIONS:
+            with self.subTest(expression=expression):
+                self._assert_matches_distribution(pydician.parse(expression, optimize=True))
+
+    def test_single_die(self):
+        stats = pydician.DieOp(pydician.LiteralValueOp(6)).stats()
+        self.assertEqual(stats, pydician.Stats(Fraction(7, 2), Fraction(35, 12), 1, 6))
+
+    def test_fractional_values(self):
+        self._assert_matches_distribution(pydician.LiteralValueOp(-2.5))
+        self._assert_matches_distribution(pydician.MultiplyOp(pydician.LiteralValueOp(Fraction(3, 2)),
+                                                              pydician.parse('2d6')))
+
+    def test_fractions(self):
+        stats = pydician.parse('1d6 * 3').stats()
+        self.assertIsInstance(stats.mean, Fraction)
+        self.assertIsInstance(stats.variance, Fraction)
+        self.assertAlmostEqual(stats.standard_deviation, float(Fraction(105, 4)) ** 0.5)
+
+    def test_large_pools(self):
+        stats = pydician.parse('1000d1000').stats()
+        self.assertEqual(stats, pydician.Stats(Fraction(500500), Fraction(83333250), 1000, 1000000))
+
+    def test_no_dice(self):
+        stats = pydician.parse('(1d2 - 1)d6').stats()
+        self.assertEqual(stats.minimum, 0)
+        self._assert_matches_distribution(pydician.parse('(1d2 - 1)d6'))
+
+    def test_unsupported(self):
+        for expression in ('1d6 / 2', '1d6 > 3', '(1d3 - 2)d6', '(3 / 2)d6', '2d(5 / 2)'):
+            with self.subTest(expression=expression):
+                with self.assertRaises(pydician.UnsupportedStatsError):
+                    pydician.parse(expression).stats()
+
+        self.assertTrue(issubclass(pydician.UnsupportedStatsError, pydician.OperationError))
+
+    def test_invalid_die(self):
+        with self.assertRaises(ValueError):
+            pydician.parse('2d(1d3 - 1)').stats()
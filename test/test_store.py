@@ -0,0 +1,103 @@
+import os
+import struct
+import tempfile
+import unittest
+import pydician
+
+
+class TestSerializeTree(unittest.TestCase):
+    _EXPRESSIONS = [
+            '1d20 + 5',
+            '(1d4)d6 + 2 * 3d8 - 1d100 / 3 >= 10',
+            '-d6 <> 3 < 1 > 0 = 1 <= 2',
+            '7 / 2 * 2d6',
+            '99999999999999999999 * 1d6 + 1'
+        ]
+
+    def test_round_trip(self):
+        for expression in self._EXPRESSIONS:
+            for optimize in (False, True):
+                with self.subTest(expression=expression, optimize=optimize):
+                    tree = pydician.parse(expression, optimize)
+                    rebuilt = pydician.deserialize_tree(pydician.serialize_tree(tree))
+                    self.assertEqual(repr(rebuilt), repr(tree))
+
+    def test_deep_trees(self):
+        tree = pydician.Parser().parse(' - '.join(['1'] * 20000))
+        self.assertEqual(pydician.deserialize_tree(pydician.serialize_tree(tree)).lower().run(), 2 - 20000)
+
+    def test_invalid_data(self):
+        data = pydician.serialize_tree(pydician.parse('1d6'))
+
+        for invalid in (b'', b'nope' + data[4:], data[:4] + b'\x63' + data[5:], data[:-8]):
+            with self.assertRaises(ValueError):
+                pydician.deserialize_tree(invalid)
+
+    def test_invalid_tags(self):
+        literal, constant, fixed_dice_roll, die = 0, 1, 2, 3
+        constants = b'[99999999999999999999]'
+
+        # Tags and constant indexes below their ranges used to wrap around, decoding as unrelated nodes and values.
+        for code in ([literal, 6, die - 14], [literal, 6, -1], [literal, 6, 1000], [constant, -1],
+                     [literal, 1, literal, 6, die, fixed_dice_roll]):
+            with self.subTest(code=code):
+                data = struct.pack('<4sHxxQQ', b'PYDT', 1, len(code), len(constants))
+                data += struct.pack(f'<{len(code)}q', *code) + constants
+
+                with self.assertRaises(ValueError):
+                    pydician.deserialize_tree(data)
+
+
+class TestExpressionStore(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'macros.store')
+        self.expressions = {f'macro {i}': f'{i % 9 + 1}d{i % 19 + 2} + {i}' for i in range(500)}
+        self.expressions['attack'] = '1d20 + 5 >= 15'
+        self.expressions['nothing'] = ''
+
+    def test_lookup(self):
+        pydician.ExpressionStore.write(self.path, self.expressions)
+
+        with pydician.ExpressionStore(self.path) as store:
+            self.assertEqual(len(store), len(self.expressions))
+            self.assertEqual(list(store), sorted(self.expressions))
+            self.assertFalse(store.optimized)
+
+            for name, expression in self.expressions.items():
+                self.assertIn(name, store)
+                self.assertEqual(repr(store[name]), repr(pydician.parse(expression)))
+                self.assertEqual(store.source(name), expression)
+
+            self.assertNotIn('macro', store)
+            self.assertIsNone(store.get('macro'))
+
+            with self.assertRaises(KeyError):
+                store['macro 500']
+
+    def test_entries_are_loaded_lazily(self):
+        pydician.ExpressionStore.write(self.path, self.expressions, optimize=True)
+
+        with pydician.ExpressionStore(self.path) as store:
+            self.assertTrue(store.optimized)
+            self.assertEqual(store._trees, {})
+            attack = store['attack']
+            self.assertIs(store['attack'], attack)
+            self.assertEqual(list(store._trees), ['attack'])
+
+        # Loaded trees outlive the store.
+        self.assertIn(attack.run(), (0, 1))
+
+    def test_repeated_names(self):
+        with self.assertRaises(ValueError):
+            pydician.ExpressionStore.write(self.path, [('a', '1'), ('a', '2')])
+
+    def test_invalid_file(self):
+        with open(self.path, 'wb') as file:
+            file.write(b'not a store, clearly')
+
+        with self.assertRaises(ValueError):
+            pydician.ExpressionStore(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
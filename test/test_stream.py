@@ -0,0 +1,50 @@
+import itertools
+import random
+import unittest
+import pydician
+
+
+class TestStream(unittest.TestCase):
+    def test_single_results(self):
+        rolls = list(itertools.islice(pydician.parse('2d6').stream(), 200))
+        self.assertEqual(len(rolls), 200)
+        self.assertTrue(all(r in range(2, 13) for r in rolls))
+
+    def test_limit(self):
+        self.assertEqual(len(list(pydician.parse('1d6').stream(limit=37))), 37)
+        self.assertEqual(list(pydician.parse('1d6').stream(limit=0)), [])
+
+    def test_chunks(self):
+        chunks = list(pydician.parse('1d6 + 1').stream(chunk_size=10, limit=25))
+        self.assertEqual([len(c) for c in chunks], [10, 10, 5])
+        self.assertTrue(all(r in range(2, 8) for c in chunks for r in c))
+
+    def test_endless_chunks(self):
+        chunks = list(itertools.islice(pydician.parse('1d6').stream(chunk_size=4), 5))
+        self.assertEqual([len(c) for c in chunks], [4] * 5)
+
+    def test_matches_compiled(self):
+        op = pydician.parse('(1d4)d6 + 3d8 * 2 - 1d100')
+        compiled = op.compile()
+        rng = random.Random(3)
+        expected = [compiled(rng) for _ in range(50)]
+        self.assertEqual(list(op.stream(limit=50, rng=random.Random(3))), expected)
+        chunks = op.stream(chunk_size=7, limit=50, rng=random.Random(3))
+        self.assertEqual(list(itertools.chain.from_iterable(chunks)), expected)
+
+    def test_iter_rolls(self):
+        self.assertEqual(list(pydician.iter_rolls('3', limit=4)), [3, 3, 3, 3])
+        self.assertEqual(list(pydician.iter_rolls('3', chunk_size=3, limit=4)), [[3, 3, 3], [3]])
+
+    def test_invalid_arguments(self):
+        op = pydician.parse('1d6')
+
+        with self.assertRaises(ValueError):
+            op.stream(chunk_size=0)
+
+        with self.assertRaises(ValueError):
+            op.stream(limit=-1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import random
+import threading
+import unittest
+import pydician
+
+
+class TestThreadSafety(unittest.TestCase):
+    _EXPRESSIONS = [
+            '1d20 + 5',
+            '4d6 + 2 * 3',
+            '2 + 1D6',
+            '(1d4)d6 >= 10',
+            '-(2d6 + 1d8) / (3 - 1d4) <> 1',
+            '1d6 +',
+            '(1d6',
+            '1d6 % 2'
+        ]
+
+    def _run_in_threads(self, work, threads=8):
+        # Runs work(index) in all threads at once and returns their results, by index.
+
+        barrier = threading.Barrier(threads)
+        results = [None] * threads
+
+        def worker(index):
+            barrier.wait()
+            results[index] = work(index)
+
+        workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+
+        for thread in workers:
+            thread.start()
+
+        for thread in workers:
+            thread.join()
+
+        return results
+
+    def _parse_all(self, parser):
+        results = []
+
+        for _ in range(50):
+            for expression in self._EXPRESSIONS:
+                try:
+                    results.append(parser.parse(expression))
+                except pydician.ParseError as error:
+                    results.append((type(error), str(error)))
+
+        return results
+
+    def test_shared_parser(self):
+        parser = pydician.Parser()
+        expected = self._parse_all(pydician.Parser())
+
+        for results in self._run_in_threads(lambda _: self._parse_all(parser)):
+            self.assertEqual(results, expected)
+
+    def test_shared_canonical_parser(self):
+        parser = pydician.Parser(canonical=True)
+        results = self._run_in_threads(lambda _: [parser.parse(expression) for expression in ('1d6 + 2', '2 + 1d6')])
+
+        for trees in results:
+            self.assertIs(trees[0], results[0][0])
+            self.assertIs(trees[1], results[0][0])
+
+    def test_shared_parse_many(self):
+        parser = pydician.Parser()
+
+        def parse_many(_):
+            return [(result.operation, [(diagnostic.error_class, diagnostic.line, diagnostic.column,
+                                         diagnostic.token and diagnostic.token.value) for diagnostic in result.diagnostics])
+                    for result in parser.parse_many(self._EXPRESSIONS * 20)]
+
+        expected = parse_many(None)
+
+        for results in self._run_in_threads(parse_many):
+            self.assertEqual(results, expected)
+
+    def test_shared_tree(self):
+        op = pydician.parse('(1d4)d6 + 2d20 - 1d8 * 3')
+
+        def run(index):
+            pydician.set_default_rng(random.Random(index))
+            return [op.run() for _ in range(200)]
+
+        for index, results in enumerate(self._run_in_threads(run)):
+            rng = random.Random(index)
+            self.assertEqual(results, [op.run(rng) for _ in range(200)])
+
+    def test_shared_compiled_expression(self):
+        roll = pydician.compile('(1d4)d6 + 2d20 - 1d8 * 3')
+
+        def run(index):
+            pydician.seed(index)
+            return [roll() for _ in range(200)]
+
+        for index, results in enumerate(self._run_in_threads(run)):
+            pydician.seed(index)
+            self.assertEqual(results, [roll() for _ in range(200)])
@@ -0,0 +1,62 @@
+import unittest
+import pydician
+
+
+def _fetch_sequentially(input_string):
+    tokenizer = pydician.Tokenizer(input_string)
+    tokens = []
+    while True:
+        token = tokenizer.next_token()
+        tokens.append(token)
+        if token.type is pydician.TokenType.END:
+            return tokens
+
+
+def _describe(tokens):
+    return [(tk.type, tk.value, tk.line, tk.column) for tk in tokens]
+
+
+class TestTokenizeAll(unittest.TestCase):
+    _TEST_STRINGS = [
+            '',
+            '   ',
+            '2d6 + 3',
+            'D20+5',
+            '(1d4)D6 >= 10 <> 2 <= 3 < 4 > 5 = 6 / 7 * 8 - 9',
+            '  1d6\n+ 2\n\n   *  3  ',
+            '<= < = >= > = <>',
+            '007 1234567890',
+            '٣d6'
+        ]
+
+    def test_matches_next_token(self):
+        for ts in self._TEST_STRINGS:
+            tokens = pydician.Tokenizer(ts).tokenize_all()
+            self.assertEqual(_describe(tokens), _describe(_fetch_sequentially(ts)))
+
+    def test_ends_with_end_token(self):
+        tokens = pydician.Tokenizer('1d6').tokenize_all()
+        self.assertEqual([tk.type for tk in tokens], [pydician.TokenType.INTEGER, pydician.TokenType.DIE,
+                                                      pydician.TokenType.INTEGER, pydician.TokenType.END])
+
+    def test_unknown_symbol(self):
+        for ts in ['1d6 + x', '1d6\n  + X', '\t?']:
+            with self.assertRaises(pydician.UnknownSymbolError) as expected:
+                _fetch_sequentially(ts)
+            with self.assertRaises(pydician.UnknownSymbolError) as found:
+                pydician.Tokenizer(ts).tokenize_all()
+            self.assertEqual((found.exception.symbol, found.exception.line, found.exception.column),
+                             (expected.exception.symbol, expected.exception.line, expected.exception.column))
+
+    def test_collects_unknown_symbols(self):
+        unknown_symbols = []
+        tokens = list(pydician.Tokenizer('1d6 + x\n? 2').iter_tokens(unknown_symbols))
+        self.assertEqual([t.value for t in tokens], ['1', 'd', '6', '+', '2', ''])
+        self.assertEqual((tokens[4].line, tokens[4].column), (2, 3))
+        self.assertEqual([(e.symbol, e.line, e.column) for e in unknown_symbols], [('x', 1, 7), ('?', 2, 1)])
+
+    def test_does_not_affect_next_token(self):
+        tokenizer = pydician.Tokenizer('1 + 2')
+        tokenizer.next_token()
+        tokenizer.tokenize_all()
+        self.assertEqual(tokenizer.next_token().type, pydician.TokenType.PLUS)
@@ -0,0 +1,97 @@
+import random
+import unittest
+from array import array
+import pydician
+
+
+class TestRollTrace(unittest.TestCase):
+    _EXPRESSIONS = [
+            '7',
+            '4d6 + 2',
+            '(1d4)d6 - d8',
+            '2d(1d4 + 2) >= 5',
+            '-3d20 * (2d6 <> 7)',
+            '0d6 + 1'
+        ]
+
+    def test_same_results_as_run(self):
+        for expression in self._EXPRESSIONS:
+            for optimize in (False, True):
+                with self.subTest(expression=expression, optimize=optimize):
+                    op = pydician.parse(expression, optimize=optimize)
+
+                    for seed in range(20):
+                        self.assertEqual(op.run_traced(random.Random(seed)).value, op.run(random.Random(seed)))
+
+    def test_dice_add_up(self):
+        for expression in self._EXPRESSIONS:
+            with self.subTest(expression=expression):
+                trace = pydician.parse(expression).run_traced(random.Random(3))
+
+                for dice_trace in trace.dice:
+                    self.assertEqual(dice_trace.total, sum(dice_trace.dice))
+                    self.assertTrue(all(1 <= die <= dice_trace.die_maximum for die in dice_trace.dice))
+
+    def test_nested_rolls(self):
+        trace = pydician.Parser(spans=True).parse('(1d4)d6 - d8').run_traced(random.Random(1))
+        count_trace, pool_trace, die_trace = trace.dice
+
+        self.assertEqual([dice_trace.operation for dice_trace in trace.dice],
+                         ['DiceRollOp', 'DiceRollOp', 'SingleDieRollOp'])
+        self.assertEqual(count_trace.span, pydician.SourceSpan(1, 2, 1, 5))
+        self.assertEqual(pool_trace.span, pydician.SourceSpan(1, 1, 1, 8))
+        self.assertEqual(die_trace.span, pydician.SourceSpan(1, 11, 1, 13))
+        self.assertEqual(len(pool_trace.dice), count_trace.total)
+        self.assertEqual(trace.value, pool_trace.total - die_trace.total)
+
+    def test_no_dice(self):
+        self.assertEqual(pydician.parse('7').run_traced(), pydician.RollTrace(7, ()))
+
+        dice_trace, = pydician.parse('0d6 + 1').run_traced().dice
+        self.assertEqual(len(dice_trace.dice), 0)
+
+    def test_typed_arrays(self):
+        for expression, itemsize in [('3d6', 2), ('3d65535', 2), ('3d65536', 4), ('3d4000000000', 4)]:
+            for optimize in (False, True):
+                with self.subTest(expression=expression, optimize=optimize):
+                    dice = pydician.parse(expression, optimize=optimize).run_traced().dice[0].dice
+                    self.assertIsInstance(dice, array)
+                    self.assertEqual(dice.itemsize, itemsize)
+                    self.assertEqual(len(dice), 3)
+
+    def test_large_pools(self):
+        dice_trace, = pydician.parse('2000d6').run_traced(random.Random(2)).dice
+        self.assertEqual(len(dice_trace.dice), 2000)
+        self.assertEqual(set(dice_trace.dice), {1, 2, 3, 4, 5, 6})
+
+    def test_large_pools_of_many_faces(self):
+        # Pools with more faces than dice are rolled die by die by run() too, from the same random numbers.
+        for expression in ('1000d5000', '(999 + 1d2)d5000'):
+            for optimize in (False, True):
+                with self.subTest(expression=expression, optimize=optimize):
+                    op = pydician.parse(expression, optimize=optimize)
+
+                    for seed in range(5):
+                        self.assertEqual(op.run_traced(random.Random(seed)).value, op.run(random.Random(seed)))
+
+    def test_leaves_tree_untouched(self):
+        op = pydician.parse('(1d4)d6 + 2')
+        expected = repr(op)
+        op.run_traced()
+
+        self.assertEqual(repr(op), expected)
+        self.assertIsInstance(op._left_operand, pydician.DiceRollOp)
+        self.assertEqual(op, pydician.parse('(1d4)d6 + 2'))
+
+    def test_errors(self):
+        with self.assertRaises(ZeroDivisionError):
+            pydician.parse('1d6 / 0').run_traced()
+
+        with self.assertRaises(ValueError):
+            pydician.parse('2d(1d1 - 1)').run_traced()
+
+    def test_roll_detailed(self):
+        trace = pydician.roll_detailed('4d6 + 2', random.Random(8))
+        self.assertEqual(trace.value, pydician.roll('4d6 + 2', random.Random(8)))
+        self.assertEqual(trace.dice[0].span, pydician.SourceSpan(1, 1, 1, 4))
+        self.assertIsNone(pydician.roll_detailed(''))